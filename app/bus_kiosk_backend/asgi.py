@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import threading
 
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
@@ -23,6 +24,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bus_kiosk_backend.settings")
 # before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+# Face models run in this process unless photo embedding is delegated to Celery -
+# load and warm them up in the background instead of inside the first upload
+from django.conf import settings  # noqa: E402
+
+if settings.FACE_EMBEDDING_EXECUTION_MODE != "celery":
+    from ml_models.face_recognition.registry import model_registry  # noqa: E402
+
+    threading.Thread(target=model_registry.warm_up, name="face-model-warmup", daemon=True).start()
+
 # Import WebSocket routing after Django setup
 from realtime.middleware import JWTAuthMiddleware  # noqa: E402
 from realtime.routing import websocket_urlpatterns  # noqa: E402
@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 
 # Set the default Django settings module
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bus_kiosk_backend.settings")
@@ -16,11 +17,36 @@ app.autodiscover_tasks()
 
 # Explicitly import tasks to ensure they're registered
 try:
+    import kiosks.tasks  # noqa: F401
     import students.tasks  # noqa: F401
 except ImportError:
     pass
 
 
+@worker_init.connect
+def preload_face_models(sender=None, **kwargs):
+    """
+    Read face model weights in the main worker process, before the prefork
+    pool forks, so every child shares them copy-on-write.
+    """
+    from ml_models.face_recognition.registry import model_registry
+
+    model_registry.preload_weights()
+
+    # solo/threads pools run tasks in this process - no child will warm up
+    pool_cls = getattr(sender, "pool_cls", None)
+    if getattr(pool_cls, "__module__", "") != "celery.concurrency.prefork":
+        model_registry.warm_up()
+
+
+@worker_process_init.connect
+def warm_up_face_models(**kwargs):
+    """Build the interpreters in each forked child and run a dummy inference."""
+    from ml_models.face_recognition.registry import model_registry
+
+    model_registry.warm_up()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
@@ -432,6 +432,11 @@ def detailed_health_check(request):
             }
             health_data["status"] = "unhealthy"
 
+    # Face models loaded in this process: load / warm-up seconds and memory added
+    from ml_models.face_recognition.registry import model_registry
+
+    health_data["ml_models"] = model_registry.metrics()
+
     # Calculate total response time
     total_response_time = time.time() - start_time
     health_data["total_response_time_ms"] = round(total_response_time * 1000, 2)
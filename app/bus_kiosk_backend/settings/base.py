@@ -393,6 +393,57 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Kiosk snapshot artifacts (built SQLite snapshots, reused until data changes)
+# Define STORAGES["snapshots"] to use a shared backend (e.g. GCS) instead of local disk
+SNAPSHOT_STORAGE_DIR = Path(os.getenv("SNAPSHOT_STORAGE_DIR", str(BASE_DIR / "snapshots")))
+
+# Kiosk delta sync: kiosks further behind than this (in dataset versions) or with
+# more changed students than this get a full snapshot instead of a delta; the
+# change journal only keeps the last SNAPSHOT_DELTA_MAX_VERSIONS versions
+SNAPSHOT_DELTA_MAX_VERSIONS = int(os.getenv("SNAPSHOT_DELTA_MAX_VERSIONS", "1000"))
+SNAPSHOT_DELTA_MAX_STUDENTS = int(os.getenv("SNAPSHOT_DELTA_MAX_STUDENTS", "500"))
+
+# Per-student embedding selection: ship at most EMBEDDINGS_PER_STUDENT embeddings per
+# student and model (0 = all), best quality_score first, skipping near-duplicates
+# (cosine above MAX_SIMILARITY, 1.0 = keep) and those below MIN_QUALITY
+SNAPSHOT_EMBEDDINGS_PER_STUDENT = int(os.getenv("SNAPSHOT_EMBEDDINGS_PER_STUDENT", "0"))
+SNAPSHOT_EMBEDDING_MIN_QUALITY = float(os.getenv("SNAPSHOT_EMBEDDING_MIN_QUALITY", "0.0"))
+SNAPSHOT_EMBEDDING_MAX_SIMILARITY = float(os.getenv("SNAPSHOT_EMBEDDING_MAX_SIMILARITY", "1.0"))
+
+# Coarse ANN index in kiosk snapshots (IVF-style k-means centroids): kiosks probe
+# the SNAPSHOT_ANN_NPROBE nearest clusters instead of scanning every embedding
+SNAPSHOT_ANN_ENABLED = os.getenv("SNAPSHOT_ANN_ENABLED", "false").lower() == "true"
+SNAPSHOT_ANN_MIN_EMBEDDINGS = int(os.getenv("SNAPSHOT_ANN_MIN_EMBEDDINGS", "2000"))
+SNAPSHOT_ANN_CLUSTER_SIZE = int(os.getenv("SNAPSHOT_ANN_CLUSTER_SIZE", "64"))
+SNAPSHOT_ANN_MAX_CLUSTERS = int(os.getenv("SNAPSHOT_ANN_MAX_CLUSTERS", "256"))
+SNAPSHOT_ANN_MAX_ITERATIONS = int(os.getenv("SNAPSHOT_ANN_MAX_ITERATIONS", "25"))
+SNAPSHOT_ANN_NPROBE = int(os.getenv("SNAPSHOT_ANN_NPROBE", "8"))
+SNAPSHOT_ANN_SEED = int(os.getenv("SNAPSHOT_ANN_SEED", "0"))
+
+# Snapshot transport compression: each artifact is precompressed once per encoding
+# and served per Accept-Encoding (zstd needs the optional zstandard package)
+SNAPSHOT_COMPRESSION_ENCODINGS = [encoding.strip() for encoding in os.getenv("SNAPSHOT_COMPRESSION_ENCODINGS", "zstd,gzip").split(",") if encoding.strip()]
+
+# Chunked snapshot transfer: kiosks fetch the artifact in fixed-size, individually
+# checksummed chunks (multiple of the SQLite page size so unchanged pages line up)
+SNAPSHOT_CHUNK_SIZE = int(os.getenv("SNAPSHOT_CHUNK_SIZE", str(256 * 1024)))
+
+# Staggered snapshot rollout: kiosks become eligible for a new snapshot at a
+# deterministic offset within the window (outside their operation slots), and at
+# most MAX_CONCURRENT_DOWNLOADS kiosks download at once (0 disables the cap)
+SNAPSHOT_ROLLOUT_WINDOW_SECONDS = int(os.getenv("SNAPSHOT_ROLLOUT_WINDOW_SECONDS", "900"))
+SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS = int(os.getenv("SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS", "20"))
+SNAPSHOT_ROLLOUT_DOWNLOAD_TIMEOUT = int(os.getenv("SNAPSHOT_ROLLOUT_DOWNLOAD_TIMEOUT", "300"))
+SNAPSHOT_ROLLOUT_RETRY_AFTER_SECONDS = int(os.getenv("SNAPSHOT_ROLLOUT_RETRY_AFTER_SECONDS", "30"))
+
+# Background snapshot builds: data changes queue one rebuild (debounced) of every
+# kiosk scope on the default Celery queue; requests serve the last good artifact meanwhile
+SNAPSHOT_BACKGROUND_BUILD = os.getenv("SNAPSHOT_BACKGROUND_BUILD", "false").lower() == "true"
+SNAPSHOT_REBUILD_DEBOUNCE_SECONDS = int(os.getenv("SNAPSHOT_REBUILD_DEBOUNCE_SECONDS", "30"))
+# Inline builds are single-flight per scope; the lock expires after this many
+# seconds, after which a waiting request builds on its own
+SNAPSHOT_BUILD_LOCK_TIMEOUT = int(os.getenv("SNAPSHOT_BUILD_LOCK_TIMEOUT", "120"))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -437,3 +488,13 @@ BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 FACE_ENROLLMENT_MIN_PHOTOS = int(os.getenv("FACE_ENROLLMENT_MIN_PHOTOS", "3"))
 FACE_ENROLLMENT_MAX_PHOTOS = int(os.getenv("FACE_ENROLLMENT_MAX_PHOTOS", "5"))
 FACE_ENROLLMENT_PHOTO_MAX_SIZE_MB = int(os.getenv("FACE_ENROLLMENT_PHOTO_MAX_SIZE_MB", "5"))
+
+# Student photo embeddings: "sync" runs face detection + inference inside the photo
+# save, "celery" drains pending photos in batches on the Celery worker (debounced),
+# "thread" drains them on an in-process thread pool. Failed photos keep their reason
+# and are retried (process_photo_embeddings --retry-failed) up to MAX_ATTEMPTS times
+FACE_EMBEDDING_EXECUTION_MODE = os.getenv("FACE_EMBEDDING_EXECUTION_MODE", "sync").lower()
+FACE_EMBEDDING_BATCH_SIZE = int(os.getenv("FACE_EMBEDDING_BATCH_SIZE", "16"))
+FACE_EMBEDDING_MAX_ATTEMPTS = int(os.getenv("FACE_EMBEDDING_MAX_ATTEMPTS", "3"))
+FACE_EMBEDDING_THREAD_WORKERS = int(os.getenv("FACE_EMBEDDING_THREAD_WORKERS", "1"))
+FACE_EMBEDDING_DEBOUNCE_SECONDS = int(os.getenv("FACE_EMBEDDING_DEBOUNCE_SECONDS", "5"))
@@ -216,6 +216,10 @@ else:
 celery_broker_url = os.getenv("CELERY_BROKER_URL")
 if celery_broker_url:
     CELERY_BROKER_URL = celery_broker_url
+    # Build kiosk snapshots in the worker, not inside kiosk requests
+    SNAPSHOT_BACKGROUND_BUILD = os.getenv("SNAPSHOT_BACKGROUND_BUILD", "true").lower() == "true"
+    # Embed student photos on the Celery worker, not inside uploads
+    FACE_EMBEDDING_EXECUTION_MODE = os.getenv("FACE_EMBEDDING_EXECUTION_MODE", "celery").lower()
 else:
     print("[PRODUCTION] WARNING: CELERY_BROKER_URL not set. Background tasks disabled.")
     CELERY_TASK_ALWAYS_EAGER = True  # Run tasks synchronously
@@ -14,6 +14,7 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 
 from bus_kiosk_backend.permissions import IsSchoolAdmin
+from kiosks.signals import record_dataset_change
 from students.models import Student
 
 from .models import Bus, Route
@@ -112,6 +113,9 @@ class BusViewSet(viewsets.ModelViewSet):
             # Update student assignments
             Student.objects.filter(student_id__in=student_ids).update(assigned_bus=bus)
 
+            # Bulk update bypasses model signals - record the kiosk dataset change explicitly
+            record_dataset_change(student_ids)
+
         return Response(
             {
                 "message": f"Successfully assigned {len(student_ids)} students to bus {bus.license_plate}",
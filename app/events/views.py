@@ -5,6 +5,7 @@ from django.http import HttpResponse, HttpResponseNotFound
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -14,8 +15,9 @@ from bus_kiosk_backend.core.authentication import FirebaseAuthentication
 from bus_kiosk_backend.permissions import IsSchoolAdmin
 from kiosks.permissions import IsKiosk
 from students.models import Student
+from students.serializers import FaceIdentificationQuerySerializer, FaceIdentificationResultSerializer
 
-from .models import AttendanceRecord, BoardingEvent
+from .models import MAX_CONFIRMATION_FACES, AttendanceRecord, BoardingEvent
 from .serializers import (
     AttendanceRecordSerializer,
     AttendanceSummarySerializer,
@@ -32,6 +34,7 @@ class BoardingEventViewSet(viewsets.ModelViewSet):
     - CREATE/BULK: IsKiosk (kiosk devices only)
     - LIST/RETRIEVE/UPDATE/DELETE: IsSchoolAdmin (school admins only)
     - RECENT: IsSchoolAdmin (school admins only)
+    - IDENTIFY: IsSchoolAdmin (school admins only)
 
     NOTE: Old permission was IsAuthenticated (too permissive!)
     Now using AWS-style deny-by-default with explicit permissions.
@@ -56,7 +59,7 @@ class BoardingEventViewSet(viewsets.ModelViewSet):
         """
         if self.action in ["create", "bulk_create"]:
             return [IsKiosk()]
-        # All other actions (list, retrieve, update, delete, recent)
+        # All other actions (list, retrieve, update, delete, recent, identify)
         return [IsSchoolAdmin()]
 
     def get_queryset(self):
@@ -97,6 +100,43 @@ class BoardingEventViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(events, many=True)
         return Response(serializer.data)
 
+    @extend_schema(
+        request=FaceIdentificationQuerySerializer,
+        responses={200: FaceIdentificationResultSerializer},
+        description="Candidate students for the face of a boarding event, e.g. an unidentified one (student=null)",
+    )
+    @action(detail=True, methods=["post"], url_path="identify")
+    def identify(self, request, pk=None):
+        """
+        Identify a boarding event's face from its first stored confirmation face.
+        Read-only - assigning the student is left to the admin.
+        """
+        from students.services.face_identification_service import face_identification_service, identification_result
+        from students.services.face_recognition_service import PhotoEmbeddingError
+
+        from .services.storage_service import BoardingEventStorageService
+
+        event = self.get_object()
+        serializer = FaceIdentificationQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        gcs_paths = [getattr(event, f"confirmation_face_{number}_gcs") for number in range(1, MAX_CONFIRMATION_FACES + 1)]
+        gcs_path = next((path for path in gcs_paths if path), None)
+        face_data = BoardingEventStorageService().download_image(gcs_path) if gcs_path else None
+        if not face_data:
+            return Response({"error": "Boarding event has no confirmation face"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            # Confirmation faces are kiosk face crops - embed them without detection
+            face, matches = face_identification_service.identify_image(
+                query["school"].school_id, face_data, query["model_name"], query["k"], query.get("min_score"), detect_face=False
+            )
+        except (PhotoEmbeddingError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(FaceIdentificationResultSerializer(identification_result(query["model_name"], face, matches)).data)
+
 
 class AttendanceRecordViewSet(viewsets.ReadOnlyModelViewSet):
     """
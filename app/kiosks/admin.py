@@ -1,15 +1,18 @@
 from django.contrib import admin
 from django.contrib.admin import display
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 
 from .models import (
     BusLocation,
+    DatasetVersion,
     DeviceLog,
     Kiosk,
     KioskStatus,
     SOSAlert,
 )
 from .models_operation_timing import OperationSlot, OperationTiming
+from .rollout import active_download_count, rollout_progress
+from .snapshot_store import get_served_snapshots
 
 
 class OperationSlotInline(admin.TabularInline):
@@ -101,6 +104,14 @@ class KioskAdmin(admin.ModelAdmin):
                 "description": "Select operation schedule from predefined timings. Create timings in Operation Timings section.",
             },
         ),
+        (
+            "Snapshot",
+            {
+                "fields": ("snapshot_scope", "snapshot_max_embeddings", "snapshot_max_bytes", "snapshot_embedding_dtype"),
+                "description": "Students shipped with face embeddings. The school of the bus is always the boundary; "
+                "the rest of the school is sent as wrong-bus hints.",
+            },
+        ),
         (
             "Technical Details",
             {
@@ -243,6 +254,44 @@ class DeviceLogAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(DatasetVersion)
+class DatasetVersionAdmin(admin.ModelAdmin):
+    """Read-only view of the kiosk dataset version counter and snapshot rollout progress"""
+
+    list_display = ["scope", "version", "updated_at", "rollout_summary"]
+    readonly_fields = ["scope", "version", "updated_at", "rollout_progress_display"]
+
+    @display(description="Rollout")
+    def rollout_summary(self, obj):
+        """Share of active kiosks synced to the current version"""
+        progress = rollout_progress()
+        synced = sum(row["share"] for row in progress if row["dataset_version"] is not None and row["dataset_version"] >= obj.version)
+        return f"{synced:.0%} synced, {active_download_count()} downloading"
+
+    @display(description="Rollout progress")
+    def rollout_progress_display(self, obj):
+        """Active kiosks per synced dataset version"""
+        progress = rollout_progress()
+        if not progress:
+            return format_html('<span style="color: gray;">No kiosk has reported a version yet</span>')
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td>{}</td></tr>",
+            ((row["dataset_version"] if row["dataset_version"] is not None else "unknown", row["kiosk_count"], f"{row['share']:.0%}") for row in progress),
+        )
+        return format_html(
+            "<table><tr><th>Dataset version</th><th>Kiosks</th><th>Share</th></tr>{}</table><p>{} downloads in progress</p>",
+            rows,
+            active_download_count(),
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(KioskStatus)
 class KioskStatusAdmin(admin.ModelAdmin):
     """Admin interface for kiosk sync status"""
@@ -251,6 +300,7 @@ class KioskStatusAdmin(admin.ModelAdmin):
         "kiosk_id_display",
         "status_badge",
         "database_version",
+        "dataset_version",
         "student_count",
         "embedding_count",
         "battery_display",
@@ -273,6 +323,7 @@ class KioskStatusAdmin(admin.ModelAdmin):
                 "fields": (
                     "database_version",
                     "database_hash",
+                    "dataset_version",
                     "student_count",
                     "embedding_count",
                 )
@@ -386,7 +437,8 @@ class KioskStatusAdmin(admin.ModelAdmin):
     @display(description="DB Status")
     def is_outdated_display(self, obj):
         """Display if database is outdated"""
-        if obj.is_outdated:
+        is_outdated = obj.is_outdated_for(obj.served_snapshot) if hasattr(obj, "served_snapshot") else obj.is_outdated
+        if is_outdated:
             return format_html('<span style="color: red;">● Outdated</span>')
         return format_html('<span style="color: green;">● Current</span>')
 
@@ -396,6 +448,14 @@ class KioskStatusAdmin(admin.ModelAdmin):
         """Optimize queryset"""
         return super().get_queryset(request).select_related("kiosk__bus")
 
+    def get_changelist_instance(self, request):
+        """Look up the served snapshots of the listed kiosks once, not per row"""
+        changelist = super().get_changelist_instance(request)
+        served_snapshots = get_served_snapshots(status.kiosk for status in changelist.result_list)
+        for status in changelist.result_list:
+            status.served_snapshot = served_snapshots.get(status.kiosk_id)
+        return changelist
+
     # Prevent manual editing - should be updated via heartbeat API
     def has_add_permission(self, request):
         return False
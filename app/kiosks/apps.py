@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class KiosksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "kiosks"
+
+    def ready(self):
+        # Import signals to ensure they are registered
+        import kiosks.signals  # noqa: F401
@@ -0,0 +1,137 @@
+"""
+Management command to measure snapshot embedding precision trade-offs.
+
+Encodes the stored face embeddings at every snapshot precision (float32,
+float16, int8) and reports the per-vector size and the top-1 cosine matching
+quality against the float32 baseline. Each embedding is used as a probe
+(kept at float32, like a live camera embedding) against all other embeddings
+decoded from the snapshot precision.
+
+Usage:
+    python manage.py embedding_precision_report
+    python manage.py embedding_precision_report --model mobilefacenet
+    python manage.py embedding_precision_report --school <school_id> --limit 20000
+    python manage.py embedding_precision_report --json
+"""
+
+from collections import defaultdict
+import json
+from typing import Any
+
+from django.core.management.base import BaseCommand
+import numpy as np
+
+from kiosks.utils.embedding_codec import EMBEDDING_DTYPE_INT8, EMBEDDING_DTYPES, EMBEDDING_ITEMSIZE, decode_embeddings, encode_embeddings
+from students.models import FaceEmbeddingMetadata
+
+PROBE_CHUNK_SIZE = 1024
+
+
+def top1_matches(probes: np.ndarray, gallery: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Leave-one-out nearest neighbour of every probe in the gallery by cosine similarity.
+
+    Args:
+        probes: (n, dims) float32 query vectors
+        gallery: (n, dims) float32 gallery vectors, row i belongs to probe i
+
+    Returns:
+        (best gallery index, best cosine similarity) per probe
+    """
+    probes = probes / np.maximum(np.linalg.norm(probes, axis=1, keepdims=True), 1e-12)
+    gallery = gallery / np.maximum(np.linalg.norm(gallery, axis=1, keepdims=True), 1e-12)
+
+    best_index = np.empty(len(probes), dtype=np.int64)
+    best_score = np.empty(len(probes), dtype=np.float32)
+    for start in range(0, len(probes), PROBE_CHUNK_SIZE):
+        stop = min(start + PROBE_CHUNK_SIZE, len(probes))
+        scores = probes[start:stop] @ gallery.T
+        scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # Exclude self
+        best_index[start:stop] = scores.argmax(axis=1)
+        best_score[start:stop] = scores[np.arange(stop - start), best_index[start:stop]]
+    return best_index, best_score
+
+
+class Command(BaseCommand):
+    help = "Report snapshot size and top-1 cosine matching accuracy at each embedding precision"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--model", help="Only embeddings of this model_name")
+        parser.add_argument("--school", help="Only embeddings of students in this school_id")
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=50000,
+            help="Maximum number of embeddings to load (default: 50000)",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        embeddings = FaceEmbeddingMetadata.objects.exclude(embedding_dimensions=0)
+        if options["model"]:
+            embeddings = embeddings.filter(model_name=options["model"])
+        if options["school"]:
+            embeddings = embeddings.filter(student_photo__student__school_id=options["school"])
+
+        # Group by model and dimensions - vectors are only comparable within a model
+        groups: dict[tuple[str, int], list[tuple[Any, bytes]]] = defaultdict(list)
+        rows = embeddings.values_list("model_name", "embedding_dimensions", "student_photo__student_id", "embedding_vector")
+        for model_name, dimensions, student_id, vector in rows[: options["limit"]].iterator():
+            groups[(model_name, dimensions)].append((student_id, bytes(vector)))
+
+        report = [self._measure(model_name, dimensions, items) for (model_name, dimensions), items in sorted(groups.items()) if len(items) > 1]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        if not report:
+            self.stdout.write(self.style.WARNING("[WARNING] Need at least two embeddings of one model to compare"))
+            return
+
+        for group in report:
+            self.stdout.write(self.style.SUCCESS(f"\n{group['model_name']} ({group['dimensions']}-d, {group['embedding_count']} embeddings)"))
+            self.stdout.write(f"  {'dtype':<8} {'bytes/vec':>9} {'size':>7} {'top-1 acc':>9} {'agree':>7} {'cos err':>9}")
+            for result in group["precisions"]:
+                self.stdout.write(
+                    f"  {result['dtype']:<8} {result['bytes_per_vector']:>9} {result['relative_size']:>6.0%} "
+                    f"{result['top1_accuracy']:>9.2%} {result['top1_agreement']:>7.2%} {result['mean_cosine_error']:>9.2e}"
+                )
+
+    def _measure(self, model_name: str, dimensions: int, items: list[tuple[Any, bytes]]) -> dict[str, Any]:
+        student_ids = np.array([str(student_id) for student_id, _ in items])
+        matrix = np.frombuffer(b"".join(vector for _, vector in items), dtype="<f4").reshape(len(items), dimensions)
+
+        # Accuracy only counts probes whose student has another embedding to find
+        _, inverse, counts = np.unique(student_ids, return_inverse=True, return_counts=True)
+        has_mate = counts[inverse] > 1
+
+        baseline_index, _ = top1_matches(matrix, matrix)
+        baseline_bytes = dimensions * EMBEDDING_ITEMSIZE["float32"]
+
+        precisions = []
+        for dtype in EMBEDDING_DTYPES:
+            encoded, scales = encode_embeddings(matrix, dtype)
+            decoded = decode_embeddings(encoded, dtype, scales)
+            best_index, _ = top1_matches(matrix, decoded)
+
+            bytes_per_vector = dimensions * EMBEDDING_ITEMSIZE[dtype] + (4 if dtype == EMBEDDING_DTYPE_INT8 else 0)
+            cosine = np.sum(matrix * decoded, axis=1) / np.maximum(np.linalg.norm(matrix, axis=1) * np.linalg.norm(decoded, axis=1), 1e-12)
+            correct = student_ids[best_index] == student_ids
+            precisions.append(
+                {
+                    "dtype": dtype,
+                    "bytes_per_vector": bytes_per_vector,
+                    "relative_size": bytes_per_vector / baseline_bytes,
+                    "top1_accuracy": float(correct[has_mate].mean()) if has_mate.any() else 0.0,
+                    "top1_agreement": float((best_index == baseline_index).mean()),
+                    "mean_cosine_error": float(np.mean(1.0 - cosine)),
+                }
+            )
+
+        return {
+            "model_name": model_name,
+            "dimensions": dimensions,
+            "embedding_count": len(items),
+            "precisions": precisions,
+        }
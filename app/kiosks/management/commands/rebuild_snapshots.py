@@ -0,0 +1,62 @@
+"""
+Management command to force a rebuild of kiosk snapshot artifacts.
+
+Rebuilds the current snapshot of every kiosk scope (or only one kiosk's),
+e.g. after changing snapshot settings or to warm the store after a deploy.
+
+Usage:
+    python manage.py rebuild_snapshots
+    python manage.py rebuild_snapshots --kiosk KIOSK001
+    python manage.py rebuild_snapshots --missing-only  # Skip scopes already built
+    python manage.py rebuild_snapshots --async  # Queue on the Celery worker
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kiosks.models import Kiosk
+from kiosks.tasks import rebuild_kiosk_snapshots_task
+
+
+class Command(BaseCommand):
+    help = "Force a rebuild of kiosk snapshot artifacts for one kiosk or all kiosks"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--kiosk", help="Only the snapshot scope of this kiosk_id")
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only build scopes without an artifact for the current dataset version",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="run_async",
+            help="Queue the rebuild as a Celery task instead of building here",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        kiosk_ids = None
+        if options["kiosk"]:
+            kiosk = Kiosk.objects.filter(kiosk_id=options["kiosk"]).first()
+            if kiosk is None:
+                raise CommandError(f"Kiosk {options['kiosk']} not found")
+            if kiosk.bus_id is None:
+                raise CommandError(f"Kiosk {options['kiosk']} is not assigned to a bus")
+            kiosk_ids = [kiosk.kiosk_id]
+
+        force = not options["missing_only"]
+        if options["run_async"]:
+            result = rebuild_kiosk_snapshots_task.delay(kiosk_ids=kiosk_ids, force=force)
+            self.stdout.write(self.style.SUCCESS(f"[OK] Queued snapshot rebuild (task {result.id})"))
+            return
+
+        result = rebuild_kiosk_snapshots_task(kiosk_ids=kiosk_ids, force=force)
+        style = self.style.WARNING if result["failed"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"[OK] Rebuilt {result['built']} snapshot scopes at dataset version {result['dataset_version']} "
+                f"({result['failed']} failed, {result['pruned']} journal rows pruned)"
+            )
+        )
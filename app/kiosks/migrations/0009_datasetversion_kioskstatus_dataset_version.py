@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kiosks", "0008_kioskstatus_device_temperature"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetVersion",
+            fields=[
+                (
+                    "scope",
+                    models.CharField(
+                        default="global",
+                        help_text="Dataset scope this version counter belongs to",
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(default=0, help_text="Incremented on every snapshot data change"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, help_text="When the version was last bumped"),
+                ),
+            ],
+            options={
+                "verbose_name": "Dataset Version",
+                "verbose_name_plural": "Dataset Versions",
+                "db_table": "kiosk_dataset_versions",
+            },
+        ),
+        migrations.AddField(
+            model_name="kioskstatus",
+            name="dataset_version",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                help_text="Dataset version of the snapshot installed on the kiosk",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-16 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kiosks", "0009_datasetversion_kioskstatus_dataset_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SnapshotChange",
+            fields=[
+                (
+                    "change_id",
+                    models.BigAutoField(help_text="Auto-incrementing change ID", primary_key=True, serialize=False),
+                ),
+                (
+                    "dataset_version",
+                    models.PositiveBigIntegerField(help_text="Dataset version this change was recorded at"),
+                ),
+                (
+                    "student_id",
+                    models.UUIDField(blank=True, help_text="Student whose snapshot rows changed", null=True),
+                ),
+                (
+                    "full_resync",
+                    models.BooleanField(default=False, help_text="Change requires a full snapshot download"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, help_text="When this change was recorded"),
+                ),
+            ],
+            options={
+                "db_table": "kiosk_snapshot_changes",
+                "ordering": ["dataset_version", "change_id"],
+                "indexes": [models.Index(fields=["dataset_version"], name="idx_snapchange_version")],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-16 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kiosks", "0010_snapshotchange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kiosk",
+            name="snapshot_scope",
+            field=models.CharField(
+                choices=[("bus", "Bus students only"), ("route", "Students on the bus route"), ("school", "Whole school")],
+                default="school",
+                help_text="Widest group of students shipped with face embeddings (school of the bus is always the boundary)",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="kiosk",
+            name="snapshot_max_embeddings",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Optional cap on embeddings in the snapshot (bus students always included)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="kiosk",
+            name="snapshot_max_bytes",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Optional cap on embedding bytes in the snapshot (bus students always included)",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-16 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kiosks", "0011_kiosk_snapshot_scope"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kiosk",
+            name="snapshot_embedding_dtype",
+            field=models.CharField(
+                choices=[
+                    ("float32", "float32 (4 bytes/value)"),
+                    ("float16", "float16 (2 bytes/value)"),
+                    ("int8", "int8 with per-vector scale (1 byte/value)"),
+                ],
+                default="float32",
+                help_text="Precision of face embeddings shipped in the snapshot",
+                max_length=16,
+            ),
+        ),
+    ]
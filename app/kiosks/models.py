@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from datetime import datetime
 from typing import Any
 
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
 from buses.models import Bus
@@ -19,6 +21,21 @@ class Kiosk(models.Model):
     Security: No stored credentials - uses one-time activation tokens only.
     """
 
+    SNAPSHOT_SCOPE_BUS = "bus"
+    SNAPSHOT_SCOPE_ROUTE = "route"
+    SNAPSHOT_SCOPE_SCHOOL = "school"
+    SNAPSHOT_SCOPE_CHOICES = [
+        (SNAPSHOT_SCOPE_BUS, "Bus students only"),
+        (SNAPSHOT_SCOPE_ROUTE, "Students on the bus route"),
+        (SNAPSHOT_SCOPE_SCHOOL, "Whole school"),
+    ]
+
+    SNAPSHOT_EMBEDDING_DTYPE_CHOICES = [
+        ("float32", "float32 (4 bytes/value)"),
+        ("float16", "float16 (2 bytes/value)"),
+        ("int8", "int8 with per-vector scale (1 byte/value)"),
+    ]
+
     kiosk_id = models.CharField(
         max_length=100,
         primary_key=True,
@@ -82,6 +99,28 @@ class Kiosk(models.Model):
         blank=True,
         help_text="DEPRECATED: Use operation_timing instead. Legacy field for backward compatibility.",
     )
+    snapshot_scope = models.CharField(
+        max_length=20,
+        choices=SNAPSHOT_SCOPE_CHOICES,
+        default=SNAPSHOT_SCOPE_SCHOOL,
+        help_text="Widest group of students shipped with face embeddings (school of the bus is always the boundary)",
+    )
+    snapshot_max_embeddings = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Optional cap on embeddings in the snapshot (bus students always included)",
+    )
+    snapshot_max_bytes = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Optional cap on embedding bytes in the snapshot (bus students always included)",
+    )
+    snapshot_embedding_dtype = models.CharField(
+        max_length=16,
+        choices=SNAPSHOT_EMBEDDING_DTYPE_CHOICES,
+        default="float32",
+        help_text="Precision of face embeddings shipped in the snapshot",
+    )
     created_at = models.DateTimeField(auto_now_add=True, help_text="When this kiosk was registered")
     updated_at = models.DateTimeField(auto_now=True, help_text="When this kiosk record was last updated")
 
@@ -141,6 +180,95 @@ class Kiosk(models.Model):
         self.save(update_fields=["last_heartbeat", "updated_at"])
 
 
+class DatasetVersion(models.Model):
+    """
+    Monotonic version of the data shipped in kiosk snapshots.
+
+    Bumped inside the same transaction as the change (see kiosks/signals.py),
+    so kiosks can compare the version they last synced against a single
+    indexed row instead of re-hashing every student and embedding.
+    """
+
+    GLOBAL_SCOPE = "global"
+
+    scope = models.CharField(
+        max_length=50,
+        primary_key=True,
+        default=GLOBAL_SCOPE,
+        help_text="Dataset scope this version counter belongs to",
+    )
+    version = models.PositiveBigIntegerField(default=0, help_text="Incremented on every snapshot data change")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the version was last bumped")
+
+    class Meta:
+        db_table = "kiosk_dataset_versions"
+        verbose_name = "Dataset Version"
+        verbose_name_plural = "Dataset Versions"
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
+
+    @classmethod
+    def current(cls, scope: str = GLOBAL_SCOPE) -> int:
+        """Current dataset version (0 until the first change)"""
+        version = cls.objects.filter(scope=scope).values_list("version", flat=True).first()
+        return version or 0
+
+    @classmethod
+    def bump(cls, scope: str = GLOBAL_SCOPE) -> int:
+        """Atomically increment the dataset version and return the new value"""
+        with transaction.atomic():
+            cls.objects.get_or_create(scope=scope)
+            cls.objects.filter(scope=scope).update(version=F("version") + 1, updated_at=timezone.now())
+            return cls.objects.filter(scope=scope).values_list("version", flat=True).get()
+
+
+class SnapshotChange(models.Model):
+    """
+    Change journal for kiosk delta sync.
+
+    One row per student whose snapshot rows (student or face embeddings)
+    changed at a dataset version. Rows outlive deleted students, so a
+    student that no longer exists acts as a tombstone. A row without a
+    student (full_resync) marks a change that cannot be expressed as a
+    delta, forcing kiosks behind it to download a full snapshot.
+    """
+
+    change_id = models.BigAutoField(primary_key=True, help_text="Auto-incrementing change ID")
+    dataset_version = models.PositiveBigIntegerField(help_text="Dataset version this change was recorded at")
+    student_id = models.UUIDField(null=True, blank=True, help_text="Student whose snapshot rows changed")
+    full_resync = models.BooleanField(default=False, help_text="Change requires a full snapshot download")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="When this change was recorded")
+
+    class Meta:
+        db_table = "kiosk_snapshot_changes"
+        ordering = ["dataset_version", "change_id"]
+        indexes = [
+            models.Index(fields=["dataset_version"], name="idx_snapchange_version"),
+        ]
+
+    def __str__(self):
+        target = "full resync" if self.full_resync else self.student_id
+        return f"v{self.dataset_version}: {target}"
+
+    @classmethod
+    def record(cls, dataset_version: int, student_ids: Iterable[Any], full_resync: bool = False) -> None:
+        """Journal the students changed at a dataset version"""
+        changes = [cls(dataset_version=dataset_version, student_id=student_id) for student_id in set(student_ids)]
+        if full_resync:
+            changes.append(cls(dataset_version=dataset_version, full_resync=True))
+        cls.objects.bulk_create(changes)
+
+    @classmethod
+    def prune(cls, keep_versions: int, current_version: int | None = None) -> int:
+        """Delete journal rows older than the delta window, returns rows deleted"""
+        if current_version is None:
+            current_version = DatasetVersion.current()
+        floor = current_version - keep_versions
+        deleted, _ = cls.objects.filter(dataset_version__lte=floor).delete()
+        return deleted
+
+
 class KioskStatus(models.Model):
     """
     Sync and health status for each kiosk.
@@ -167,6 +295,11 @@ class KioskStatus(models.Model):
         blank=True,
         help_text="SHA-256 hash of kiosk database content (for integrity)",
     )
+    dataset_version = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Dataset version of the snapshot installed on the kiosk",
+    )
     student_count = models.IntegerField(default=0, help_text="Number of students in kiosk database")
     embedding_count = models.IntegerField(default=0, help_text="Number of embeddings in kiosk database")
 
@@ -222,11 +355,25 @@ class KioskStatus(models.Model):
 
     @property
     def is_outdated(self):
-        """Check if kiosk database is outdated compared to bus"""
-        if not self.kiosk.bus:
+        """Check if kiosk database differs from the snapshot currently served to its scope.
+
+        Looks the served snapshot up for this row alone - lists should call
+        get_served_snapshots() once and use is_outdated_for().
+        """
+        from .snapshot_store import get_served_snapshots
+
+        return self.is_outdated_for(get_served_snapshots([self.kiosk]).get(self.kiosk_id))
+
+    def is_outdated_for(self, served: dict | None) -> bool:
+        """Check if kiosk database differs from served (snapshot metadata, None when not built yet)"""
+        if not self.kiosk.bus_id or served is None:
             return False
 
-        return self.kiosk.bus.last_student_update.isoformat() > self.database_version
+        if self.database_hash:
+            return self.database_hash != served["content_hash"]
+        if self.dataset_version is None:
+            return True  # Kiosk never reported a versioned sync
+        return self.dataset_version < served["dataset_version"]
 
     @property
     def is_offline(self):
@@ -0,0 +1,150 @@
+"""
+Staggered fleet rollout of snapshot updates.
+
+A data change makes every kiosk's snapshot outdated at the same moment.
+To avoid a thundering herd of downloads, each kiosk gets a deterministic,
+jittered "eligible after" time per dataset version (returned by
+check_updates), pushed past any active OperationSlot of its OperationTiming
+so buses do not download mid-route. eligible_after is advisory - downloads
+are not refused before it; the hard limit is the cap below. Downloads are
+capped by a cache-backed pool of download slots; a kiosk keeps its slot
+across resumed or chunked requests until it reports (in a heartbeat) the
+dataset version it was served, or the slot expires.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import hashlib
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Kiosk, KioskStatus
+from .models_operation_timing import OperationSlot
+
+DOWNLOAD_SLOT_CACHE_KEY = "kiosk_snapshot:download_slot:{index}"
+DOWNLOAD_HOLDER_CACHE_KEY = "kiosk_snapshot:download_holder:{kiosk_id}"
+
+
+def _jitter_seconds(kiosk_id: str, dataset_version: int) -> float:
+    """Deterministic offset in [0, SNAPSHOT_ROLLOUT_WINDOW_SECONDS) per kiosk and version"""
+    digest = hashlib.sha256(f"{kiosk_id}:{dataset_version}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 * settings.SNAPSHOT_ROLLOUT_WINDOW_SECONDS
+
+
+def _active_slot_end(slots: list[OperationSlot], moment: datetime) -> datetime | None:
+    """End of the operation slot (local time) covering moment, if any"""
+    local_date = timezone.localtime(moment).date()
+    for day_offset in (-1, 0):  # Yesterday's slot may run past midnight
+        day = local_date + timedelta(days=day_offset)
+        for slot in slots:
+            start = timezone.make_aware(datetime.combine(day, slot.start_time))
+            end = timezone.make_aware(datetime.combine(day, slot.end_time))
+            if end <= start:
+                end += timedelta(days=1)
+            if start <= moment < end:
+                return end
+    return None
+
+
+def get_eligible_after(kiosk: Kiosk, metadata: dict[str, Any]) -> datetime:
+    """
+    Earliest time the kiosk should download the snapshot described by metadata.
+
+    Release time (snapshot build) + per-kiosk jitter, moved to the end of
+    any active operation slot of the kiosk's schedule.
+    """
+    released_at = datetime.fromisoformat(metadata["sync_timestamp"])
+    eligible = released_at + timedelta(seconds=_jitter_seconds(kiosk.kiosk_id, metadata["dataset_version"]))
+
+    timing = kiosk.operation_timing
+    if timing is None or not timing.is_active:
+        return eligible
+
+    slots = list(timing.slots.all())
+    for _ in range(len(slots) + 1):  # Back-to-back slots
+        slot_end = _active_slot_end(slots, eligible)
+        if slot_end is None:
+            break
+        eligible = slot_end
+    return eligible
+
+
+def acquire_download_slot(kiosk_id: str, dataset_version: int | None = None) -> bool:
+    """
+    Take (or refresh) one of SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS download slots.
+
+    Args:
+        kiosk_id: Downloading kiosk
+        dataset_version: Dataset version of the artifact being served - the
+            slot is held until the kiosk reports at least this version
+
+    Returns False when all slots are held by other kiosks.
+    """
+    max_downloads = settings.SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS
+    if max_downloads <= 0:
+        return True  # Cap disabled
+
+    timeout = settings.SNAPSHOT_ROLLOUT_DOWNLOAD_TIMEOUT
+    holder_key = DOWNLOAD_HOLDER_CACHE_KEY.format(kiosk_id=kiosk_id)
+    holder = cache.get(holder_key)
+    if holder is not None:
+        slot_key = DOWNLOAD_SLOT_CACHE_KEY.format(index=holder["index"])
+        if cache.get(slot_key) == kiosk_id:
+            cache.touch(slot_key, timeout)
+            cache.set(holder_key, {"index": holder["index"], "dataset_version": dataset_version}, timeout)
+            return True
+
+    for index in range(max_downloads):
+        if cache.add(DOWNLOAD_SLOT_CACHE_KEY.format(index=index), kiosk_id, timeout):
+            cache.set(holder_key, {"index": index, "dataset_version": dataset_version}, timeout)
+            return True
+    return False
+
+
+def release_download_slot(kiosk_id: str, reported_version: int | None = None) -> None:
+    """
+    Free the kiosk's download slot (it finished syncing).
+
+    With reported_version, the slot is only freed once the kiosk reports the
+    dataset version it was served - a kiosk still on its old version is
+    mid-download and keeps the slot.
+    """
+    holder_key = DOWNLOAD_HOLDER_CACHE_KEY.format(kiosk_id=kiosk_id)
+    holder = cache.get(holder_key)
+    if holder is None:
+        return
+    served_version = holder["dataset_version"]
+    if reported_version is not None and served_version is not None and reported_version < served_version:
+        return
+    slot_key = DOWNLOAD_SLOT_CACHE_KEY.format(index=holder["index"])
+    if cache.get(slot_key) == kiosk_id:
+        cache.delete(slot_key)
+    cache.delete(holder_key)
+
+
+def active_download_count() -> int:
+    """Number of download slots currently held."""
+    keys = [DOWNLOAD_SLOT_CACHE_KEY.format(index=index) for index in range(max(settings.SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS, 0))]
+    return len(cache.get_many(keys))
+
+
+def rollout_progress(limit: int = 10) -> list[dict[str, Any]]:
+    """
+    Active kiosks per synced dataset version, newest first.
+
+    Returns [{"dataset_version", "kiosk_count", "share"}] where share is the
+    fraction of reporting kiosks on that version.
+    """
+    rows = list(
+        KioskStatus.objects.filter(kiosk__is_active=True)
+        .values("dataset_version")
+        .annotate(kiosk_count=Count("kiosk"))
+        .order_by(F("dataset_version").desc(nulls_last=True))
+    )
+    total = sum(row["kiosk_count"] for row in rows)
+    return [{**row, "share": row["kiosk_count"] / total} for row in rows[:limit]]
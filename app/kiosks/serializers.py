@@ -110,6 +110,11 @@ class CheckUpdatesSerializer(serializers.Serializer):
     """Serializer for check updates request"""
 
     last_sync_hash = serializers.CharField(required=False, allow_blank=True, help_text="Last content hash from kiosk")
+    last_sync_version = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="Dataset version of the last snapshot the kiosk synced (preferred over last_sync_hash)",
+    )
 
 
 class CheckUpdatesResponseSerializer(serializers.Serializer):
@@ -120,6 +125,89 @@ class CheckUpdatesResponseSerializer(serializers.Serializer):
     student_count = serializers.IntegerField(help_text="Number of students for this bus")
     embedding_count = serializers.IntegerField(help_text="Number of embeddings for this bus")
     content_hash = serializers.CharField(help_text="Content hash for integrity verification")
+    dataset_version = serializers.IntegerField(help_text="Dataset version of the current snapshot")
+    eligible_after = serializers.DateTimeField(
+        allow_null=True,
+        help_text="Staggered rollout: download the update no earlier than this (null when up to date). Advisory - downloads are only limited by the concurrent download cap",
+    )
+
+
+class SnapshotDeltaQuerySerializer(serializers.Serializer):
+    """Serializer for snapshot delta request"""
+
+    since_version = serializers.IntegerField(required=False, min_value=0, help_text="Dataset version of the kiosk's current snapshot")
+    since_hash = serializers.CharField(required=False, help_text="Content hash of the kiosk's current snapshot (legacy kiosks)")
+
+    def validate(self, attrs):
+        if "since_version" not in attrs and not attrs.get("since_hash"):
+            raise serializers.ValidationError("since_version or since_hash is required")
+        return attrs
+
+
+class SnapshotDeltaStudentSerializer(serializers.Serializer):
+    """Student row in a snapshot delta (same columns as the snapshot students table)"""
+
+    student_id = serializers.CharField()
+    name = serializers.CharField()
+    status = serializers.CharField()
+    bus_id = serializers.CharField(allow_null=True)
+    bus_number = serializers.CharField(allow_null=True)
+
+
+class SnapshotDeltaEmbeddingSerializer(serializers.Serializer):
+    """Face embedding row in a snapshot delta"""
+
+    student_id = serializers.CharField()
+    embedding_vector = serializers.CharField(help_text="Base64 of the little-endian BLOB in the snapshot's embedding_dtype")
+    quality_score = serializers.FloatField()
+    model_name = serializers.CharField(allow_null=True)
+    embedding_scale = serializers.FloatField(allow_null=True, help_text="Per-vector scale (int8 snapshots only)")
+
+
+class SnapshotDeltaHintSerializer(serializers.Serializer):
+    """Wrong-bus hint row in a snapshot delta"""
+
+    student_id = serializers.CharField()
+    bus_number = serializers.CharField(allow_null=True)
+
+
+class SnapshotDeltaSerializer(serializers.Serializer):
+    """Serializer for snapshot delta response"""
+
+    base_version = serializers.IntegerField(help_text="Dataset version the delta applies to")
+    target_version = serializers.IntegerField(help_text="Dataset version after applying the delta")
+    full_snapshot_required = serializers.BooleanField(help_text="Base too old - download the full snapshot instead")
+    students = SnapshotDeltaStudentSerializer(many=True, help_text="Students to insert or replace")
+    face_embeddings = SnapshotDeltaEmbeddingSerializer(many=True, help_text="Complete embedding sets of the upserted students")
+    wrong_bus_hints = SnapshotDeltaHintSerializer(many=True, help_text="Students now outside the kiosk's scope (no embeddings)")
+    deleted_student_ids = serializers.ListField(child=serializers.CharField(), help_text="Students to delete with their embeddings")
+
+
+class SnapshotManifestChunkSerializer(serializers.Serializer):
+    """One fixed-size chunk of a snapshot artifact"""
+
+    index = serializers.IntegerField()
+    offset = serializers.IntegerField(help_text="Byte offset of the chunk in the snapshot")
+    size_bytes = serializers.IntegerField()
+    checksum = serializers.CharField(help_text="SHA-256 of the chunk bytes")
+
+
+class SnapshotManifestSerializer(serializers.Serializer):
+    """Serializer for the chunked snapshot transfer manifest"""
+
+    dataset_version = serializers.IntegerField(help_text="Dataset version of the snapshot")
+    sync_timestamp = serializers.CharField(help_text="Snapshot build timestamp")
+    content_hash = serializers.CharField(help_text="Content hash of the snapshot")
+    checksum = serializers.CharField(help_text="SHA-256 of the whole snapshot (same as x-snapshot-checksum)")
+    size_bytes = serializers.IntegerField()
+    chunk_size = serializers.IntegerField()
+    chunks = SnapshotManifestChunkSerializer(many=True)
+
+
+class SnapshotChunkQuerySerializer(serializers.Serializer):
+    """Serializer for snapshot chunk request"""
+
+    checksum = serializers.CharField(required=False, help_text="Snapshot checksum from the manifest - 409 if the snapshot changed since")
 
 
 class SnapshotResponseSerializer(serializers.Serializer):
@@ -157,6 +245,12 @@ class HeartbeatSerializer(serializers.Serializer):
         allow_blank=True,
         help_text="Database content hash",
     )
+    dataset_version = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        allow_null=True,
+        help_text="Dataset version of the installed snapshot",
+    )
     student_count = serializers.IntegerField(min_value=0, help_text="Students in DB")
     embedding_count = serializers.IntegerField(min_value=0, help_text="Embeddings in DB")
     git_commit_sha = serializers.CharField(
@@ -173,7 +267,7 @@ class KioskStatusSerializer(serializers.ModelSerializer):
 
     kiosk_id = serializers.CharField(source="kiosk.kiosk_id", read_only=True)
     bus_id = serializers.UUIDField(source="kiosk.bus.bus_id", read_only=True, allow_null=True)
-    is_outdated = serializers.ReadOnlyField()
+    is_outdated = serializers.SerializerMethodField()
     is_offline = serializers.ReadOnlyField()
 
     class Meta:
@@ -184,6 +278,7 @@ class KioskStatusSerializer(serializers.ModelSerializer):
             "last_heartbeat",
             "database_version",
             "database_hash",
+            "dataset_version",
             "student_count",
             "embedding_count",
             "battery_level",
@@ -204,6 +299,21 @@ class KioskStatusSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["updated_at"]
 
+    def get_is_outdated(self, obj: KioskStatus) -> bool:
+        """
+        Served snapshots come from context["served_snapshots"] (see
+        get_served_snapshots); when missing they are looked up once for the
+        whole list and kept in the shared context.
+        """
+        from .snapshot_store import get_served_snapshots
+
+        served_snapshots = self.context.get("served_snapshots")
+        if served_snapshots is None:
+            statuses = self.parent.instance if isinstance(self.parent, serializers.ListSerializer) else [obj]
+            served_snapshots = get_served_snapshots(status.kiosk for status in statuses)
+            self.context["served_snapshots"] = served_snapshots
+        return obj.is_outdated_for(served_snapshots.get(obj.kiosk_id))
+
 
 class BusLocationSerializer(serializers.ModelSerializer):
     """Serializer for GPS location updates from kiosk"""
@@ -1,29 +1,307 @@
+import base64
+from dataclasses import dataclass
 import hashlib
+import logging
 import os
 import sqlite3
-import struct
 import tempfile
 from typing import Any
 
-from buses.models import Bus
-from students.models import Student
-
+from django.conf import settings
+from django.db.models import Count, Prefetch, Sum
+import numpy as np
 
-def calculate_content_hash(student_ids: list, embedding_ids: list) -> str:
-    """Calculates a stable hash for the content of the snapshot."""
-    hash_input = "".join(sorted(map(str, student_ids))) + "".join(sorted(map(str, embedding_ids)))
+from buses.models import Bus
+from students.models import FaceEmbeddingMetadata, Student, StudentPhoto
+
+from .models import DatasetVersion, Kiosk, SnapshotChange
+from .utils.embedding_codec import EMBEDDING_DTYPE_FLOAT32, EMBEDDING_DTYPE_INT8, EMBEDDING_ITEMSIZE, encode_embedding_blobs
+from .utils.embedding_index import cluster_count, train_centroids
+from .utils.embedding_selection import select_embeddings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA_VERSION = "1.3.0"
+
+# Snapshot scope tiers, in priority order
+TIER_BUS = 0
+TIER_ROUTE = 1
+TIER_SCHOOL = 2
+SCOPE_TIERS = {
+    Kiosk.SNAPSHOT_SCOPE_BUS: TIER_BUS,
+    Kiosk.SNAPSHOT_SCOPE_ROUTE: TIER_ROUTE,
+    Kiosk.SNAPSHOT_SCOPE_SCHOOL: TIER_SCHOOL,
+}
+
+
+def calculate_content_hash(student_rows: list, embedding_ids: list, hint_rows: list | tuple = (), build_settings: list | tuple = ()) -> str:
+    """Calculates a stable hash for the content of the snapshot.
+
+    Student rows (not just IDs) are hashed so renames and bus reassignments
+    produce a new hash - the snapshot artifact store is keyed by this value.
+    build_settings (see snapshot_build_settings) are hashed too, so a schema
+    or build settings change never reuses an artifact built the old way.
+    """
+    row_keys = ("|".join("" if value is None else str(value) for value in row) for row in student_rows)
+    hint_keys = ("|".join("" if value is None else str(value) for value in row) for row in hint_rows)
+    hash_input = "".join(sorted(row_keys)) + "".join(sorted(map(str, embedding_ids))) + "".join(sorted(hint_keys)) + "|".join(map(str, build_settings))
     # Use SHA-256 for collision resistance (avoid MD5)
     return hashlib.sha256(hash_input.encode()).hexdigest()
 
 
-class SnapshotGenerator:
-    """Creates a portable, secure SQLite database snapshot for a given bus."""
+@dataclass(frozen=True)
+class SnapshotScope:
+    """Which students a kiosk snapshot carries, how much of them, and at what precision.
+
+    scope:           widest tier shipped with embeddings (bus < route < school)
+    max_embeddings:  optional cap on embeddings in the snapshot
+    max_bytes:       optional cap on embedding bytes in the snapshot
+    embedding_dtype: precision of shipped embeddings (float32, float16, int8)
+
+    The bus's own students are always shipped; wider tiers fill the budget in
+    priority order. The school(s) of the bus's students are a hard boundary.
+    """
+
+    scope: str = Kiosk.SNAPSHOT_SCOPE_SCHOOL
+    max_embeddings: int | None = None
+    max_bytes: int | None = None
+    embedding_dtype: str = EMBEDDING_DTYPE_FLOAT32
+
+    @classmethod
+    def for_kiosk(cls, kiosk: Kiosk) -> "SnapshotScope":
+        return cls(
+            scope=kiosk.snapshot_scope,
+            max_embeddings=kiosk.snapshot_max_embeddings,
+            max_bytes=kiosk.snapshot_max_bytes,
+            embedding_dtype=kiosk.snapshot_embedding_dtype,
+        )
+
+    @property
+    def has_budget(self) -> bool:
+        return self.max_embeddings is not None or self.max_bytes is not None
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to key stored artifacts per scope configuration"""
+        parts = [self.scope]
+        if self.max_embeddings is not None:
+            parts.append(f"e{self.max_embeddings}")
+        if self.max_bytes is not None:
+            parts.append(f"b{self.max_bytes}")
+        if self.embedding_dtype != EMBEDDING_DTYPE_FLOAT32:
+            parts.append(self.embedding_dtype)
+        return "-".join(parts)
+
+
+def snapshot_build_settings(scope: SnapshotScope) -> tuple:
+    """Schema version and settings that shape snapshot bytes beyond the row content"""
+    return (
+        SNAPSHOT_SCHEMA_VERSION,
+        scope.embedding_dtype,
+        settings.SNAPSHOT_ANN_ENABLED,
+        settings.SNAPSHOT_ANN_MIN_EMBEDDINGS,
+        settings.SNAPSHOT_ANN_CLUSTER_SIZE,
+        settings.SNAPSHOT_ANN_MAX_CLUSTERS,
+        settings.SNAPSHOT_ANN_MAX_ITERATIONS,
+        settings.SNAPSHOT_ANN_NPROBE,
+        settings.SNAPSHOT_ANN_SEED,
+    )
+
+
+class SnapshotScopeResolver:
+    """Assigns the students around a bus to snapshot tiers."""
+
+    def __init__(self, bus: Bus, scope: SnapshotScope):
+        self.bus = bus
+        self.scope = scope
+        self.max_tier = SCOPE_TIERS[scope.scope]
+
+    def boundary(self):
+        """Active students inside the hard school boundary of the bus"""
+        school_ids = Student.objects.filter(assigned_bus=self.bus, status="active").values("school_id")
+        return Student.objects.filter(status="active", school_id__in=school_ids)
+
+    def tier_of(self, assigned_bus_id: Any, route_id: Any) -> int:
+        if assigned_bus_id == self.bus.bus_id:
+            return TIER_BUS
+        if self.bus.route_id is not None and route_id == self.bus.route_id:
+            return TIER_ROUTE
+        return TIER_SCHOOL
+
+    @staticmethod
+    def _shipped(embedding_count: int, embedding_values: int, model_count: int) -> tuple[int, int]:
+        """Upper bound of (embeddings, values) a student ships after per-student selection"""
+        max_per_student = settings.SNAPSHOT_EMBEDDINGS_PER_STUDENT
+        if max_per_student <= 0 or embedding_count <= max_per_student * model_count:
+            return embedding_count, embedding_values
+        shipped = max_per_student * model_count
+        return shipped, embedding_values * shipped // embedding_count
+
+    def select(self) -> tuple[list[Any], list[tuple]]:
+        """
+        Split the boundary into students shipped with embeddings and hint-only students.
+
+        Returns (embedded_student_ids, hint_rows) where hint_rows are
+        (student_id, bus_number) tuples for the rest of the school.
+        """
+        candidates = (
+            self.boundary()
+            .annotate(
+                embedding_count=Count("photos__face_embeddings"),
+                embedding_values=Sum("photos__face_embeddings__embedding_dimensions"),
+                model_count=Count("photos__face_embeddings__model_name", distinct=True),
+            )
+            .values_list("student_id", "assigned_bus_id", "assigned_bus__route_id", "assigned_bus__bus_number", "embedding_count", "embedding_values", "model_count")
+        )
+        ranked = sorted(
+            (self.tier_of(bus_id, route_id), str(student_id), student_id, bus_number, *self._shipped(count or 0, values or 0, model_count))
+            for student_id, bus_id, route_id, bus_number, count, values, model_count in candidates
+        )
+
+        embedded_ids = []
+        hint_rows = []
+        used_embeddings = 0
+        used_bytes = 0
+        itemsize = EMBEDDING_ITEMSIZE[self.scope.embedding_dtype]
+        budget_exhausted = False
+        for tier, student_key, student_id, bus_number, embedding_count, embedding_values in ranked:
+            embedding_bytes = embedding_values * itemsize
+            within_budget = not budget_exhausted and (
+                (self.scope.max_embeddings is None or used_embeddings + embedding_count <= self.scope.max_embeddings)
+                and (self.scope.max_bytes is None or used_bytes + embedding_bytes <= self.scope.max_bytes)
+            )
+            # The bus's own students always ship - the budget only trims wider tiers
+            if tier == TIER_BUS or (tier <= self.max_tier and within_budget):
+                embedded_ids.append(student_id)
+                used_embeddings += embedding_count
+                used_bytes += embedding_bytes
+            else:
+                if tier <= self.max_tier:
+                    budget_exhausted = True  # Fill in strict priority order
+                hint_rows.append((student_key, bus_number))
+
+        if self.scope.has_budget and budget_exhausted:
+            logger.info(f"Snapshot budget reached for bus {self.bus.bus_id}: {used_embeddings} embeddings, {used_bytes} bytes")
+        return embedded_ids, hint_rows
+
+
+def snapshot_students(student_ids):
+    """Students with the related rows snapshots read - photo blobs (photo_data, face_crop) are never loaded"""
+    photos = StudentPhoto.objects.only("photo_id", "student_id")
+    return Student.objects.filter(student_id__in=student_ids).prefetch_related(Prefetch("photos", queryset=photos), "photos__face_embeddings", "assigned_bus")
+
+
+def select_student_embeddings(student: Student) -> list[FaceEmbeddingMetadata]:
+    """Face embeddings of a student that ship in snapshots.
+
+    At most SNAPSHOT_EMBEDDINGS_PER_STUDENT per model (0 = all), best
+    quality_score first, skipping near-duplicates (cosine above
+    SNAPSHOT_EMBEDDING_MAX_SIMILARITY) and embeddings below
+    SNAPSHOT_EMBEDDING_MIN_QUALITY - but never every embedding of a model.
+    Expects photos__face_embeddings to be prefetched.
+    """
+    embeddings = [embedding_meta for photo in student.photos.all() for embedding_meta in photo.face_embeddings.all()]
+    max_count = settings.SNAPSHOT_EMBEDDINGS_PER_STUDENT
+    min_quality = settings.SNAPSHOT_EMBEDDING_MIN_QUALITY
+    max_similarity = settings.SNAPSHOT_EMBEDDING_MAX_SIMILARITY
+    if len(embeddings) <= 1 or (max_count <= 0 and min_quality <= 0 and max_similarity >= 1.0):
+        return embeddings
+
+    groups: dict[tuple[str, int], list[int]] = {}
+    for index, embedding_meta in enumerate(embeddings):
+        groups.setdefault((embedding_meta.model_name, len(embedding_meta.embedding_vector) // 4), []).append(index)
+
+    kept = []
+    for (_, dimensions), indexes in groups.items():
+        matrix = np.frombuffer(b"".join(bytes(embeddings[i].embedding_vector) for i in indexes), dtype="<f4").reshape(len(indexes), dimensions)
+        selected = select_embeddings(matrix, [embeddings[i].quality_score for i in indexes], max_count, min_quality, max_similarity)
+        kept.extend(indexes[i] for i in selected)
+
+    return [embeddings[i] for i in sorted(kept)]
+
+
+def build_snapshot_rows(students, selected_embeddings: dict[Any, list] | None = None) -> tuple[list[tuple], list[tuple]]:
+    """Builds snapshot table rows following contract: binary embeddings, decrypted names.
+
+    Shared by full snapshots and deltas so both ship identical rows.
+    Returns (student_rows, embedding_rows); embedding rows carry the stored
+    float32 BLOB - see encode_embedding_rows for the shipped precision.
+    selected_embeddings (student_id -> embeddings) skips re-running
+    select_student_embeddings when the caller already did.
+    """
+    student_rows = []
+    embedding_rows = []
+
+    for student in students:
+        # Contract: names must be decrypted
+        decrypted_name = student.encrypted_name
+        bus_id = str(student.assigned_bus.bus_id) if student.assigned_bus else None
+        bus_number = student.assigned_bus.bus_number if student.assigned_bus else None
+        student_rows.append((str(student.student_id), decrypted_name, "active", bus_id, bus_number))
+
+        embeddings = selected_embeddings[student.student_id] if selected_embeddings is not None else select_student_embeddings(student)
+        for embedding_meta in embeddings:
+            # Contract: binary BLOB (192 floats, little-endian) - stored in the
+            # same layout, so the bytes are copied as-is
+            embedding_rows.append(
+                (
+                    str(student.student_id),
+                    embedding_meta.embedding_vector,
+                    embedding_meta.quality_score,
+                    embedding_meta.model_name,
+                )
+            )
+
+    return student_rows, embedding_rows
+
+
+def encode_embedding_rows(embedding_rows: list[tuple], embedding_dtype: str) -> list[tuple]:
+    """Encodes float32 embedding rows to the shipped precision in one pass over all vectors.
+
+    Returns rows with the embedding_scale column appended (None for float formats).
+    """
+    blobs, scales = encode_embedding_blobs([row[1] for row in embedding_rows], embedding_dtype)
+    return [
+        (student_id, blob, quality_score, model_name, scale)
+        for (student_id, _, quality_score, model_name), blob, scale in zip(embedding_rows, blobs, scales, strict=True)
+    ]
 
-    def __init__(self, bus_id: Any):
+
+class SnapshotGenerator:
+    """Creates a portable, secure SQLite database snapshot for a given bus.
+
+    Build modes:
+        memory - builds in a ":memory:" database and serializes it (default, no disk I/O)
+        file   - builds in a temp file and reads it back (fallback for SQLite builds
+                 without serialize support)
+
+    With SNAPSHOT_ANN_ENABLED, large snapshots also carry a coarse ANN index
+    (embedding_centroids + face_embeddings.cluster_id). Pass the previous
+    build's centroids (self.centroids) as previous_centroids to warm-start
+    training.
+    """
+
+    BUILD_MODES = ("memory", "file")
+
+    def __init__(
+        self,
+        bus_id: Any,
+        build_mode: str = "memory",
+        scope: SnapshotScope | None = None,
+        previous_centroids: dict[str, np.ndarray] | None = None,
+    ):
         from django.utils import timezone as dj_tz
 
+        if build_mode not in self.BUILD_MODES:
+            raise ValueError(f"Unknown snapshot build mode: {build_mode}")
+
         # Accept strings or UUIDs and normalise to str for filenames/IDs
         self.bus_id = str(bus_id)
+        self.build_mode = build_mode
+        self.scope = scope or SnapshotScope()
+        self.previous_centroids = previous_centroids or {}
+        # Centroids of the last generate() per "<model_name>:<dimensions>"
+        self.centroids: dict[str, np.ndarray] = {}
         # Use timezone-aware timestamp
         self.sync_timestamp = dj_tz.now().isoformat()
 
@@ -31,54 +309,83 @@ class SnapshotGenerator:
         """
         Generates the SQLite database and returns it as bytes.
         """
-        fd, db_path = tempfile.mkstemp(suffix=".db")
-        os.close(fd)
-
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            self._create_schema(cursor)
-            students, student_ids, embedding_ids = self._get_data_for_bus()
-            self._populate_data(cursor, students)
-
-            student_count = len(student_ids)
-            embedding_count = len(embedding_ids)
-            content_hash = calculate_content_hash(student_ids, embedding_ids)
-
-            self._populate_metadata(cursor, student_count, embedding_count, content_hash)
-
-            conn.commit()
-            conn.close()
-            # Explicitly delete connection to ensure file handle is released on Windows
-            del conn
-            del cursor
-
-            with open(db_path, "rb") as f:
-                db_bytes = f.read()
+        students, hint_rows = self._get_data_for_bus()
+        selected_embeddings = {student.student_id: select_student_embeddings(student) for student in students}
+        embedding_ids = [embedding_meta.embedding_id for embeddings in selected_embeddings.values() for embedding_meta in embeddings]
+        student_rows, embedding_rows = build_snapshot_rows(students, selected_embeddings)
 
-        finally:
-            # Force garbage collection to ensure file handles are released
-            import gc
+        # Clusters are trained on the float32 vectors, before quantization
+        cluster_ids, centroid_rows = self._build_ann_index(embedding_rows)
+        embedding_rows = [(*row, cluster_id) for row, cluster_id in zip(encode_embedding_rows(embedding_rows, self.scope.embedding_dtype), cluster_ids, strict=True)]
 
-            gc.collect()
-            try:
-                os.remove(db_path)
-            except OSError:
-                # If file is still locked, wait a bit and try again
-                import time
+        student_count = len(student_rows)
+        embedding_count = len(embedding_ids)
+        content_hash = calculate_content_hash(student_rows, embedding_ids, hint_rows, snapshot_build_settings(self.scope))
 
-                time.sleep(0.1)
-                os.remove(db_path)
+        db_bytes = self.build_database(student_rows, embedding_rows, content_hash, hint_rows, centroid_rows)
 
         metadata = {
             "sync_timestamp": self.sync_timestamp,
             "student_count": student_count,
             "embedding_count": embedding_count,
+            "hint_count": len(hint_rows),
+            "snapshot_scope": self.scope.key,
+            "embedding_dtype": self.scope.embedding_dtype,
+            "ann_cluster_count": len(centroid_rows),
             "content_hash": content_hash,
         }
         return db_bytes, metadata
 
+    def build_database(
+        self,
+        student_rows: list[tuple],
+        embedding_rows: list[tuple],
+        content_hash: str,
+        hint_rows: list | tuple = (),
+        centroid_rows: list | tuple = (),
+    ) -> bytes:
+        """Writes snapshot rows into a new SQLite database and returns its bytes."""
+        if self.build_mode == "memory" and hasattr(sqlite3.Connection, "serialize"):
+            return self._build_in_memory(student_rows, embedding_rows, content_hash, hint_rows, centroid_rows)
+        return self._build_in_file(student_rows, embedding_rows, content_hash, hint_rows, centroid_rows)
+
+    def _build_in_memory(self, student_rows, embedding_rows, content_hash, hint_rows, centroid_rows) -> bytes:
+        conn = sqlite3.connect(":memory:", isolation_level=None)
+        try:
+            self._write_database(conn, student_rows, embedding_rows, content_hash, hint_rows, centroid_rows)
+            return conn.serialize()
+        finally:
+            conn.close()
+
+    def _build_in_file(self, student_rows, embedding_rows, content_hash, hint_rows, centroid_rows) -> bytes:
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+        try:
+            conn = sqlite3.connect(db_path, isolation_level=None)
+            try:
+                self._write_database(conn, student_rows, embedding_rows, content_hash, hint_rows, centroid_rows)
+            finally:
+                conn.close()
+
+            with open(db_path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(db_path)
+
+    def _write_database(self, conn, student_rows, embedding_rows, content_hash, hint_rows, centroid_rows):
+        """Creates schema and inserts all rows in a single transaction."""
+        # The snapshot is rebuilt from scratch on failure - no rollback journal or fsync needed
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        self._create_schema(cursor)
+        self._populate_data(cursor, student_rows, embedding_rows, hint_rows, centroid_rows)
+        self._populate_metadata(cursor, len(student_rows), len(embedding_rows), content_hash, len(centroid_rows))
+        cursor.execute("COMMIT")
+
     def _create_schema(self, cursor):
         """Creates schema following snapshot_interface_contract.yaml"""
         cursor.execute(
@@ -103,11 +410,37 @@ class SnapshotGenerator:
                 embedding_vector BLOB NOT NULL,
                 quality_score REAL NOT NULL,
                 model_name TEXT,
+                embedding_scale REAL,
+                cluster_id INTEGER,
                 FOREIGN KEY (student_id) REFERENCES students (student_id)
             )
             """
         )
         cursor.execute("CREATE INDEX idx_embeddings_student ON face_embeddings(student_id)")
+        cursor.execute("CREATE INDEX idx_embeddings_cluster ON face_embeddings(cluster_id)")
+
+        # Coarse ANN index - empty when the snapshot is scanned exhaustively
+        cursor.execute(
+            """
+            CREATE TABLE embedding_centroids (
+                cluster_id INTEGER PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                centroid BLOB NOT NULL,
+                member_count INTEGER NOT NULL
+            )
+            """
+        )
+
+        # Rest of the school, without embeddings - lets the kiosk tell a
+        # recognised-elsewhere student which bus they belong to
+        cursor.execute(
+            """
+            CREATE TABLE wrong_bus_hints (
+                student_id TEXT PRIMARY KEY,
+                bus_number TEXT
+            )
+            """
+        )
 
         cursor.execute(
             """
@@ -121,63 +454,181 @@ class SnapshotGenerator:
     def _get_data_for_bus(self):
         """Queries the Django database for all necessary student and embedding data.
 
-        Returns ALL students (not just bus-specific) for fast offline matching.
-        Each kiosk gets full database to identify wrong-bus students instantly.
+        Students within the snapshot scope (bus, route or school of the bus)
+        ship with embeddings; the rest of the school only as wrong-bus hints.
         """
         try:
-            Bus.objects.get(bus_id=self.bus_id)  # Verify bus exists
+            bus = Bus.objects.get(bus_id=self.bus_id)  # Verify bus exists
         except Bus.DoesNotExist:
-            return [], [], []
+            return [], []
 
-        # Get ALL active students across all buses for offline speed
-        students = Student.objects.filter(status="active").prefetch_related("photos__face_embeddings", "assigned_bus")
+        embedded_ids, hint_rows = SnapshotScopeResolver(bus, self.scope).select()
+        students = snapshot_students(embedded_ids)
 
-        student_ids = [s.student_id for s in students]
-        embedding_ids = [emb.embedding_id for s in students for p in s.photos.all() for emb in p.face_embeddings.all()]
+        return students, hint_rows
 
-        return students, student_ids, embedding_ids
+    def _build_ann_index(self, embedding_rows: list[tuple]) -> tuple[list[int | None], list[tuple]]:
+        """Trains coarse ANN centroids per embedding model.
 
-    def _populate_data(self, cursor, students):
-        """Populates snapshot following contract: binary embeddings, decrypted names."""
-        student_rows = []
-        embedding_rows = []
-
-        for student in students:
-            # Contract: names must be decrypted
-            decrypted_name = student.encrypted_name
-            bus_id = str(student.assigned_bus.bus_id) if student.assigned_bus else None
-            bus_number = student.assigned_bus.bus_number if student.assigned_bus else None
-            student_rows.append((str(student.student_id), decrypted_name, "active", bus_id, bus_number))
-
-            for photo in student.photos.all():
-                for embedding_meta in photo.face_embeddings.all():
-                    # Contract: convert JSON list to binary BLOB (192 floats, little-endian)
-                    embedding_list = embedding_meta.embedding  # List[float] from JSONField
-                    embedding_blob = struct.pack(f"{len(embedding_list)}f", *embedding_list)
-
-                    embedding_rows.append(
-                        (
-                            str(student.student_id),
-                            embedding_blob,
-                            embedding_meta.quality_score,
-                            embedding_meta.model_name,
-                        )
-                    )
+        Returns (cluster_id per embedding row, embedding_centroids rows). Cluster
+        ids are unique across models. Small snapshots get no index (all None).
+        """
+        self.centroids = {}
+        cluster_ids: list[int | None] = [None] * len(embedding_rows)
+        if not settings.SNAPSHOT_ANN_ENABLED or len(embedding_rows) < settings.SNAPSHOT_ANN_MIN_EMBEDDINGS:
+            return cluster_ids, []
+
+        groups: dict[tuple[str, int], list[int]] = {}
+        for index, (_, blob, _, model_name) in enumerate(embedding_rows):
+            if blob:
+                groups.setdefault((model_name, len(blob) // 4), []).append(index)
+
+        centroid_rows = []
+        next_cluster_id = 0
+        for (model_name, dimensions), indexes in sorted(groups.items()):
+            # Canonical row order keeps training deterministic across builds
+            indexes.sort(key=lambda i: (embedding_rows[i][0], embedding_rows[i][1]))
+            matrix = np.frombuffer(b"".join(embedding_rows[i][1] for i in indexes), dtype="<f4").reshape(len(indexes), dimensions)
+
+            centroid_key = f"{model_name}:{dimensions}"
+            centroids, labels = train_centroids(
+                matrix,
+                cluster_count(len(indexes), settings.SNAPSHOT_ANN_CLUSTER_SIZE, settings.SNAPSHOT_ANN_MAX_CLUSTERS),
+                seed=settings.SNAPSHOT_ANN_SEED,
+                initial=self.previous_centroids.get(centroid_key),
+                max_iterations=settings.SNAPSHOT_ANN_MAX_ITERATIONS,
+            )
+            self.centroids[centroid_key] = centroids
+
+            for index, label in zip(indexes, labels.tolist(), strict=True):
+                cluster_ids[index] = next_cluster_id + label
+            member_counts = np.bincount(labels, minlength=len(centroids)).tolist()
+            centroid_rows.extend(
+                (next_cluster_id + label, model_name, centroid.astype("<f4").tobytes(), member_counts[label]) for label, centroid in enumerate(centroids)
+            )
+            next_cluster_id += len(centroids)
+
+        return cluster_ids, centroid_rows
 
+    def _populate_data(self, cursor, student_rows, embedding_rows, hint_rows=(), centroid_rows=()):
+        """Populates snapshot following contract: binary embeddings, decrypted names."""
         cursor.executemany("INSERT INTO students (student_id, name, status, bus_id, bus_number) VALUES (?, ?, ?, ?, ?)", student_rows)
         cursor.executemany(
-            "INSERT INTO face_embeddings (student_id, embedding_vector, quality_score, model_name) VALUES (?, ?, ?, ?)",
+            "INSERT INTO face_embeddings (student_id, embedding_vector, quality_score, model_name, embedding_scale, cluster_id) VALUES (?, ?, ?, ?, ?, ?)",
             embedding_rows,
         )
+        cursor.executemany("INSERT INTO wrong_bus_hints (student_id, bus_number) VALUES (?, ?)", hint_rows)
+        cursor.executemany("INSERT INTO embedding_centroids (cluster_id, model_name, centroid, member_count) VALUES (?, ?, ?, ?)", centroid_rows)
 
-    def _populate_metadata(self, cursor, student_count, embedding_count, content_hash):
+    def _populate_metadata(self, cursor, student_count, embedding_count, content_hash, ann_cluster_count=0):
         """Stores metadata following contract required_keys."""
         metadata_rows = [
-            ("schema_version", "1.0.0"),
+            ("schema_version", SNAPSHOT_SCHEMA_VERSION),
             ("sync_timestamp", self.sync_timestamp),
             ("bus_id", str(self.bus_id)),
+            ("snapshot_scope", self.scope.key),
+            ("embedding_dtype", self.scope.embedding_dtype),
+            # int8 vectors carry their own scale in face_embeddings.embedding_scale
+            ("embedding_scale", "per_vector" if self.scope.embedding_dtype == EMBEDDING_DTYPE_INT8 else "1.0"),
+            ("ann_cluster_count", str(ann_cluster_count)),
+            ("ann_nprobe", str(settings.SNAPSHOT_ANN_NPROBE)),
             ("student_count", str(student_count)),
             ("embedding_count", str(embedding_count)),
             ("content_hash", content_hash),
         ]
         cursor.executemany("INSERT INTO sync_metadata (key, value) VALUES (?, ?)", metadata_rows)
+
+
+class SnapshotDeltaGenerator:
+    """Creates a row-level patch from a kiosk's snapshot version to the current data.
+
+    The patch is student-granular: every changed student ships its full row
+    and its complete set of face embeddings, or a wrong-bus hint when it left
+    the kiosk's scope. Kiosks apply it in one transaction:
+        1. DELETE face_embeddings and wrong_bus_hints of every student in
+           students + deleted_student_ids
+        2. DELETE students in deleted_student_ids
+        3. INSERT OR REPLACE students and wrong_bus_hints, INSERT face_embeddings
+
+    Falls back to full_snapshot_required when the base version is outside the
+    journal window, the journal holds a full-resync marker, the patch would
+    touch more students than a full download is worth, the kiosk has a
+    snapshot budget (budgeted membership can shift for unchanged students),
+    or the kiosk's snapshot carries an ANN index (ann_indexed) - delta rows
+    have no cluster_id, so ANN probes would never reach them.
+    """
+
+    def __init__(self, bus_id: Any, base_version: int, scope: SnapshotScope | None = None, ann_indexed: bool = False):
+        self.bus_id = str(bus_id)
+        self.base_version = base_version
+        self.scope = scope or SnapshotScope()
+        self.ann_indexed = ann_indexed
+
+    def generate(self) -> dict[str, Any]:
+        target_version = DatasetVersion.current()
+        delta: dict[str, Any] = {
+            "base_version": self.base_version,
+            "target_version": target_version,
+            "full_snapshot_required": False,
+            "students": [],
+            "face_embeddings": [],
+            "wrong_bus_hints": [],
+            "deleted_student_ids": [],
+        }
+
+        if self.base_version > target_version or target_version - self.base_version > settings.SNAPSHOT_DELTA_MAX_VERSIONS:
+            delta["full_snapshot_required"] = True
+            return delta
+
+        changes = SnapshotChange.objects.filter(dataset_version__gt=self.base_version, dataset_version__lte=target_version)
+        if changes.filter(full_resync=True).exists():
+            delta["full_snapshot_required"] = True
+            return delta
+
+        changed_ids = {str(student_id) for student_id in changes.values_list("student_id", flat=True).distinct()}
+        if not changed_ids:
+            return delta
+        if len(changed_ids) > settings.SNAPSHOT_DELTA_MAX_STUDENTS or self.scope.has_budget or self.ann_indexed:
+            delta["full_snapshot_required"] = True
+            return delta
+
+        try:
+            bus = Bus.objects.get(bus_id=self.bus_id)
+        except Bus.DoesNotExist:
+            delta["full_snapshot_required"] = True
+            return delta
+
+        # Same selection as the full snapshot: out-of-boundary, inactive or
+        # deleted students become tombstones
+        resolver = SnapshotScopeResolver(bus, self.scope)
+        embedded_ids = []
+        for student_id, bus_id, route_id, bus_number in resolver.boundary().filter(student_id__in=changed_ids).values_list(
+            "student_id", "assigned_bus_id", "assigned_bus__route_id", "assigned_bus__bus_number"
+        ):
+            if resolver.tier_of(bus_id, route_id) <= resolver.max_tier:
+                embedded_ids.append(student_id)
+            else:
+                delta["wrong_bus_hints"].append({"student_id": str(student_id), "bus_number": bus_number})
+
+        students = snapshot_students(embedded_ids)
+        student_rows, embedding_rows = build_snapshot_rows(students)
+        embedding_rows = encode_embedding_rows(embedding_rows, self.scope.embedding_dtype)
+
+        delta["students"] = [
+            {"student_id": student_id, "name": name, "status": status, "bus_id": bus_id, "bus_number": bus_number}
+            for student_id, name, status, bus_id, bus_number in student_rows
+        ]
+        delta["face_embeddings"] = [
+            {
+                "student_id": student_id,
+                # Same BLOB (and precision) as the kiosk's snapshot, base64 for JSON
+                "embedding_vector": base64.b64encode(embedding_blob).decode(),
+                "quality_score": quality_score,
+                "model_name": model_name,
+                "embedding_scale": embedding_scale,
+            }
+            for student_id, embedding_blob, quality_score, model_name, embedding_scale in embedding_rows
+        ]
+        upserted_ids = {row[0] for row in student_rows}
+        delta["deleted_student_ids"] = sorted(changed_ids - upserted_ids)
+        return delta
@@ -0,0 +1,131 @@
+"""
+Signals that keep the kiosk dataset version in sync with student data.
+
+Any change to data that ends up in a kiosk snapshot (students, their photos,
+face embeddings, bus numbers) bumps DatasetVersion inside the same
+transaction, so kiosks and stored snapshot artifacts see the new version
+exactly when the change becomes visible. The changed students are recorded
+in the SnapshotChange journal for delta sync; every bump prunes journal rows
+older than SNAPSHOT_DELTA_MAX_VERSIONS.
+
+Bulk paths wrap their writes in batch_dataset_changes() to bump once
+instead of once per row.
+
+dataset_version_changed is sent once the new version can be served (realtime
+pushes it to connected kiosks): when the bump commits, or with
+SNAPSHOT_BACKGROUND_BUILD once the debounced rebuild task (kiosks/tasks.py)
+has built the new artifacts.
+"""
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+import threading
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from buses.models import Bus
+from students.models import FaceEmbeddingMetadata, Student, StudentPhoto
+
+from .models import DatasetVersion, SnapshotChange
+from .tasks import schedule_snapshot_rebuild
+
+_batch_state = threading.local()
+
+# Sent after commit with dataset_version=<new version>
+dataset_version_changed = Signal()
+
+
+def _commit_changes(student_ids: Iterable[Any], full_resync: bool) -> None:
+    with transaction.atomic():
+        dataset_version = DatasetVersion.bump()
+        SnapshotChange.record(dataset_version, student_ids, full_resync=full_resync)
+        # Keep the journal bounded to the delta window whether or not the rebuild task runs
+        SnapshotChange.prune(settings.SNAPSHOT_DELTA_MAX_VERSIONS, dataset_version)
+        if settings.SNAPSHOT_BACKGROUND_BUILD:
+            transaction.on_commit(schedule_snapshot_rebuild)
+        else:
+            transaction.on_commit(lambda: dataset_version_changed.send(sender=DatasetVersion, dataset_version=dataset_version))
+
+
+@contextmanager
+def batch_dataset_changes() -> Iterator[None]:
+    """
+    Collapse every dataset change inside the block into a single version bump.
+
+    Usage:
+        with batch_dataset_changes():
+            for row in rows:
+                Student.objects.update_or_create(...)
+    """
+    if getattr(_batch_state, "active", False):
+        yield  # Nested batch - the outermost block bumps
+        return
+
+    _batch_state.active = True
+    _batch_state.changed = False
+    _batch_state.student_ids = set()
+    _batch_state.full_resync = False
+    try:
+        yield
+    finally:
+        changed = _batch_state.changed
+        student_ids = _batch_state.student_ids
+        full_resync = _batch_state.full_resync
+        _batch_state.active = False
+        _batch_state.changed = False
+        _batch_state.student_ids = set()
+        _batch_state.full_resync = False
+        if changed:
+            _commit_changes(student_ids, full_resync)
+
+
+def record_dataset_change(student_ids: Iterable[Any] = (), full_resync: bool = False) -> None:
+    """
+    Bump the dataset version and journal the changed students.
+
+    Deferred to the end of an active batch. Pass full_resync=True for
+    changes whose affected students are unknown.
+    """
+    if getattr(_batch_state, "active", False):
+        _batch_state.changed = True
+        _batch_state.student_ids.update(student_ids)
+        _batch_state.full_resync = _batch_state.full_resync or full_resync
+        return
+    _commit_changes(student_ids, full_resync)
+
+
+def _changed_student_ids(sender: type, instance: Any) -> list[Any]:
+    """Students whose snapshot rows are affected by a change to instance"""
+    if sender is Student:
+        return [instance.student_id]
+    if sender is StudentPhoto:
+        return [instance.student_id]
+    if sender is FaceEmbeddingMetadata:
+        # Photo may already be gone (cascade delete) - its own signal covers the student
+        return list(StudentPhoto.objects.filter(pk=instance.student_photo_id).values_list("student_id", flat=True))
+    return []
+
+
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=StudentPhoto)
+@receiver([post_save, post_delete], sender=FaceEmbeddingMetadata)
+def bump_dataset_version(sender: type, instance: Any, **kwargs: Any) -> None:
+    """Bump the kiosk dataset version when snapshot data changes."""
+    if kwargs.get("raw"):
+        return  # Fixture loading - nothing is served yet
+    record_dataset_change(_changed_student_ids(sender, instance))
+
+
+@receiver([post_save, post_delete], sender=Bus)
+def bump_dataset_version_on_bus_change(sender: type, instance: Any, **kwargs: Any) -> None:
+    """
+    Bus changes (number, route, deletion) move whole groups of students between
+    snapshot scopes and hints of many kiosks - force a full resync.
+    """
+    if kwargs.get("raw"):
+        return
+    record_dataset_change(full_resync=True)
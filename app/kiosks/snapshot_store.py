@@ -0,0 +1,434 @@
+"""
+Snapshot artifact store.
+
+Built kiosk snapshots are kept (local disk or any Django storage backend)
+together with their metadata, keyed by content hash. Polls and downloads
+serve the stored artifact. Pointers to the current artifact are keyed by the
+DatasetVersion counter, which model signals (kiosks/signals.py) bump on every
+data change - so only a real change triggers a rebuild. With
+SNAPSHOT_BACKGROUND_BUILD, rebuilds run in a Celery task (kiosks/tasks.py)
+and requests keep serving the last good artifact of the scope meanwhile.
+Inline builds are single-flight per scope: one request builds while the rest
+serve the last good artifact (or wait, for a scope that was never built).
+
+Layout inside the storage backend (scope_key = <bus_id>/<SnapshotScope.key>):
+    <scope_key>/<content_hash>.db    - SQLite snapshot bytes
+    <scope_key>/<content_hash>.json  - metadata (counts, checksum, size, encodings, ...)
+    <scope_key>/<content_hash>.db.gz - precompressed copies, one per transport encoding
+    <scope_key>/<content_hash>.db.zst
+    <scope_key>/<content_hash>.manifest.json - chunk checksums for chunked transfer
+    <scope_key>/centroids.npz        - latest ANN centroids, warm start for the next build
+    <scope_key>/latest.json          - metadata of the last good build (served while rebuilding)
+
+Retention: after each build, only the current and the previous artifact keep
+their bytes. Metadata of older builds stays while it is inside the delta
+window (SNAPSHOT_DELTA_MAX_VERSIONS), so kiosks can still ask for a delta by
+content hash, and is deleted after that.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, Storage, storages
+import numpy as np
+
+from .models import DatasetVersion, Kiosk
+from .services import SnapshotGenerator, SnapshotScope
+from .utils import calculate_checksum
+from .utils.snapshot_utils import ENCODING_GZIP, ENCODING_ZSTD, available_encodings, build_chunk_manifest, compress_snapshot
+
+logger = logging.getLogger(__name__)
+
+POINTER_CACHE_KEY = "kiosk_snapshot:pointer:{dataset_version}:{scope_key}"
+BUILD_LOCK_CACHE_KEY = "kiosk_snapshot:build_lock:{scope_key}"
+BUILD_LOCK_POLL_SECONDS = 0.5
+
+ENCODING_SUFFIXES = {ENCODING_GZIP: ".gz", ENCODING_ZSTD: ".zst"}
+
+
+def get_snapshot_storage() -> Storage:
+    """
+    Storage backend for snapshot artifacts.
+
+    Uses the "snapshots" alias from settings.STORAGES when configured
+    (e.g. GCS in production), otherwise local disk at SNAPSHOT_STORAGE_DIR.
+    """
+    if "snapshots" in settings.STORAGES:
+        return storages["snapshots"]
+    return FileSystemStorage(location=settings.SNAPSHOT_STORAGE_DIR)
+
+
+def get_scope_key(bus_id: Any, scope: SnapshotScope) -> str:
+    return f"{bus_id}/{scope.key}"
+
+
+def get_kiosk_scopes(kiosks: Iterable[Kiosk] | None = None) -> list[tuple[Any, SnapshotScope]]:
+    """
+    Distinct (bus_id, scope) pairs served to kiosks.
+
+    Args:
+        kiosks: Kiosks to cover (default: every active kiosk with a bus)
+
+    Returns:
+        (bus_id, SnapshotScope) pairs, one per stored artifact to build
+    """
+    if kiosks is None:
+        kiosks = Kiosk.objects.filter(is_active=True, bus__isnull=False)
+    scopes = {(kiosk.bus_id, SnapshotScope.for_kiosk(kiosk)) for kiosk in kiosks if kiosk.bus_id}
+    return sorted(scopes, key=lambda pair: get_scope_key(*pair))
+
+
+def get_served_snapshots(kiosks: Iterable[Kiosk]) -> dict[str, dict[str, Any] | None]:
+    """
+    Metadata of the snapshot currently served to each kiosk, keyed by kiosk_id.
+
+    One dataset version query and one cache round trip cover every kiosk, so
+    lists (admin, serializers) call this once instead of once per row. Scopes
+    without a pointer for the current version fall back to their last good
+    build; kiosks without a bus or a built scope map to None.
+    """
+    scope_keys = {kiosk.kiosk_id: get_scope_key(kiosk.bus_id, SnapshotScope.for_kiosk(kiosk)) for kiosk in kiosks if kiosk.bus_id}
+    if not scope_keys:
+        return {}
+
+    dataset_version = DatasetVersion.current()
+    pointer_keys = {scope_key: POINTER_CACHE_KEY.format(dataset_version=dataset_version, scope_key=scope_key) for scope_key in set(scope_keys.values())}
+    pointers = cache.get_many(list(pointer_keys.values()))
+    store = SnapshotArtifactStore()
+    served = {
+        scope_key: pointers.get(pointer_key) or store._load_metadata(f"{scope_key}/latest.json") for scope_key, pointer_key in pointer_keys.items()
+    }
+    return {kiosk_id: served[scope_key] for kiosk_id, scope_key in scope_keys.items()}
+
+
+class SnapshotArtifactStore:
+    """
+    Serves snapshot artifacts, building them only when the data changed.
+
+    Usage:
+        store = SnapshotArtifactStore()
+        metadata = store.get_or_build(bus.bus_id, SnapshotScope.for_kiosk(kiosk))
+        snapshot_bytes = store.read_bytes(metadata)
+    """
+
+    def __init__(self, storage: Storage | None = None):
+        self.storage = storage or get_snapshot_storage()
+
+    def get_or_build(self, bus_id: Any, scope: SnapshotScope | None = None) -> dict[str, Any]:
+        """
+        Return metadata of the current snapshot artifact for a bus and scope.
+
+        Builds (and stores) the snapshot only when no valid artifact exists
+        for the current dataset version. With SNAPSHOT_BACKGROUND_BUILD, the
+        last good artifact is returned instead while a rebuild is queued;
+        only a scope that was never built is built inline.
+        """
+        scope = scope or SnapshotScope()
+        metadata = self._current(bus_id, scope)
+        if metadata:
+            return metadata
+
+        latest = self._latest(bus_id, scope)
+        if settings.SNAPSHOT_BACKGROUND_BUILD and latest:
+            from .tasks import schedule_snapshot_rebuild
+
+            schedule_snapshot_rebuild()
+            return latest
+
+        return self._build_inline(bus_id, scope, latest)
+
+    def rebuild(self, bus_id: Any, scope: SnapshotScope | None = None, force: bool = False) -> dict[str, Any]:
+        """
+        Build the snapshot artifact for the current dataset version.
+
+        Skips the build when the current artifact already exists and reuses a
+        stored artifact with the same content hash, unless force is set (e.g.
+        after changing snapshot code) - then the artifact is always rebuilt.
+        """
+        scope = scope or SnapshotScope()
+        if not force:
+            metadata = self._current(bus_id, scope)
+            if metadata:
+                return metadata
+
+        scope_key = get_scope_key(bus_id, scope)
+        dataset_version = DatasetVersion.current()
+        previous = self._load_metadata(f"{scope_key}/latest.json")
+        metadata = self._build(bus_id, scope, dataset_version, reuse=not force)
+        cache.set(POINTER_CACHE_KEY.format(dataset_version=dataset_version, scope_key=scope_key), metadata, timeout=None)
+        self._save_metadata(f"{scope_key}/latest.json", metadata)
+
+        keep = {metadata["content_hash"]}
+        if previous:
+            keep.add(previous["content_hash"])  # May still be streaming to kiosks
+        try:
+            self._prune(scope_key, keep, dataset_version)
+        except Exception as e:
+            # Retention is housekeeping - never fail a build over it
+            logger.warning(f"Snapshot retention failed for {scope_key}: {e}")
+        return metadata
+
+    def find_dataset_version(self, bus_id: Any, content_hash: str, scope: SnapshotScope | None = None) -> int | None:
+        """Dataset version of a previously stored artifact, looked up by content hash."""
+        stored = self._load_metadata(f"{get_scope_key(bus_id, scope or SnapshotScope())}/{content_hash}.json")
+        if not stored or "dataset_version" not in stored:
+            return None
+        return int(stored["dataset_version"])
+
+    def has_ann_index(self, bus_id: Any, scope: SnapshotScope | None = None) -> bool:
+        """
+        Whether snapshots of the scope may carry an ANN index.
+
+        True once any build of the scope trained centroids, so kiosks still
+        holding such a snapshot are never sent deltas without cluster ids.
+        """
+        return self.storage.exists(f"{get_scope_key(bus_id, scope or SnapshotScope())}/centroids.npz")
+
+    def discard(self, metadata: dict[str, Any]) -> None:
+        """
+        Forget a served artifact whose file is gone, so the next request rebuilds it.
+
+        Pointers are trusted without checking storage on every poll; downloads
+        call this when opening the artifact fails.
+        """
+        scope_key = f"{metadata['bus_id']}/{metadata['snapshot_scope']}"
+        logger.warning(f"Snapshot artifact {metadata['artifact_name']} is missing - dropping it from {scope_key}")
+        cache.delete(POINTER_CACHE_KEY.format(dataset_version=DatasetVersion.current(), scope_key=scope_key))
+        latest = self._load_metadata(f"{scope_key}/latest.json")
+        if latest and latest["artifact_name"] == metadata["artifact_name"]:
+            self.storage.delete(f"{scope_key}/latest.json")
+
+    def read_bytes(self, metadata: dict[str, Any]) -> bytes:
+        """Read the stored snapshot bytes for an artifact."""
+        with self.storage.open(metadata["artifact_name"], "rb") as f:
+            return f.read()
+
+    def open(self, metadata: dict[str, Any]) -> File:
+        """Open the stored snapshot artifact for streaming."""
+        return self.storage.open(metadata["artifact_name"], "rb")
+
+    def manifest(self, metadata: dict[str, Any]) -> dict[str, Any]:
+        """
+        Chunk manifest of a stored snapshot artifact.
+
+        Built from the stored bytes on first use and kept next to the artifact;
+        rebuilt when SNAPSHOT_CHUNK_SIZE changes.
+        """
+        name = f"{metadata['artifact_name'].removesuffix('.db')}.manifest.json"
+        chunk_size = settings.SNAPSHOT_CHUNK_SIZE
+        manifest = self._load_metadata(name)
+        if manifest and manifest.get("chunk_size") == chunk_size and manifest.get("checksum") == metadata["checksum"]:
+            return manifest
+
+        manifest = {
+            "checksum": metadata["checksum"],
+            "size_bytes": metadata["size_bytes"],
+            "chunk_size": chunk_size,
+            "chunks": build_chunk_manifest(self.read_bytes(metadata), chunk_size),
+        }
+        self._save_metadata(name, manifest)
+        return manifest
+
+    def representation(self, metadata: dict[str, Any], encoding: str | None) -> dict[str, Any]:
+        """
+        Artifact name, checksum and size of the stored snapshot in a transport encoding.
+
+        Returns the uncompressed artifact for encoding None (or one that was not precompressed).
+        """
+        return metadata.get("encodings", {}).get(encoding) or metadata
+
+    def _current(self, bus_id: Any, scope: SnapshotScope) -> dict[str, Any] | None:
+        """Metadata of the artifact built for the current dataset version, if any."""
+        pointer_key = POINTER_CACHE_KEY.format(dataset_version=DatasetVersion.current(), scope_key=get_scope_key(bus_id, scope))
+        # Trusted without a storage round trip - a vanished file is handled at download time (discard)
+        return cache.get(pointer_key)
+
+    def _latest(self, bus_id: Any, scope: SnapshotScope) -> dict[str, Any] | None:
+        """Metadata of the last good build of the scope, if any."""
+        return self._load_metadata(f"{get_scope_key(bus_id, scope)}/latest.json")
+
+    def _build_inline(self, bus_id: Any, scope: SnapshotScope, latest: dict[str, Any] | None) -> dict[str, Any]:
+        """
+        Build the current artifact, one request per scope at a time.
+
+        Requests that lose the build lock serve the last good artifact, or
+        wait for the winner when the scope was never built. After
+        SNAPSHOT_BUILD_LOCK_TIMEOUT a waiting request builds on its own.
+        """
+        lock_key = BUILD_LOCK_CACHE_KEY.format(scope_key=get_scope_key(bus_id, scope))
+        lock_timeout = settings.SNAPSHOT_BUILD_LOCK_TIMEOUT
+        deadline = time.monotonic() + lock_timeout
+        while not cache.add(lock_key, True, timeout=lock_timeout):
+            if latest:
+                return latest
+            if time.monotonic() >= deadline:
+                logger.warning(f"Snapshot build lock {lock_key} still held after {lock_timeout}s - building without it")
+                return self.rebuild(bus_id, scope)
+            time.sleep(BUILD_LOCK_POLL_SECONDS)
+            metadata = self._current(bus_id, scope)
+            if metadata:
+                return metadata
+
+        try:
+            # Not forced - a build that finished before we took the lock is not repeated
+            return self.rebuild(bus_id, scope)
+        finally:
+            cache.delete(lock_key)
+
+    def _build(self, bus_id: Any, scope: SnapshotScope, dataset_version: int, reuse: bool = True) -> dict[str, Any]:
+        """Generate the snapshot and persist it, reusing an identical artifact unless reuse is off."""
+        centroids_name = f"{get_scope_key(bus_id, scope)}/centroids.npz"
+        generator = SnapshotGenerator(bus_id, scope=scope, previous_centroids=self._load_centroids(centroids_name))
+        snapshot_bytes, metadata = generator.generate()
+        if generator.centroids:
+            self._save_centroids(centroids_name, generator.centroids)
+
+        base_name = f"{get_scope_key(bus_id, scope)}/{metadata['content_hash']}"
+        stored = self._load_metadata(f"{base_name}.json")
+        if reuse and stored and self.storage.exists(stored["artifact_name"]):
+            # Content unchanged since the stored build - keep serving the same
+            # bytes (and dataset version) so synced kiosks stay up to date.
+            logger.info(f"Reusing snapshot artifact {stored['artifact_name']}")
+            changed = "dataset_version" not in stored
+            latest = self._load_metadata(f"{get_scope_key(bus_id, scope)}/latest.json")
+            if not latest or latest.get("content_hash") != stored["content_hash"]:
+                # Content went back to an earlier build (A -> B -> A) - kiosks
+                # still on the build in between must see a newer version
+                stored["dataset_version"] = dataset_version
+                changed = True
+            if "encodings" not in stored:
+                # Artifact stored before transport compression - compress it once now
+                stored["encodings"] = self._compress(base_name, self.read_bytes(stored))
+                changed = True
+            if changed:
+                self._save_metadata(f"{base_name}.json", stored)
+            return stored
+
+        # Fixed names - a forced rebuild overwrites the artifact instead of leaving renamed copies
+        artifact_name = f"{base_name}.db"
+        self._replace(artifact_name, snapshot_bytes)
+        metadata.update(
+            {
+                "bus_id": str(bus_id),
+                "dataset_version": dataset_version,
+                "artifact_name": artifact_name,
+                "checksum": calculate_checksum(snapshot_bytes),
+                "size_bytes": len(snapshot_bytes),
+                "encodings": self._compress(base_name, snapshot_bytes),
+            }
+        )
+        self._save_metadata(f"{base_name}.json", metadata)
+        logger.info(f"Stored snapshot artifact {artifact_name} ({len(snapshot_bytes)} bytes)")
+        return metadata
+
+    def _compress(self, base_name: str, snapshot_bytes: bytes) -> dict[str, dict[str, Any]]:
+        """Precompress the artifact once per configured transport encoding."""
+        encodings = {}
+        for encoding in settings.SNAPSHOT_COMPRESSION_ENCODINGS:
+            if encoding not in available_encodings():
+                continue
+            compressed = compress_snapshot(snapshot_bytes, encoding)
+            if len(compressed) >= len(snapshot_bytes):
+                continue  # Not worth serving
+            name = f"{base_name}.db{ENCODING_SUFFIXES[encoding]}"
+            self._replace(name, compressed)
+            encodings[encoding] = {
+                "artifact_name": name,
+                "checksum": calculate_checksum(compressed),
+                "size_bytes": len(compressed),
+            }
+        return encodings
+
+    def _prune(self, scope_key: str, keep: set[str], dataset_version: int) -> None:
+        """
+        Delete superseded artifacts of a scope.
+
+        Builds not in keep lose their bytes (.db, precompressed copies,
+        manifest); their metadata goes too once it falls out of the delta window.
+        """
+        try:
+            _, files = self.storage.listdir(scope_key)
+        except (FileNotFoundError, NotImplementedError):
+            return
+
+        floor = dataset_version - settings.SNAPSHOT_DELTA_MAX_VERSIONS
+        # <hash>.json only - not latest.json or <hash>.manifest.json
+        content_hashes = {name.removesuffix(".json") for name in files if name.endswith(".json") and name.count(".") == 1}
+        content_hashes.discard("latest")
+        for content_hash in content_hashes - keep:
+            for name in files:
+                if name.startswith(f"{content_hash}.") and name != f"{content_hash}.json":
+                    self._delete(f"{scope_key}/{name}")
+            stored = self._load_metadata(f"{scope_key}/{content_hash}.json")
+            if stored is None or int(stored.get("dataset_version", 0)) <= floor:
+                self._delete(f"{scope_key}/{content_hash}.json")
+
+    def _delete(self, name: str) -> None:
+        if self.storage.exists(name):
+            self.storage.delete(name)
+
+    def _load_metadata(self, name: str) -> dict[str, Any] | None:
+        if not self.storage.exists(name):
+            return None
+        try:
+            with self.storage.open(name, "rb") as f:
+                return json.loads(f.read().decode())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable snapshot metadata {name}: {e}")
+            return None
+
+    def _save_metadata(self, name: str, metadata: dict[str, Any]) -> None:
+        self._replace(name, json.dumps(metadata).encode())
+
+    def _replace(self, name: str, content: bytes) -> None:
+        """
+        Atomically overwrite a file under a fixed name.
+
+        Local storage writes a temp file and renames it over the target;
+        remote storages (e.g. GCS) replace an object atomically on upload.
+        Readers never see the file missing or half written.
+        """
+        try:
+            path = self.storage.path(name)
+        except NotImplementedError:
+            with self.storage.open(name, "wb") as f:
+                f.write(content)
+            return
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=".tmp-", delete=False) as tmp:
+            tmp.write(content)
+        try:
+            if getattr(self.storage, "file_permissions_mode", None) is not None:
+                os.chmod(tmp.name, self.storage.file_permissions_mode)
+            os.replace(tmp.name, path)
+        except OSError:
+            os.unlink(tmp.name)
+            raise
+
+    def _load_centroids(self, name: str) -> dict[str, np.ndarray]:
+        if not self.storage.exists(name):
+            return {}
+        try:
+            with self.storage.open(name, "rb") as f, np.load(io.BytesIO(f.read()), allow_pickle=False) as archive:
+                return {key: archive[key] for key in archive.files}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable snapshot centroids {name}: {e}")
+            return {}
+
+    def _save_centroids(self, name: str, centroids: dict[str, np.ndarray]) -> None:
+        buffer = io.BytesIO()
+        np.savez(buffer, **centroids)
+        self._replace(name, buffer.getvalue())
@@ -0,0 +1,79 @@
+"""
+Background kiosk snapshot builds.
+
+With SNAPSHOT_BACKGROUND_BUILD, data changes schedule one rebuild of every
+kiosk scope, debounced over SNAPSHOT_REBUILD_DEBOUNCE_SECONDS so a bulk upload
+triggers a single build. No kiosk request pays the build cost: until the task
+finishes, SnapshotArtifactStore keeps serving the last good artifact.
+"""
+
+import logging
+from typing import Any
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+REBUILD_SCHEDULED_CACHE_KEY = "kiosk_snapshot:rebuild_scheduled"
+
+
+def schedule_snapshot_rebuild() -> bool:
+    """
+    Queue a debounced snapshot rebuild unless one is already pending.
+
+    Returns True when a new rebuild was queued.
+    """
+    debounce = settings.SNAPSHOT_REBUILD_DEBOUNCE_SECONDS
+    # Flag outlives the countdown so a busy queue does not double-schedule,
+    # but still expires if the task is lost
+    if not cache.add(REBUILD_SCHEDULED_CACHE_KEY, True, timeout=debounce + settings.CELERY_TASK_TIME_LIMIT):
+        return False
+
+    try:
+        rebuild_kiosk_snapshots_task.apply_async(countdown=debounce)
+    except Exception as e:
+        # Broker unavailable - requests keep building inline on the next change
+        cache.delete(REBUILD_SCHEDULED_CACHE_KEY)
+        logger.error(f"Failed to queue snapshot rebuild: {e}")
+        return False
+    return True
+
+
+@shared_task  # type: ignore[misc]
+def rebuild_kiosk_snapshots_task(kiosk_ids: list[str] | None = None, force: bool = False) -> dict[str, Any]:
+    """
+    Build the current snapshot artifact of every kiosk scope.
+
+    Args:
+        kiosk_ids: Only the scopes of these kiosks (default: every active kiosk)
+        force: Rebuild even when the current artifact already exists
+    """
+    from .models import DatasetVersion, Kiosk, SnapshotChange
+    from .signals import dataset_version_changed
+    from .snapshot_store import SnapshotArtifactStore, get_kiosk_scopes
+
+    # Changes from here on schedule the next run
+    cache.delete(REBUILD_SCHEDULED_CACHE_KEY)
+
+    kiosks = Kiosk.objects.filter(kiosk_id__in=kiosk_ids, bus__isnull=False) if kiosk_ids is not None else None
+    store = SnapshotArtifactStore()
+    dataset_version = DatasetVersion.current()
+    built = failed = 0
+    for bus_id, scope in get_kiosk_scopes(kiosks):
+        try:
+            store.rebuild(bus_id, scope, force=force)
+            built += 1
+        except Exception as e:
+            # One broken scope must not block the rest - it keeps serving its last artifact
+            failed += 1
+            logger.error(f"Snapshot rebuild failed for bus {bus_id} scope {scope.key}: {e}")
+
+    pruned = SnapshotChange.prune(settings.SNAPSHOT_DELTA_MAX_VERSIONS)
+    logger.info(f"Rebuilt {built} snapshot scopes at dataset version {dataset_version} ({failed} failed, {pruned} journal rows pruned)")
+
+    # New artifacts are servable - tell connected kiosks
+    dataset_version_changed.send(sender=DatasetVersion, dataset_version=dataset_version)
+
+    return {"dataset_version": dataset_version, "built": built, "failed": failed, "pruned": pruned}
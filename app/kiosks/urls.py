@@ -9,6 +9,9 @@ from .views import (
     get_me,
     heartbeat,
     kiosk_log,
+    snapshot_chunk,
+    snapshot_delta,
+    snapshot_manifest,
     trigger_sos,
     update_location,
 )
@@ -33,6 +36,21 @@ urlpatterns = [
         download_snapshot,
         name="kiosk-snapshot",
     ),
+    path(
+        "kiosks/<str:kiosk_id>/snapshot/delta/",
+        snapshot_delta,
+        name="kiosk-snapshot-delta",
+    ),
+    path(
+        "kiosks/<str:kiosk_id>/snapshot/manifest/",
+        snapshot_manifest,
+        name="kiosk-snapshot-manifest",
+    ),
+    path(
+        "kiosks/<str:kiosk_id>/snapshot/chunks/<int:index>/",
+        snapshot_chunk,
+        name="kiosk-snapshot-chunk",
+    ),
     path(
         "kiosks/<str:kiosk_id>/heartbeat/",
         heartbeat,
@@ -1,13 +1,49 @@
 """Kiosk utility functions."""
 
+from .embedding_codec import (
+    EMBEDDING_DTYPES,
+    decode_embeddings,
+    encode_embedding_blobs,
+    encode_embeddings,
+)
+from .embedding_index import (
+    assign_clusters,
+    cluster_count,
+    train_centroids,
+)
+from .embedding_selection import select_embeddings
+from .http_range import (
+    etag_matches,
+    if_range_matches,
+    negotiate_encoding,
+    parse_range_header,
+)
 from .snapshot_utils import (
+    available_encodings,
+    build_chunk_manifest,
     calculate_checksum,
     calculate_content_hash,
     compress_snapshot,
+    decompress_snapshot,
 )
 
 __all__ = [
+    "EMBEDDING_DTYPES",
+    "decode_embeddings",
+    "encode_embedding_blobs",
+    "encode_embeddings",
+    "assign_clusters",
+    "cluster_count",
+    "train_centroids",
+    "select_embeddings",
+    "etag_matches",
+    "if_range_matches",
+    "negotiate_encoding",
+    "parse_range_header",
     "calculate_checksum",
     "calculate_content_hash",
+    "available_encodings",
+    "build_chunk_manifest",
     "compress_snapshot",
+    "decompress_snapshot",
 ]
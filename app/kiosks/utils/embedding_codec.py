@@ -0,0 +1,114 @@
+"""
+Embedding codec for kiosk snapshots.
+SINGLE RESPONSIBILITY: Encode float32 embedding vectors into compact
+snapshot precisions (and back) with NumPy over whole matrices.
+
+Formats (all little-endian):
+    float32 - 4 bytes/value, stored as-is
+    float16 - 2 bytes/value
+    int8    - 1 byte/value, per-vector scale: value = int8 * scale
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+EMBEDDING_DTYPE_FLOAT32 = "float32"
+EMBEDDING_DTYPE_FLOAT16 = "float16"
+EMBEDDING_DTYPE_INT8 = "int8"
+EMBEDDING_DTYPES = (EMBEDDING_DTYPE_FLOAT32, EMBEDDING_DTYPE_FLOAT16, EMBEDDING_DTYPE_INT8)
+
+EMBEDDING_ITEMSIZE = {
+    EMBEDDING_DTYPE_FLOAT32: 4,
+    EMBEDDING_DTYPE_FLOAT16: 2,
+    EMBEDDING_DTYPE_INT8: 1,
+}
+
+_NUMPY_DTYPES = {
+    EMBEDDING_DTYPE_FLOAT32: "<f4",
+    EMBEDDING_DTYPE_FLOAT16: "<f2",
+    EMBEDDING_DTYPE_INT8: "i1",
+}
+
+INT8_MAX = 127
+
+
+def encode_embeddings(matrix: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Encode a float32 embedding matrix into a snapshot precision.
+
+    Args:
+        matrix: (n, dims) float32 embeddings, one per row
+        dtype: One of EMBEDDING_DTYPES
+
+    Returns:
+        (encoded matrix, per-vector scales or None for float formats)
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype != EMBEDDING_DTYPE_INT8:
+        return matrix.astype(_NUMPY_DTYPES[dtype]), None
+
+    # Symmetric per-vector scale: largest magnitude maps to +/-127
+    scales = np.abs(matrix).max(axis=1) / INT8_MAX
+    scales[scales == 0] = 1.0
+    quantized = np.rint(matrix / scales[:, None]).clip(-INT8_MAX, INT8_MAX).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def decode_embeddings(encoded: np.ndarray, dtype: str, scales: np.ndarray | None = None) -> np.ndarray:
+    """
+    Decode a snapshot-precision embedding matrix back to float32.
+
+    Args:
+        encoded: (n, dims) matrix produced by encode_embeddings
+        dtype: Format of encoded
+        scales: Per-vector scales (int8 only)
+
+    Returns:
+        (n, dims) float32 matrix
+    """
+    matrix = np.asarray(encoded).astype(np.float32)
+    if dtype == EMBEDDING_DTYPE_INT8:
+        matrix *= np.asarray(scales, dtype=np.float32)[:, None]
+    return matrix
+
+
+def encode_embedding_blobs(blobs: list[bytes], dtype: str) -> tuple[list[bytes], list[float | None]]:
+    """
+    Encode float32 little-endian embedding BLOBs into a snapshot precision.
+
+    BLOBs are grouped by length so every group is encoded as one matrix
+    (models with different dimensions can share a snapshot).
+
+    Args:
+        blobs: float32 little-endian embedding bytes
+        dtype: One of EMBEDDING_DTYPES
+
+    Returns:
+        (encoded BLOBs, per-vector scales or None) in input order
+    """
+    if dtype == EMBEDDING_DTYPE_FLOAT32:
+        return list(blobs), [None] * len(blobs)
+
+    encoded_blobs: list[bytes] = [b""] * len(blobs)
+    scales: list[float | None] = [None] * len(blobs)
+
+    groups: dict[int, list[int]] = defaultdict(list)
+    for index, blob in enumerate(blobs):
+        groups[len(blob)].append(index)
+
+    for blob_length, indexes in groups.items():
+        dims = blob_length // 4
+        if dims == 0:
+            continue
+        matrix = np.frombuffer(b"".join(blobs[i] for i in indexes), dtype="<f4").reshape(len(indexes), dims)
+        encoded, group_scales = encode_embeddings(matrix, dtype)
+        for row, index in enumerate(indexes):
+            encoded_blobs[index] = encoded[row].tobytes()
+            if group_scales is not None:
+                scales[index] = float(group_scales[row])
+
+    return encoded_blobs, scales
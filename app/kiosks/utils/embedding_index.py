@@ -0,0 +1,118 @@
+"""
+Coarse ANN index for kiosk snapshots.
+SINGLE RESPONSIBILITY: Train IVF-style coarse quantizer centroids over
+embedding matrices (spherical k-means, NumPy) and assign vectors to them.
+
+Training is deterministic: k-means++ seeding uses a fixed seed over a
+canonically ordered matrix, and ties resolve to the lowest cluster id.
+Passing the previous centroids warm-starts training, so a build where only
+a few embeddings changed converges in a couple of iterations and keeps
+cluster ids stable.
+"""
+
+import math
+
+import numpy as np
+
+ASSIGN_CHUNK_SIZE = 8192
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def cluster_count(embedding_count: int, cluster_size: int, max_clusters: int) -> int:
+    """
+    Number of clusters for an embedding matrix.
+
+    Args:
+        embedding_count: Number of vectors to index
+        cluster_size: Target number of vectors per cluster
+        max_clusters: Upper bound on clusters
+
+    Returns:
+        Cluster count between 1 and max_clusters
+    """
+    return max(1, min(max_clusters, math.ceil(embedding_count / cluster_size)))
+
+
+def assign_clusters(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Nearest centroid (by cosine similarity) of every row.
+
+    Args:
+        matrix: (n, dims) vectors
+        centroids: (k, dims) unit-length centroids
+
+    Returns:
+        (n,) cluster ids
+    """
+    matrix = _normalize(matrix)
+    labels = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), ASSIGN_CHUNK_SIZE):
+        labels[start : start + ASSIGN_CHUNK_SIZE] = (matrix[start : start + ASSIGN_CHUNK_SIZE] @ centroids.T).argmax(axis=1)
+    return labels
+
+
+def _seed_centroids(matrix: np.ndarray, n_clusters: int, rng: np.random.Generator, initial: np.ndarray | None) -> np.ndarray:
+    """k-means++ seeding, extending any initial centroids up to n_clusters"""
+    centroids = [row for row in initial[:n_clusters]] if initial is not None and len(initial) else [matrix[rng.integers(len(matrix))]]
+
+    if len(centroids) < n_clusters:
+        distance = 1.0 - (matrix @ np.stack(centroids).T).max(axis=1)
+        while len(centroids) < n_clusters:
+            total = float(np.clip(distance, 0, None).sum())
+            if total <= 0:
+                index = int(rng.integers(len(matrix)))  # Every vector already has an exact centroid
+            else:
+                index = int(rng.choice(len(matrix), p=np.clip(distance, 0, None) / total))
+            centroids.append(matrix[index])
+            distance = np.minimum(distance, 1.0 - matrix @ matrix[index])
+
+    return np.stack(centroids).astype(np.float32)
+
+
+def train_centroids(
+    matrix: np.ndarray,
+    n_clusters: int,
+    seed: int = 0,
+    initial: np.ndarray | None = None,
+    max_iterations: int = 25,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Train spherical k-means centroids over an embedding matrix.
+
+    Args:
+        matrix: (n, dims) vectors in a canonical (deterministic) order
+        n_clusters: Number of centroids (capped at n)
+        seed: Seed for k-means++ seeding
+        initial: Previous centroids to warm-start from (same dims)
+        max_iterations: Upper bound on Lloyd iterations
+
+    Returns:
+        (centroids (k, dims) unit-length float32, labels (n,))
+    """
+    matrix = _normalize(matrix)
+    n_clusters = min(n_clusters, len(matrix))
+    if initial is not None and (initial.ndim != 2 or initial.shape[1] != matrix.shape[1]):
+        initial = None  # Model changed dimensions - start over
+
+    rng = np.random.default_rng(seed)
+    centroids = _seed_centroids(matrix, n_clusters, rng, None if initial is None else _normalize(initial))
+
+    labels = assign_clusters(matrix, centroids)
+    for _ in range(max_iterations):
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, matrix)
+        norms = np.linalg.norm(sums, axis=1)
+        # Empty clusters keep their previous centroid so ids stay stable
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+
+        new_labels = assign_clusters(matrix, centroids)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    return centroids, labels
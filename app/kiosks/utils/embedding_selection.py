@@ -0,0 +1,57 @@
+"""
+Embedding selection for kiosk snapshots.
+SINGLE RESPONSIBILITY: Pick the best, mutually diverse embeddings of one
+student and model (quality first, near-duplicates dropped) with NumPy.
+"""
+
+import numpy as np
+
+
+def select_embeddings(
+    matrix: np.ndarray,
+    quality_scores: np.ndarray | list[float],
+    max_count: int = 0,
+    min_quality: float = 0.0,
+    max_similarity: float = 1.0,
+) -> list[int]:
+    """
+    Greedy quality-ordered, diversity-constrained selection.
+
+    Embeddings are visited by descending quality_score (ties keep input
+    order); one is kept unless it is below min_quality or its cosine
+    similarity to an already kept embedding exceeds max_similarity. The best
+    embedding is always kept, even below the floor, so no student loses
+    coverage.
+
+    Args:
+        matrix: (n, dims) float32 embeddings of one student and model
+        quality_scores: (n,) quality score per embedding
+        max_count: Keep at most this many (0 = no limit)
+        min_quality: Quality floor
+        max_similarity: Cosine similarity above which an embedding is a near-duplicate
+            (1.0 disables deduplication)
+
+    Returns:
+        Row indexes of the kept embeddings, in input order
+    """
+    count = len(matrix)
+    if count == 0:
+        return []
+
+    quality = np.asarray(quality_scores, dtype=np.float64)
+    order = np.argsort(-quality, kind="stable")
+    limit = max_count if max_count > 0 else count
+
+    vectors = np.asarray(matrix, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors @ vectors.T  # Per student - a handful of rows
+
+    kept = [int(order[0])]
+    for index in order[1:]:
+        if len(kept) >= limit or quality[index] < min_quality:
+            break  # Remaining candidates are no better
+        if max_similarity < 1.0 and similarity[index, kept].max() > max_similarity:
+            continue
+        kept.append(int(index))
+
+    return sorted(kept)
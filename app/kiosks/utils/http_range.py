@@ -0,0 +1,119 @@
+"""
+HTTP conditional and range request helpers for snapshot downloads.
+SINGLE RESPONSIBILITY: Parse If-None-Match / If-Range / Range / Accept-Encoding headers.
+"""
+
+from django.utils.http import parse_etags
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison).
+
+    Args:
+        header: If-None-Match header value (or None)
+        etag: Quoted ETag of the current representation
+
+    Returns:
+        True when the client already holds this representation
+    """
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if etags == ["*"]:
+        return True
+    return any(candidate.removeprefix("W/") == etag for candidate in etags)
+
+
+def if_range_matches(header: str | None, etag: str) -> bool:
+    """
+    Check an If-Range header against an ETag (strong comparison).
+
+    Args:
+        header: If-Range header value (or None)
+        etag: Quoted strong ETag of the current representation
+
+    Returns:
+        True when the Range header may be honoured
+    """
+    return header is None or header.strip() == etag
+
+
+def parse_range_header(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range "bytes=" Range header.
+
+    Args:
+        header: Range header value (or None)
+        size: Size of the full representation in bytes
+
+    Returns:
+        Inclusive (start, end) byte positions, or None to serve the full body
+        (no header, unknown unit, malformed or multiple ranges)
+
+    Raises:
+        ValueError: Range is syntactically valid but not satisfiable
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes=") :].strip()
+    if "," in spec or "-" not in spec:
+        return None  # Multipart ranges are not worth it for a single file
+
+    first, last = (part.strip() for part in spec.split("-", 1))
+    if not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError("Unsatisfiable range")
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def negotiate_encoding(header: str | None, available: tuple[str, ...] | list[str]) -> str | None:
+    """
+    Pick a content encoding from an Accept-Encoding header.
+
+    Args:
+        header: Accept-Encoding header value (or None)
+        available: Encodings the server can serve, in preference order
+
+    Returns:
+        Highest-q acceptable encoding (server preference breaks ties),
+        or None to serve the identity representation
+    """
+    if not header:
+        return None
+
+    weights: dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token] = weight
+
+    best = None
+    best_weight = 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
@@ -6,6 +6,25 @@ SINGLE RESPONSIBILITY: Hash and compression operations.
 import gzip
 import hashlib
 
+try:
+    import zstandard
+except ImportError:  # Optional - zstd transport is only offered when installed
+    zstandard = None  # type: ignore[assignment]
+
+ENCODING_GZIP = "gzip"
+ENCODING_ZSTD = "zstd"
+ZSTD_LEVEL = 19  # Compressed once per artifact, decompressed on every kiosk - favour ratio
+
+
+def available_encodings() -> tuple[str, ...]:
+    """
+    Content encodings this server can produce, in preference order.
+
+    Returns:
+        Encoding tokens usable in Content-Encoding
+    """
+    return (ENCODING_ZSTD, ENCODING_GZIP) if zstandard is not None else (ENCODING_GZIP,)
+
 
 def calculate_checksum(data: bytes) -> str:
     """
@@ -20,17 +39,44 @@ def calculate_checksum(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
-def compress_snapshot(data: bytes) -> bytes:
+def build_chunk_manifest(data: bytes, chunk_size: int) -> list[dict]:
+    """
+    Split snapshot data into fixed-size chunks with their own checksums.
+
+    Args:
+        data: Snapshot bytes
+        chunk_size: Bytes per chunk (the last chunk may be shorter)
+
+    Returns:
+        One {"index", "offset", "size_bytes", "checksum"} entry per chunk
+    """
+    view = memoryview(data)  # Slice without copying
+    chunks = []
+    for index, offset in enumerate(range(0, len(data), chunk_size)):
+        chunk = view[offset : offset + chunk_size]
+        chunks.append({"index": index, "offset": offset, "size_bytes": len(chunk), "checksum": hashlib.sha256(chunk).hexdigest()})
+    return chunks
+
+
+def compress_snapshot(data: bytes, encoding: str = ENCODING_GZIP) -> bytes:
     """
-    Gzip compress snapshot data.
+    Compress snapshot data.
 
     Args:
         data: Uncompressed bytes
+        encoding: "gzip" (level 9) or "zstd" (requires zstandard)
 
     Returns:
-        Gzip compressed bytes
+        Compressed bytes
     """
-    return gzip.compress(data, compresslevel=9)
+    if encoding == ENCODING_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if encoding != ENCODING_GZIP:
+        raise ValueError(f"Unsupported snapshot encoding: {encoding}")
+    # mtime=0 keeps the output (and its checksum) deterministic
+    return gzip.compress(data, compresslevel=9, mtime=0)
 
 
 def calculate_content_hash(student_ids: list[str], embedding_ids: list[int]) -> str:
@@ -49,14 +95,21 @@ def calculate_content_hash(student_ids: list[str], embedding_ids: list[int]) ->
     return full_hash[:16]
 
 
-def decompress_snapshot(data: bytes) -> bytes:
+def decompress_snapshot(data: bytes, encoding: str = ENCODING_GZIP) -> bytes:
     """
-    Gzip decompress snapshot data.
+    Decompress snapshot data.
 
     Args:
         data: Compressed bytes
+        encoding: "gzip" or "zstd" (requires zstandard)
 
     Returns:
         Decompressed bytes
     """
+    if encoding == ENCODING_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd decompression requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if encoding != ENCODING_GZIP:
+        raise ValueError(f"Unsupported snapshot encoding: {encoding}")
     return gzip.decompress(data)
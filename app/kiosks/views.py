@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from datetime import timedelta
-import hashlib
 from typing import Any, cast
 
+from django.conf import settings
 from django.db.models import Count
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
@@ -23,8 +25,9 @@ from rest_framework.response import Response
 
 from bus_kiosk_backend.core.authentication import FirebaseAuthentication
 
-from .models import DeviceLog, Kiosk, KioskStatus, SOSAlert
+from .models import DatasetVersion, DeviceLog, Kiosk, KioskStatus, SOSAlert
 from .permissions import IsKiosk
+from .rollout import acquire_download_slot, get_eligible_after, release_download_slot
 from .serializers import (
     BusLocationSerializer,
     CheckUpdatesResponseSerializer,
@@ -32,15 +35,18 @@ from .serializers import (
     DeviceLogSerializer,
     HeartbeatSerializer,
     KioskSerializer,
+    SnapshotChunkQuerySerializer,
+    SnapshotDeltaQuerySerializer,
+    SnapshotDeltaSerializer,
+    SnapshotManifestSerializer,
     SOSAlertCreateSerializer,
     SOSAlertSerializer,
 )
-from .services import SnapshotGenerator
+from .services import SnapshotDeltaGenerator, SnapshotScope
+from .snapshot_store import SnapshotArtifactStore
+from .utils.http_range import etag_matches, if_range_matches, negotiate_encoding, parse_range_header
 
-
-def calculate_checksum(data: bytes) -> str:
-    """Calculate SHA-256 checksum of data."""
-    return hashlib.sha256(data).hexdigest()
+SNAPSHOT_STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class KioskViewSet(viewsets.ModelViewSet):
@@ -179,7 +185,8 @@ def check_updates(request: Request, kiosk_id: str) -> Response:
     """
     Check if kiosk database needs updating.
 
-    Compares kiosk's last_sync timestamp with bus's last_student_update.
+    Compares the dataset version the kiosk last synced (or, for older
+    kiosks, its content hash) with the current snapshot artifact.
     Returns metadata about current database version.
     """
     # Verify authenticated kiosk matches requested kiosk_id
@@ -204,20 +211,19 @@ def check_updates(request: Request, kiosk_id: str) -> Response:
     serializer.is_valid(raise_exception=True)
 
     last_sync_hash = serializer.validated_data.get("last_sync_hash", "")
+    last_sync_version = serializer.validated_data.get("last_sync_version")
     bus = kiosk.bus
 
-    # Check if update needed
-    # (A more robust method than using timestamps)
-
-    # Generate metadata to check the latest version on the server
-    # This is efficient as it doesn't generate the full snapshot file yet
-    # Use the local bus variable (avoid unused variable warnings)
-    generator = SnapshotGenerator(bus.bus_id)
-    _, metadata = generator.generate()  # We only need metadata here
+    # Metadata comes from the stored snapshot artifact, looked up by the
+    # current dataset version - the snapshot is only rebuilt when
+    # student/embedding data changed since the last build
+    metadata = SnapshotArtifactStore().get_or_build(bus.bus_id, SnapshotScope.for_kiosk(kiosk))
 
-    # Check if update needed by comparing content hashes
-    # (A more robust method than using timestamps)
-    needs_update = metadata.get("content_hash") != last_sync_hash
+    if last_sync_version is not None:
+        needs_update = last_sync_version < metadata["dataset_version"]
+    else:
+        # Legacy kiosks: compare content hashes
+        needs_update = metadata.get("content_hash") != last_sync_hash
 
     response_data = {
         "needs_update": needs_update,
@@ -225,27 +231,71 @@ def check_updates(request: Request, kiosk_id: str) -> Response:
         "student_count": metadata["student_count"],
         "embedding_count": metadata["embedding_count"],
         "content_hash": metadata["content_hash"],
+        "dataset_version": metadata["dataset_version"],
+        # Staggered rollout - download no earlier than this
+        "eligible_after": get_eligible_after(kiosk, metadata) if needs_update else None,
     }
 
     return Response(response_data)
 
 
+def _downloads_busy_response() -> Response:
+    """503 for kiosks over the concurrent download cap."""
+    return Response(
+        {"detail": "Too many kiosks downloading - retry later"},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(settings.SNAPSHOT_ROLLOUT_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _snapshot_missing_response(store: SnapshotArtifactStore, metadata: dict[str, Any], kiosk_id: str) -> Response:
+    """503 when the served artifact's file is gone - dropped from the store so the next request rebuilds it."""
+    store.discard(metadata)
+    release_download_slot(kiosk_id)
+    return Response(
+        {"detail": "Snapshot is being rebuilt - retry later"},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(settings.SNAPSHOT_ROLLOUT_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _iter_file_range(file: Any, start: int, length: int) -> Iterator[bytes]:
+    """Yield length bytes of file from start, closing it when done."""
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(SNAPSHOT_STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
 @extend_schema(
     responses={
         (200, "application/octet-stream"): OpenApiTypes.BINARY,
+        (206, "application/octet-stream"): OpenApiTypes.BINARY,
+        304: None,
+        416: None,
+        503: None,
     },
     operation_id="kiosk_download_snapshot",
-    description="Download kiosk database snapshot (binary SQLite file). Returns raw binary data with x-snapshot-checksum header for verification.",
+    description="Download kiosk database snapshot (binary SQLite file). Returns raw binary data with x-snapshot-checksum header for verification and x-dataset-version header with the snapshot dataset version. "
+    "The ETag is the snapshot checksum: send If-None-Match to get 304 when unchanged, and Range (with If-Range) to resume an interrupted download (206). "
+    "Send Accept-Encoding (zstd, gzip) for a precompressed body; x-snapshot-compressed-checksum then covers the compressed bytes.",
 )
 @api_view(["GET"])
 @authentication_classes([FirebaseAuthentication])
 @permission_classes([IsKiosk])
-def download_snapshot(request: Request, kiosk_id: str) -> Response | HttpResponse:
+def download_snapshot(request: Request, kiosk_id: str) -> Response | HttpResponse | StreamingHttpResponse:
     """
-    Generates and serves a SQLite database snapshot for the specified kiosk.
+    Serves the stored SQLite database snapshot for the specified kiosk.
 
     This endpoint is protected and ensures the kiosk can only download data
-    for its assigned bus route.
+    for its assigned bus route. The artifact is streamed from the store;
+    conditional (If-None-Match) and single-range requests are supported.
     """
     try:
         kiosk = Kiosk.objects.select_related("bus").get(kiosk_id=kiosk_id)
@@ -266,16 +316,68 @@ def download_snapshot(request: Request, kiosk_id: str) -> Response | HttpRespons
         )
 
     try:
-        # 1. Generate the snapshot database in memory.
-        generator = SnapshotGenerator(kiosk.bus.bus_id)
-        snapshot_bytes, metadata = generator.generate()
-
-        # 2. Create a direct file response.
-        # Use application/x-sqlite3 for SQLite database files
-        # This is more specific than application/octet-stream and helps clients identify the file type
-        response = HttpResponse(snapshot_bytes, content_type="application/x-sqlite3")
-        response["Content-Disposition"] = f'attachment; filename="snapshot_{metadata["sync_timestamp"]}.db"'
-        response["x-snapshot-checksum"] = calculate_checksum(snapshot_bytes)
+        # 1. Load the snapshot artifact metadata (built only if data changed).
+        store = SnapshotArtifactStore()
+        metadata = store.get_or_build(kiosk.bus.bus_id, SnapshotScope.for_kiosk(kiosk))
+
+        # Pick a precompressed representation per Accept-Encoding (identity if none fits)
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"), list(metadata.get("encodings", {})))
+        representation = store.representation(metadata, encoding)
+        # Checksum was computed when the representation was stored - strong validator
+        etag = quote_etag(representation["checksum"])
+        size = representation["size_bytes"]
+
+        # 2. Unchanged kiosks get an empty 304.
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            byte_range = None
+            if if_range_matches(request.headers.get("If-Range"), etag):
+                try:
+                    byte_range = parse_range_header(request.headers.get("Range"), size)
+                except ValueError:
+                    response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                    response["Content-Range"] = f"bytes */{size}"
+                    response["Vary"] = "Accept-Encoding"
+                    return response
+
+            # 3. Cap concurrent downloads across the fleet.
+            if not acquire_download_slot(kiosk.kiosk_id, metadata["dataset_version"]):
+                return _downloads_busy_response()
+
+            # 4. Stream the stored file - full body or the requested range.
+            try:
+                file = store.open(representation)
+            except FileNotFoundError:
+                return _snapshot_missing_response(store, metadata, kiosk.kiosk_id)
+
+            # Use application/x-sqlite3 for SQLite database files
+            # This is more specific than application/octet-stream and helps clients identify the file type
+            if byte_range is None:
+                response = FileResponse(file, content_type="application/x-sqlite3")
+            else:
+                start, end = byte_range
+                response = StreamingHttpResponse(
+                    _iter_file_range(file, start, end - start + 1),
+                    status=status.HTTP_206_PARTIAL_CONTENT,
+                    content_type="application/x-sqlite3",
+                )
+                response["Content-Range"] = f"bytes {start}-{end}/{size}"
+                response["Content-Length"] = str(end - start + 1)
+            response["Content-Disposition"] = f'attachment; filename="snapshot_{metadata["sync_timestamp"]}.db"'
+            response["Accept-Ranges"] = "bytes"
+
+        if encoding:
+            # Ranges and ETag refer to the compressed bytes
+            response["Content-Encoding"] = encoding
+            response["x-snapshot-compressed-checksum"] = representation["checksum"]
+        response["ETag"] = etag
+        response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = "private, no-cache"
+        # Checksum and size of the SQLite file itself (after decompression)
+        response["x-snapshot-checksum"] = metadata["checksum"]
+        response["x-snapshot-size"] = str(metadata["size_bytes"])
+        response["x-dataset-version"] = str(metadata["dataset_version"])
 
         return response
 
@@ -287,6 +389,186 @@ def download_snapshot(request: Request, kiosk_id: str) -> Response | HttpRespons
         )
 
 
+@extend_schema(
+    responses={200: SnapshotManifestSerializer, 503: None},
+    operation_id="kiosk_snapshot_manifest",
+    description="Chunk manifest of the current snapshot: fixed-size chunks with their own SHA-256, for parallel, resumable download. "
+    "Kiosks re-fetch only chunks whose checksum differs from their previous snapshot.",
+)
+@api_view(["GET"])
+@authentication_classes([FirebaseAuthentication])
+@permission_classes([IsKiosk])
+def snapshot_manifest(request: Request, kiosk_id: str) -> Response:
+    """
+    List the chunks of the kiosk's current snapshot artifact.
+    """
+    kiosk = cast(Kiosk, request.user)
+    if kiosk.kiosk_id != kiosk_id:
+        return Response(
+            {"detail": "Not authorized for this kiosk"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    if not kiosk.bus:
+        return Response(
+            {"detail": "Kiosk not assigned to a bus"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    store = SnapshotArtifactStore()
+    metadata = store.get_or_build(kiosk.bus.bus_id, SnapshotScope.for_kiosk(kiosk))
+    try:
+        manifest = store.manifest(metadata)
+    except FileNotFoundError:
+        return _snapshot_missing_response(store, metadata, kiosk.kiosk_id)
+
+    return Response(
+        {
+            "dataset_version": metadata["dataset_version"],
+            "sync_timestamp": metadata["sync_timestamp"],
+            "content_hash": metadata["content_hash"],
+            **manifest,
+        }
+    )
+
+
+@extend_schema(
+    parameters=[SnapshotChunkQuerySerializer],
+    responses={
+        (200, "application/octet-stream"): OpenApiTypes.BINARY,
+        304: None,
+        404: None,
+        409: None,
+        503: None,
+    },
+    operation_id="kiosk_snapshot_chunk",
+    description="One chunk of the current snapshot by manifest index. Pass the manifest checksum to get 409 if the snapshot changed in the meantime. "
+    "The ETag (and x-chunk-checksum) is the chunk SHA-256.",
+)
+@api_view(["GET"])
+@authentication_classes([FirebaseAuthentication])
+@permission_classes([IsKiosk])
+def snapshot_chunk(request: Request, kiosk_id: str, index: int) -> Response | HttpResponse | StreamingHttpResponse:
+    """
+    Stream one chunk of the kiosk's current snapshot artifact.
+    """
+    kiosk = cast(Kiosk, request.user)
+    if kiosk.kiosk_id != kiosk_id:
+        return Response(
+            {"detail": "Not authorized for this kiosk"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    if not kiosk.bus:
+        return Response(
+            {"detail": "Kiosk not assigned to a bus"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    serializer = SnapshotChunkQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+
+    store = SnapshotArtifactStore()
+    metadata = store.get_or_build(kiosk.bus.bus_id, SnapshotScope.for_kiosk(kiosk))
+
+    pinned_checksum = serializer.validated_data.get("checksum")
+    if pinned_checksum and pinned_checksum != metadata["checksum"]:
+        # Mixing chunks of two snapshots would corrupt the database
+        return Response(
+            {"detail": "Snapshot changed - fetch a new manifest", "checksum": metadata["checksum"]},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    try:
+        chunks = store.manifest(metadata)["chunks"]
+    except FileNotFoundError:
+        return _snapshot_missing_response(store, metadata, kiosk.kiosk_id)
+    if index >= len(chunks):
+        return Response({"detail": "Chunk not found"}, status=status.HTTP_404_NOT_FOUND)
+    chunk = chunks[index]
+
+    etag = quote_etag(chunk["checksum"])
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        if not acquire_download_slot(kiosk.kiosk_id, metadata["dataset_version"]):
+            return _downloads_busy_response()
+        try:
+            file = store.open(metadata)
+        except FileNotFoundError:
+            return _snapshot_missing_response(store, metadata, kiosk.kiosk_id)
+        response = StreamingHttpResponse(
+            _iter_file_range(file, chunk["offset"], chunk["size_bytes"]),
+            content_type="application/octet-stream",
+        )
+        response["Content-Length"] = str(chunk["size_bytes"])
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    response["x-chunk-checksum"] = chunk["checksum"]
+    response["x-snapshot-checksum"] = metadata["checksum"]
+    response["x-dataset-version"] = str(metadata["dataset_version"])
+    return response
+
+
+@extend_schema(
+    parameters=[SnapshotDeltaQuerySerializer],
+    responses={200: SnapshotDeltaSerializer},
+    operation_id="kiosk_snapshot_delta",
+    description="Row-level changes since the kiosk's snapshot version. Falls back to full_snapshot_required when the base version is too old or the snapshot carries an ANN index.",
+)
+@api_view(["GET"])
+@authentication_classes([FirebaseAuthentication])
+@permission_classes([IsKiosk])
+def snapshot_delta(request: Request, kiosk_id: str) -> Response:
+    """
+    Return the students and face embeddings changed since a snapshot version.
+
+    Kiosks send the dataset version (or, for older kiosks, the content hash)
+    of their local database and apply the returned patch instead of
+    downloading the full snapshot.
+    """
+    kiosk = cast(Kiosk, request.user)
+    if kiosk.kiosk_id != kiosk_id:
+        return Response(
+            {"detail": "Not authorized for this kiosk"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    if not kiosk.bus:
+        return Response(
+            {"detail": "Kiosk not assigned to a bus"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    serializer = SnapshotDeltaQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+
+    scope = SnapshotScope.for_kiosk(kiosk)
+    store = SnapshotArtifactStore()
+    base_version = serializer.validated_data.get("since_version")
+    if base_version is None:
+        base_version = store.find_dataset_version(kiosk.bus.bus_id, serializer.validated_data["since_hash"], scope)
+
+    if base_version is None:
+        # Unknown content hash - nothing to diff against
+        target_version = DatasetVersion.current()
+        return Response(
+            {
+                "base_version": 0,
+                "target_version": target_version,
+                "full_snapshot_required": True,
+                "students": [],
+                "face_embeddings": [],
+                "wrong_bus_hints": [],
+                "deleted_student_ids": [],
+            }
+        )
+
+    ann_indexed = store.has_ann_index(kiosk.bus.bus_id, scope)
+    return Response(SnapshotDeltaGenerator(kiosk.bus.bus_id, base_version, scope, ann_indexed=ann_indexed).generate())
+
+
 @extend_schema(
     request=HeartbeatSerializer,
     responses={204: None},
@@ -337,6 +619,10 @@ def heartbeat(request: Request, kiosk_id: str) -> Response:
         if kiosk.status.is_offline:
             kiosk_status = "critical"
 
+    # A kiosk reporting the version it was served is done downloading
+    if data.get("dataset_version") is not None:
+        release_download_slot(kiosk.kiosk_id, data["dataset_version"])
+
     # Update or create KioskStatus
     KioskStatus.objects.update_or_create(
         kiosk=kiosk,
@@ -344,6 +630,7 @@ def heartbeat(request: Request, kiosk_id: str) -> Response:
             "last_heartbeat": data["timestamp"],
             "database_version": data["database_version"],
             "database_hash": data.get("database_hash", ""),
+            "dataset_version": data.get("dataset_version"),
             "student_count": data["student_count"],
             "embedding_count": data["embedding_count"],
             "battery_level": battery_level,
@@ -99,8 +99,11 @@ class DashboardConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def is_authenticated(self):
         """Check if user is authenticated and is school admin."""
+        from users.models import User
+
         user = self.scope.get("user")
-        if not user or not user.is_authenticated:
+        # Kiosk tokens authenticate as a Kiosk, which has no groups
+        if not isinstance(user, User) or not user.is_authenticated:
             return False
         # Only school admins can access dashboard
         return user.groups.filter(name="School Administrator").exists()
@@ -116,6 +119,9 @@ class BusTrackingConsumer(AsyncWebsocketConsumer):
     - Future: Driver app, fleet management
 
     Channel: "bus_updates" - receives GPS location changes
+
+    Users only: kiosks report their own location over HTTP and have no
+    business watching the fleet, so kiosk tokens are rejected.
     """
 
     async def connect(self):
@@ -196,9 +202,11 @@ class BusTrackingConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def is_authenticated(self):
-        """Check if user is authenticated."""
+        """Check if user is an authenticated User (not a kiosk)."""
+        from users.models import User
+
         user = self.scope.get("user")
-        if not user:
+        if not isinstance(user, User):
             return False
         return user.is_authenticated
 
@@ -250,3 +258,134 @@ class BusTrackingConsumer(AsyncWebsocketConsumer):
 
         # Send as an array of location updates (same format as real-time)
         await self.send(text_data=json.dumps({"type": "initial_locations", "locations": locations}))
+
+
+KIOSK_FLEET_GROUP = "kiosk_updates"
+
+
+def kiosk_group_name(kiosk_id):
+    """Channel group of a single kiosk."""
+    return f"kiosk_{kiosk_id}"
+
+
+class KioskConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer for kiosk snapshot invalidation and config pushes.
+
+    Used by: Kiosk devices (Firebase kiosk token, ?token=JWT)
+    Channels:
+    - "kiosk_updates" - fleet-wide, receives new dataset versions
+    - "kiosk_<kiosk_id>" - per kiosk, receives config and schedule changes
+
+    Kiosks react to a push by calling check_updates (which still applies the
+    staggered rollout), so polling check_updates is only a slow fallback.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection."""
+        kiosk = await self.get_kiosk()
+        if kiosk is None:
+            await self.close(code=4001)
+            return
+
+        self.group_names = [KIOSK_FLEET_GROUP, kiosk_group_name(kiosk.kiosk_id)]
+        for group_name in self.group_names:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+
+        await self.accept()
+
+        # Kiosk may have missed pushes while disconnected
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "dataset_version",
+                    "data": {"dataset_version": await self.get_dataset_version()},
+                }
+            )
+        )
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        for group_name in getattr(self, "group_names", []):
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+
+    async def receive(self, text_data):
+        """Handle messages from WebSocket client (not used - server push only)."""
+        pass
+
+    async def dataset_version_changed(self, event):
+        """
+        Receive new dataset version from channel layer and push to kiosk.
+
+        Event format:
+        {
+            'type': 'dataset_version_changed',
+            'dataset_version': int,
+        }
+        """
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "dataset_version",
+                    "data": {"dataset_version": event["dataset_version"]},
+                }
+            )
+        )
+
+    async def kiosk_config_changed(self, event):
+        """
+        Receive kiosk config change (bus, snapshot settings, activation).
+
+        Event format:
+        {
+            'type': 'kiosk_config_changed',
+            'kiosk_id': str,
+            'updated_at': str (ISO format),
+        }
+        """
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "config_changed",
+                    "data": {"kiosk_id": event["kiosk_id"], "updated_at": event["updated_at"]},
+                }
+            )
+        )
+
+    async def kiosk_schedule_changed(self, event):
+        """
+        Receive operation timing change for this kiosk.
+
+        Event format:
+        {
+            'type': 'kiosk_schedule_changed',
+            'kiosk_id': str,
+            'operation_timing_id': int or None,
+        }
+        """
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "schedule_changed",
+                    "data": {
+                        "kiosk_id": event["kiosk_id"],
+                        "operation_timing_id": event["operation_timing_id"],
+                    },
+                }
+            )
+        )
+
+    @database_sync_to_async
+    def get_kiosk(self):
+        """Authenticated kiosk, or None for any other user."""
+        from kiosks.models import Kiosk
+
+        user = self.scope.get("user")
+        return user if isinstance(user, Kiosk) else None
+
+    @database_sync_to_async
+    def get_dataset_version(self):
+        """Current kiosk dataset version."""
+        from kiosks.models import DatasetVersion
+
+        return DatasetVersion.current()
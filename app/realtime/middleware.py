@@ -14,7 +14,7 @@ class JWTAuthMiddleware(BaseMiddleware):
     JWT authentication middleware for WebSocket connections.
 
     Extracts JWT token from query parameter and authenticates user.
-    Used for: Dashboard WebSocket (?token=JWT)
+    Used for: Dashboard WebSocket (?token=JWT), Kiosk WebSocket (?token=kiosk JWT)
 
     Pattern: Fortune 500 standard - token in query string for WebSocket
     """
@@ -53,6 +53,7 @@ class JWTAuthMiddleware(BaseMiddleware):
 
         Returns:
             User object if token is valid and user exists
+            Kiosk object for a registered kiosk token
             AnonymousUser if token is invalid/expired or user not found
         """
         from django.contrib.auth.models import AnonymousUser
@@ -65,6 +66,13 @@ class JWTAuthMiddleware(BaseMiddleware):
             firebase_uid = decoded_token["uid"]
             email = decoded_token.get("email")
 
+            # Kiosk token (custom claims) - same pre-registration rule as FirebaseAuthentication
+            if decoded_token.get("type") == "kiosk" and decoded_token.get("kiosk_id"):
+                from kiosks.models import Kiosk
+
+                kiosk = Kiosk.objects.filter(firebase_uid=firebase_uid).first()
+                return kiosk if kiosk is not None else AnonymousUser()
+
             # Get or create user by Firebase UID
             user, _created = User.objects.get_or_create(
                 username=firebase_uid,
@@ -7,4 +7,5 @@ from realtime import consumers
 websocket_urlpatterns = [
     re_path(r"ws/dashboard/$", consumers.DashboardConsumer.as_asgi()),
     re_path(r"ws/bus-tracking/$", consumers.BusTrackingConsumer.as_asgi()),
+    re_path(r"ws/kiosk/$", consumers.KioskConsumer.as_asgi()),
 ]
@@ -3,12 +3,28 @@
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.core.cache import cache
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
 from events.models import BoardingEvent
-from kiosks.models import BusLocation
+from kiosks.models import BusLocation, Kiosk
+from kiosks.models_operation_timing import OperationSlot, OperationTiming
+from kiosks.signals import dataset_version_changed
+from realtime.consumers import KIOSK_FLEET_GROUP, kiosk_group_name
+
+# Kiosk fields a connected kiosk must re-fetch config for
+KIOSK_PUSH_FIELDS = {
+    "bus",
+    "is_active",
+    "operation_timing",
+    "schedule",
+    "snapshot_scope",
+    "snapshot_max_embeddings",
+    "snapshot_max_bytes",
+    "snapshot_embedding_dtype",
+}
 
 
 @receiver(post_save, sender=BoardingEvent)
@@ -150,3 +166,88 @@ def publish_bus_location_update(sender, instance, created, **kwargs):
     except Exception as e:
         # Channel layer not available - this is OK for local development
         print(f"[WARN] Failed to publish bus location to WebSocket: {e}")
+
+
+def _send_to_kiosk_group(group, event_data):
+    """Best-effort group_send of event_data to a kiosk channel group."""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return  # Channel layer not configured
+
+    try:
+        async_to_sync(channel_layer.group_send)(group, event_data)
+    except Exception as e:
+        # Kiosks fall back to polling check_updates
+        print(f"[WARN] Failed to publish {event_data['type']} to kiosk WebSocket: {e}")
+
+
+@receiver(dataset_version_changed)
+def publish_dataset_version_changed(sender, dataset_version, **kwargs):
+    """
+    Tell every connected kiosk that a new dataset version is available.
+
+    Triggered by: kiosks.signals.dataset_version_changed (after commit)
+    Publishes to: 'kiosk_updates' channel
+    Consumed by: KioskConsumer (kiosk calls check_updates, which staggers the download)
+    """
+    _send_to_kiosk_group(
+        KIOSK_FLEET_GROUP,
+        {
+            "type": "dataset_version_changed",
+            "dataset_version": dataset_version,
+        },
+    )
+
+
+@receiver(post_save, sender=Kiosk)
+def publish_kiosk_config_changed(sender, instance, created, **kwargs):
+    """
+    Push config changes (bus, snapshot settings, schedule assignment) to the kiosk.
+
+    Triggered by: Kiosk saved (not heartbeat-only updates)
+    Publishes to: 'kiosk_<kiosk_id>' channel
+    """
+    if created or kwargs.get("raw"):
+        return  # New kiosks are not connected yet
+
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not KIOSK_PUSH_FIELDS.intersection(update_fields):
+        return  # Heartbeat / telemetry update
+
+    event_data = {
+        "type": "kiosk_config_changed",
+        "kiosk_id": instance.kiosk_id,
+        "updated_at": instance.updated_at.isoformat(),
+    }
+    # Kiosk re-fetches its config - only push what it can see
+    transaction.on_commit(lambda: _send_to_kiosk_group(kiosk_group_name(instance.kiosk_id), event_data))
+
+
+@receiver([post_save, pre_delete], sender=OperationTiming)
+@receiver([post_save, post_delete], sender=OperationSlot)
+def publish_kiosk_schedule_changed(sender, instance, **kwargs):
+    """
+    Push operation timing changes to every kiosk using the schedule.
+
+    Triggered by: OperationTiming or OperationSlot saved/deleted
+    (pre_delete for timings - deleting one un-assigns its kiosks)
+    Publishes to: 'kiosk_<kiosk_id>' channel of each affected kiosk
+    """
+    if kwargs.get("raw"):
+        return
+
+    timing_id = instance.timing_id if sender is OperationSlot else instance.pk
+    kiosk_ids = list(Kiosk.objects.filter(operation_timing_id=timing_id).values_list("kiosk_id", flat=True))
+
+    def publish():
+        for kiosk_id in kiosk_ids:
+            _send_to_kiosk_group(
+                kiosk_group_name(kiosk_id),
+                {
+                    "type": "kiosk_schedule_changed",
+                    "kiosk_id": kiosk_id,
+                    "operation_timing_id": timing_id,
+                },
+            )
+
+    transaction.on_commit(publish)
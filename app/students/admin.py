@@ -475,12 +475,22 @@ class StudentPhotoAdmin(admin.ModelAdmin):
         "photo_thumbnail",
         "is_primary",
         "captured_at",
+        "embedding_status",
         "embedding_count",
     ]
-    list_filter = ["is_primary", "captured_at"]
+    list_filter = ["is_primary", "embedding_status", "captured_at"]
     search_fields = ["student__name"]
-    readonly_fields = ["photo_id", "created_at", "photo_preview"]
+    readonly_fields = [
+        "photo_id",
+        "created_at",
+        "photo_preview",
+        "embedding_status",
+        "embedding_attempts",
+        "embedding_error",
+        "embedding_updated_at",
+    ]
     inlines = [FaceEmbeddingInline]
+    actions = ["retry_embeddings"]
     fields = [
         "student",
         "photo",
@@ -489,6 +499,10 @@ class StudentPhotoAdmin(admin.ModelAdmin):
         "captured_at",
         "photo_id",
         "created_at",
+        "embedding_status",
+        "embedding_attempts",
+        "embedding_error",
+        "embedding_updated_at",
     ]
 
     @display(description="Thumbnail")
@@ -510,6 +524,19 @@ class StudentPhotoAdmin(admin.ModelAdmin):
             return format_html('<span style="color: green;">✓ {}</span>', count)
         return format_html('<span style="color: red;">✗ 0</span>')
 
+    @admin.action(description="Retry embedding generation for failed photos")
+    def retry_embeddings(self, request, queryset):
+        """Queue selected failed photos for embedding again"""
+        from .services.embedding_worker import retry_failed_photo_embeddings, schedule_photo_embeddings
+
+        photo_ids = list(queryset.filter(embedding_status="failed").values_list("photo_id", flat=True))
+        retried = retry_failed_photo_embeddings(photo_ids)
+        if retried:
+            transaction.on_commit(schedule_photo_embeddings)
+            messages.success(request, f"✓ Queued {retried} photo(s) for embedding")
+        else:
+            messages.warning(request, "No failed photos selected")
+
 
 class ParentStudentsInline(admin.TabularInline):
     """Read-only inline to show students linked to this parent"""
@@ -665,11 +692,12 @@ class FaceEmbeddingMetadataAdmin(admin.ModelAdmin):
         "model_name",
         "quality_score",
         "is_primary",
-        "embedding",
+        "embedding_dimensions",
+        "embedding_dtype",
     ]
     list_filter = ["model_name", "is_primary"]
-    search_fields = ["student_photo__student__name", "embedding"]
-    readonly_fields = ["embedding_id", "embedding", "created_at"]
+    search_fields = ["student_photo__student__name"]
+    readonly_fields = ["embedding_id", "embedding", "embedding_dimensions", "embedding_dtype", "created_at"]
 
     @display(description="Student")
     def get_student(self, obj):
@@ -29,6 +29,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
 from buses.models import Bus, BusStop
+from kiosks.signals import batch_dataset_changes
 from students.models import School, Student, StudentPhoto
 
 
@@ -81,13 +82,15 @@ class Command(BaseCommand):
 
                 self.stdout.write(self.style.NOTICE("[PROCESSING] students...\n"))
 
-                for row in reader:
-                    try:
-                        self._process_student_row(row, school, zip_file, stats, dry_run)
-                    except Exception as e:
-                        error_msg = f"Row {row.get('Sr.No', '?')}: {e!s}"
-                        stats["errors"].append(error_msg)
-                        self.stdout.write(self.style.ERROR(f"[X] {error_msg}"))
+                # One kiosk dataset version bump for the whole upload, not one per row
+                with batch_dataset_changes():
+                    for row in reader:
+                        try:
+                            self._process_student_row(row, school, zip_file, stats, dry_run)
+                        except Exception as e:
+                            error_msg = f"Row {row.get('Sr.No', '?')}: {e!s}"
+                            stats["errors"].append(error_msg)
+                            self.stdout.write(self.style.ERROR(f"[X] {error_msg}"))
 
         except zipfile.BadZipFile as e:
             raise CommandError("Invalid ZIP file") from e
@@ -0,0 +1,60 @@
+"""
+Management command to drain student photos pending face embedding.
+
+Runs the batched embedding worker here (or queues it on the Celery worker),
+e.g. after a bulk upload or to retry photos whose embedding failed.
+
+Usage:
+    python manage.py process_photo_embeddings
+    python manage.py process_photo_embeddings --retry-failed  # Re-queue failed photos first
+    python manage.py process_photo_embeddings --batch-size 32
+    python manage.py process_photo_embeddings --async  # Queue on the Celery worker
+"""
+
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from students.models import StudentPhoto
+from students.services.embedding_worker import process_pending_photo_embeddings, retry_failed_photo_embeddings
+from students.tasks import process_pending_photo_embeddings_task
+
+
+class Command(BaseCommand):
+    help = "Generate face embeddings for student photos pending (or failed) embedding"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help=f"Re-queue failed photos with fewer than --max-attempts attempts (default: {settings.FACE_EMBEDDING_MAX_ATTEMPTS})",
+        )
+        parser.add_argument("--max-attempts", type=int, help="Attempt limit for --retry-failed")
+        parser.add_argument("--batch-size", type=int, help=f"Photos per batch (default: {settings.FACE_EMBEDDING_BATCH_SIZE})")
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="run_async",
+            help="Queue the drain as a Celery task instead of processing here",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["retry_failed"]:
+            retried = retry_failed_photo_embeddings(max_attempts=options["max_attempts"])
+            self.stdout.write(f"[RETRY] {retried} failed photos queued again")
+
+        pending = StudentPhoto.objects.filter(embedding_status="pending").count()
+        if options["run_async"]:
+            result = process_pending_photo_embeddings_task.delay()
+            self.stdout.write(self.style.SUCCESS(f"[OK] Queued embedding of {pending} pending photos (task {result.id})"))
+            return
+
+        result = process_pending_photo_embeddings(batch_size=options["batch_size"])
+        style = self.style.WARNING if result["failed"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"[OK] Embedded {result['completed']} photos in {result['batches']} batches "
+                f"({result['failed']} failed, {result['embeddings']} embeddings created)"
+            )
+        )
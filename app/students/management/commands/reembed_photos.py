@@ -0,0 +1,145 @@
+"""
+Management command to regenerate face embeddings after a model upgrade.
+
+Selects photos without an embedding of the model's current version
+(FACE_RECOGNITION_MODELS[name]["version"]) and embeds them in batches on a
+process pool, replacing embeddings of older versions. Every batch is
+bulk-inserted and committed on its own, so an interrupted run resumes where
+it stopped. A JSON checkpoint keeps the run's counters and the photos that
+could not be embedded (no face, unreadable), which a resumed run skips.
+
+Usage:
+    python manage.py reembed_photos
+    python manage.py reembed_photos --model mobilefacenet --workers 4
+    python manage.py reembed_photos --school <school_id> --limit 500
+    python manage.py reembed_photos --restart  # Ignore the checkpoint, retry skipped photos
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import UTC, datetime
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ml_models.config import FACE_RECOGNITION_MODELS
+from students.services.reembedding import init_reembed_worker, model_version, photos_missing_embeddings, reembed_photo_batch
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class Command(BaseCommand):
+    help = "Regenerate face embeddings of existing photos for the current model version"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--model", choices=sorted(FACE_RECOGNITION_MODELS), help="Model to re-embed (default: every enabled model)")
+        parser.add_argument("--school", help="Only photos of students in this school_id")
+        parser.add_argument("--limit", type=int, help="Stop after this many photos")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1, in this process)")
+        parser.add_argument("--batch-size", type=int, help=f"Photos per batch (default: {settings.FACE_EMBEDDING_BATCH_SIZE})")
+        parser.add_argument("--checkpoint-dir", default=".", help="Directory of the resume checkpoints (default: current directory)")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        model_names = [options["model"]] if options["model"] else [name for name, config in FACE_RECOGNITION_MODELS.items() if config["enabled"]]
+        for model_name in model_names:
+            self._reembed(model_name, options)
+
+    def _reembed(self, model_name: str, options: Any) -> None:
+        version = model_version(model_name)
+        school_suffix = f"_{options['school']}" if options["school"] else ""
+        checkpoint_path = Path(options["checkpoint_dir"]) / f"reembed_{model_name}_v{version}{school_suffix}.json"
+        checkpoint = self._load_checkpoint(checkpoint_path, model_name, version, options["restart"])
+        skipped = set(checkpoint["failed_ids"])
+
+        photo_ids = [
+            photo_id
+            for photo_id in photos_missing_embeddings(model_name, options["school"]).values_list("photo_id", flat=True).iterator()
+            if str(photo_id) not in skipped
+        ][: options["limit"]]
+        self.stdout.write(
+            f"[START] {model_name} v{version}: {len(photo_ids)} photos to embed "
+            f"({checkpoint['completed']} done and {len(skipped)} skipped in earlier runs, checkpoint {checkpoint_path})"
+        )
+        if not photo_ids:
+            self.stdout.write(self.style.SUCCESS(f"[OK] {model_name} v{version} is up to date"))
+            return
+
+        batch_size = options["batch_size"] or settings.FACE_EMBEDDING_BATCH_SIZE
+        batches = [photo_ids[start : start + batch_size] for start in range(0, len(photo_ids), batch_size)]
+        start = time.perf_counter()
+        done = 0
+        try:
+            for result in self._run_batches(batches, model_name, options["workers"]):
+                done += result["completed"] + result["failed"]
+                for field in ("completed", "failed", "embeddings"):
+                    checkpoint[field] += result[field]
+                checkpoint["failed_ids"].extend(result["failed_ids"])
+                self._save_checkpoint(checkpoint_path, checkpoint)
+
+                elapsed = time.perf_counter() - start
+                rate = done / elapsed if elapsed else 0.0
+                eta = format_duration((len(photo_ids) - done) / rate) if rate else "?"
+                self.stdout.write(f"[PROGRESS] {done}/{len(photo_ids)} photos ({done / len(photo_ids):.0%}), {rate:.1f} photos/s, ETA {eta}")
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(f"[STOPPED] {done} photos embedded this run - run again to resume"))
+            raise
+
+        elapsed = time.perf_counter() - start
+        style = self.style.WARNING if checkpoint["failed"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"[OK] {model_name} v{version}: {done} photos in {format_duration(elapsed)} ({done / elapsed:.1f} photos/s). "
+                f"Total {checkpoint['completed']} embedded, {checkpoint['failed']} failed, {checkpoint['embeddings']} embeddings created"
+            )
+        )
+
+    def _run_batches(self, batches: list[list[Any]], model_name: str, workers: int) -> Any:
+        """Yield each batch's result as it finishes."""
+        if workers == 1:
+            for batch in batches:
+                yield reembed_photo_batch(batch, model_name)
+            return
+
+        # Workers fork lazily while batches are submitted: drop the parent's
+        # connections first so no child inherits an open database socket
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_reembed_worker, initargs=(num_threads,)) as executor:
+            futures: list[Future[dict[str, Any]]] = [executor.submit(reembed_photo_batch, batch, model_name) for batch in batches]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)  # Drop queued batches, finished ones are committed
+                raise
+
+    def _load_checkpoint(self, path: Path, model_name: str, version: str, restart: bool) -> dict[str, Any]:
+        empty = {"model_name": model_name, "model_version": version, "completed": 0, "failed": 0, "embeddings": 0, "failed_ids": []}
+        if restart or not path.exists():
+            return empty
+        checkpoint = json.loads(path.read_text())
+        if (checkpoint.get("model_name"), checkpoint.get("model_version")) != (model_name, version):
+            self.stdout.write(self.style.WARNING(f"[CHECKPOINT] {path} belongs to another model version - ignored"))
+            return empty
+        return {**empty, **checkpoint}
+
+    def _save_checkpoint(self, path: Path, checkpoint: dict[str, Any]) -> None:
+        checkpoint["updated_at"] = datetime.now(UTC).isoformat()
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(checkpoint, indent=2))
+        temporary.replace(path)  # Atomic - an interrupted write never corrupts the checkpoint
@@ -50,7 +50,7 @@ class Command(BaseCommand):
             if existing_embeddings.exists() and not force:
                 self.stdout.write(self.style.WARNING("\nEmbeddings already exist. Use --force to reprocess."))
                 for emb in existing_embeddings:
-                    self.stdout.write(f"  - {emb.model_name}: quality={emb.quality_score:.3f}, dims={len(emb.embedding)}")
+                    self.stdout.write(f"  - {emb.model_name}: quality={emb.quality_score:.3f}, dims={emb.embedding_dimensions}")
                 return
 
             # Initialize service
@@ -80,7 +80,7 @@ class Command(BaseCommand):
                         self.style.SUCCESS(
                             f"  - Model: {emb.model_name}\n"
                             f"    Quality: {emb.quality_score:.3f}\n"
-                            f"    Dimensions: {len(emb.embedding)}\n"
+                            f"    Dimensions: {emb.embedding_dimensions}\n"
                             f"    Captured: {emb.captured_at}"
                         )
                     )
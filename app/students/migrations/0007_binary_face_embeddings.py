@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-16 13:20
+
+import struct
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def json_to_binary(apps, schema_editor):
+    """Pack JSON float lists into little-endian float32 bytes"""
+    FaceEmbeddingMetadata = apps.get_model("students", "FaceEmbeddingMetadata")
+
+    batch = []
+    for embedding in FaceEmbeddingMetadata.objects.only("embedding_id", "embedding").iterator(chunk_size=BATCH_SIZE):
+        values = embedding.embedding if isinstance(embedding.embedding, list) else []
+        embedding.embedding_vector = struct.pack(f"<{len(values)}f", *values)
+        embedding.embedding_dimensions = len(values)
+        embedding.embedding_dtype = "float32"
+        batch.append(embedding)
+        if len(batch) >= BATCH_SIZE:
+            FaceEmbeddingMetadata.objects.bulk_update(batch, ["embedding_vector", "embedding_dimensions", "embedding_dtype"])
+            batch = []
+    if batch:
+        FaceEmbeddingMetadata.objects.bulk_update(batch, ["embedding_vector", "embedding_dimensions", "embedding_dtype"])
+
+
+def binary_to_json(apps, schema_editor):
+    """Unpack float32 bytes back into JSON float lists"""
+    FaceEmbeddingMetadata = apps.get_model("students", "FaceEmbeddingMetadata")
+
+    batch = []
+    for embedding in FaceEmbeddingMetadata.objects.only("embedding_id", "embedding_vector", "embedding_dimensions").iterator(chunk_size=BATCH_SIZE):
+        embedding.embedding = list(struct.unpack(f"<{embedding.embedding_dimensions}f", bytes(embedding.embedding_vector)))
+        batch.append(embedding)
+        if len(batch) >= BATCH_SIZE:
+            FaceEmbeddingMetadata.objects.bulk_update(batch, ["embedding"])
+            batch = []
+    if batch:
+        FaceEmbeddingMetadata.objects.bulk_update(batch, ["embedding"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("students", "0006_add_face_enrollment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="faceembeddingmetadata",
+            name="embedding_vector",
+            field=models.BinaryField(default=bytes, help_text="The embedding vector as little-endian float32 bytes"),
+        ),
+        migrations.AddField(
+            model_name="faceembeddingmetadata",
+            name="embedding_dimensions",
+            field=models.PositiveSmallIntegerField(default=0, help_text="Number of values in the embedding vector"),
+        ),
+        migrations.AddField(
+            model_name="faceembeddingmetadata",
+            name="embedding_dtype",
+            field=models.CharField(default="float32", help_text="Storage dtype of embedding_vector", max_length=16),
+        ),
+        migrations.RunPython(json_to_binary, binary_to_json),
+        migrations.RemoveField(
+            model_name="faceembeddingmetadata",
+            name="embedding",
+        ),
+    ]
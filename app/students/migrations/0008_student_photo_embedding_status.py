@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-16 18:40
+
+from django.db import migrations, models
+
+
+def mark_embedded_photos_completed(apps, schema_editor):
+    """Photos that already have embeddings need no processing"""
+    StudentPhoto = apps.get_model("students", "StudentPhoto")
+    FaceEmbeddingMetadata = apps.get_model("students", "FaceEmbeddingMetadata")
+
+    embedded_photo_ids = FaceEmbeddingMetadata.objects.values("student_photo_id")
+    StudentPhoto.objects.filter(photo_id__in=embedded_photo_ids).update(embedding_status="completed", embedding_attempts=1)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("students", "0007_binary_face_embeddings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentphoto",
+            name="embedding_status",
+            field=models.CharField(
+                choices=[("pending", "Pending"), ("processing", "Processing"), ("completed", "Completed"), ("failed", "Failed")],
+                default="pending",
+                help_text="Face embedding generation status",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentphoto",
+            name="embedding_attempts",
+            field=models.PositiveSmallIntegerField(default=0, help_text="Embedding generation attempts so far"),
+        ),
+        migrations.AddField(
+            model_name="studentphoto",
+            name="embedding_error",
+            field=models.TextField(blank=True, default="", help_text="Reason the last attempt failed"),
+        ),
+        migrations.AddField(
+            model_name="studentphoto",
+            name="embedding_updated_at",
+            field=models.DateTimeField(blank=True, help_text="When embedding_status last changed", null=True),
+        ),
+        migrations.AddIndex(
+            model_name="studentphoto",
+            index=models.Index(fields=["embedding_status", "created_at"], name="idx_photos_embedding_status"),
+        ),
+        migrations.RunPython(mark_embedded_photos_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("students", "0008_student_photo_embedding_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentphoto",
+            name="face_crop",
+            field=models.BinaryField(
+                blank=True, editable=False, help_text="Best face crop at native size (PNG)", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentphoto",
+            name="face_bbox",
+            field=models.JSONField(
+                blank=True, editable=False, help_text="Best face [x, y, width, height] in the decoded photo", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentphoto",
+            name="face_confidence",
+            field=models.FloatField(blank=True, editable=False, help_text="Face detection confidence", null=True),
+        ),
+    ]
@@ -18,6 +18,10 @@ PRIMARY_PARENT_ERROR = "Student can only have one primary parent"
 QUALITY_SCORE_ERROR = "Quality score must be between 0 and 1"
 ENCRYPTED_PLACEHOLDER = "[ENCRYPTED]"
 
+# Face embeddings are stored as raw little-endian float32 bytes (same layout as kiosk snapshots)
+EMBEDDING_DTYPE = "float32"
+EMBEDDING_NUMPY_DTYPE = "<f4"
+
 # Validation error format strings
 INVALID_STATUS_FORMAT = "{}: {}"
 
@@ -157,6 +161,13 @@ class Student(models.Model):
 class StudentPhoto(models.Model):
     """Student photo storage - stored as binary data in Cloud SQL database"""
 
+    EMBEDDING_STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
     photo_id: models.UUIDField = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student: models.ForeignKey = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="photos")
 
@@ -187,10 +198,36 @@ class StudentPhoto(models.Model):
     captured_at: models.DateTimeField = models.DateTimeField(default=timezone.now, help_text="When photo was taken")
     created_at: models.DateTimeField = models.DateTimeField(default=timezone.now)
 
+    # Face embedding generation (students/services/embedding_worker.py)
+    embedding_status: models.CharField = models.CharField(
+        max_length=20,
+        choices=EMBEDDING_STATUS_CHOICES,
+        default="pending",
+        help_text="Face embedding generation status",
+    )
+    embedding_attempts: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(
+        default=0, help_text="Embedding generation attempts so far"
+    )
+    embedding_error: models.TextField = models.TextField(blank=True, default="", help_text="Reason the last attempt failed")
+    embedding_updated_at: models.DateTimeField = models.DateTimeField(
+        null=True, blank=True, help_text="When embedding_status last changed"
+    )
+
+    # Detected face cache - later embedding runs (new models / versions) start
+    # from the crop instead of decoding the photo and running detection again
+    face_crop: models.BinaryField = models.BinaryField(
+        null=True, blank=True, editable=False, help_text="Best face crop at native size (PNG)"
+    )
+    face_bbox: models.JSONField = models.JSONField(
+        null=True, blank=True, editable=False, help_text="Best face [x, y, width, height] in the decoded photo"
+    )
+    face_confidence: models.FloatField = models.FloatField(null=True, blank=True, editable=False, help_text="Face detection confidence")
+
     class Meta:
         db_table = "student_photos"
         indexes = [
             models.Index(fields=["student"], name="idx_photos_student"),
+            models.Index(fields=["embedding_status", "created_at"], name="idx_photos_embedding_status"),
         ]
 
     def __str__(self):
@@ -508,7 +545,12 @@ class FaceEmbeddingMetadata(models.Model):
     student_photo: models.ForeignKey = models.ForeignKey(StudentPhoto, on_delete=models.CASCADE, related_name="face_embeddings")
     model_name: models.CharField = models.CharField(max_length=100, help_text="Face recognition model")
     model_version: models.CharField = models.CharField(max_length=50, help_text="Face recognition model version")
-    embedding: models.JSONField = models.JSONField(help_text="The embedding vector as a list of floats", default=dict)
+    embedding_vector: models.BinaryField = models.BinaryField(
+        default=bytes,
+        help_text="The embedding vector as little-endian float32 bytes",
+    )
+    embedding_dimensions: models.PositiveSmallIntegerField = models.PositiveSmallIntegerField(default=0, help_text="Number of values in the embedding vector")
+    embedding_dtype: models.CharField = models.CharField(max_length=16, default=EMBEDDING_DTYPE, help_text="Storage dtype of embedding_vector")
     quality_score: models.FloatField = models.FloatField(help_text="Face detection quality score (0-1)")
     is_primary: models.BooleanField = models.BooleanField(default=False, help_text="Primary embedding for this photo")
     captured_at: models.DateTimeField = models.DateTimeField(help_text="When the face was captured")
@@ -530,6 +572,28 @@ class FaceEmbeddingMetadata(models.Model):
         if not (0 <= self.quality_score <= 1):
             raise ValidationError(QUALITY_SCORE_ERROR)
 
+    @property
+    def embedding_array(self):
+        """Zero-copy read-only numpy view of the embedding vector"""
+        import numpy as np
+
+        return np.frombuffer(self.embedding_vector, dtype=EMBEDDING_NUMPY_DTYPE)
+
+    @property
+    def embedding(self):
+        """Embedding vector as a list of floats"""
+        return self.embedding_array.tolist()
+
+    @embedding.setter
+    def embedding(self, values):
+        """Store a list/array of floats as little-endian float32 bytes"""
+        import numpy as np
+
+        vector = np.asarray(values, dtype=EMBEDDING_NUMPY_DTYPE).ravel()
+        self.embedding_vector = vector.tobytes()
+        self.embedding_dimensions = vector.size
+        self.embedding_dtype = EMBEDDING_DTYPE
+
     def save(self, *args, **kwargs):
         # Ensure only one primary embedding per photo
         if self.is_primary:
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from buses.models import Bus
+from ml_models.config import FACE_RECOGNITION_MODELS
 
 from .models import (
     FaceEmbeddingMetadata,
@@ -74,8 +75,10 @@ class StudentPhotoSerializer(serializers.ModelSerializer):
             "captured_at",
             "student_details",
             "created_at",
+            "embedding_status",
+            "embedding_error",
         ]
-        read_only_fields = ["photo_id", "created_at", "photo_url"]
+        read_only_fields = ["photo_id", "created_at", "photo_url", "embedding_status", "embedding_error"]
 
     def get_student_details(self, obj):
         return {
@@ -381,3 +384,57 @@ class FaceEnrollmentStatusSerializer(serializers.ModelSerializer):
             "reviewed_at",
         ]
         read_only_fields = fields
+
+
+class FaceIdentificationQuerySerializer(serializers.Serializer):
+    """Where to search for a face and how many students to return"""
+
+    school = serializers.PrimaryKeyRelatedField(queryset=School.objects.all(), help_text="School whose students are searched")
+    model_name = serializers.ChoiceField(choices=sorted(FACE_RECOGNITION_MODELS), default="mobilefacenet", help_text="Embedding model to search")
+    k = serializers.IntegerField(default=5, min_value=1, max_value=50, help_text="Number of students to return")
+    min_score = serializers.FloatField(required=False, min_value=-1.0, max_value=1.0, help_text="Drop matches below this cosine similarity")
+
+
+class FaceIdentificationRequestSerializer(FaceIdentificationQuerySerializer):
+    """
+    Face identification by photo or embedding (exactly one).
+
+    A photo has its best face detected and embedded server-side; an embedding
+    must come from the same model and version as the indexed embeddings.
+    """
+
+    image = serializers.CharField(required=False, help_text="Base64-encoded photo")
+    embedding = serializers.ListField(child=serializers.FloatField(), required=False, min_length=1, help_text="Face embedding vector")
+
+    def validate_image(self, value):
+        """Decode the base64 photo"""
+        import base64
+        import binascii
+
+        try:
+            return base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError):
+            raise serializers.ValidationError("Image is not valid base64-encoded data") from None
+
+    def validate(self, attrs):
+        if ("image" in attrs) == ("embedding" in attrs):
+            raise serializers.ValidationError("Provide either image or embedding")
+        return attrs
+
+
+class FaceMatchSerializer(serializers.Serializer):
+    """Candidate student with the cosine similarity of their closest embedding"""
+
+    student_id = serializers.UUIDField()
+    photo_id = serializers.UUIDField()
+    embedding_id = serializers.UUIDField()
+    score = serializers.FloatField()
+
+
+class FaceIdentificationResultSerializer(serializers.Serializer):
+    """Best matching students, best first"""
+
+    model_name = serializers.CharField()
+    model_version = serializers.CharField()
+    face = serializers.JSONField(allow_null=True, help_text="Bounding box and confidence of the face searched (image queries)")
+    matches = FaceMatchSerializer(many=True)
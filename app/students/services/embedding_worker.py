@@ -0,0 +1,188 @@
+"""
+Batched Student Photo Embedding Worker
+Drains photos pending face embedding in batches, off the request path.
+
+FACE_EMBEDDING_EXECUTION_MODE picks where the work runs:
+- sync: inside the StudentPhoto save (signal calls FaceRecognitionService directly)
+- celery: one debounced drain task on the default Celery queue
+- thread: a drain on an in-process thread pool
+
+Each drain claims up to FACE_EMBEDDING_BATCH_SIZE pending photos at a time
+(SELECT ... FOR UPDATE SKIP LOCKED, so concurrent drains never share a photo),
+loads them in one query and hands them to FaceRecognitionService.process_photo_batch.
+Failed photos keep their reason in embedding_error and are retried with
+retry_failed_photo_embeddings() (process_photo_embeddings --retry-failed).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import logging
+import threading
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import StudentPhoto
+
+logger = logging.getLogger(__name__)
+
+DRAIN_SCHEDULED_CACHE_KEY = "students:photo_embeddings_scheduled"
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_thread_drain_queued = False
+
+
+def claim_pending_photos(batch_size: int) -> list[Any]:
+    """
+    Mark up to batch_size pending photos as processing and return their IDs.
+
+    Photos stuck in processing longer than CELERY_TASK_TIME_LIMIT (worker
+    killed mid-batch) are claimed again.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+    with transaction.atomic():
+        photo_ids = list(
+            StudentPhoto.objects.select_for_update(skip_locked=True)
+            .filter(Q(embedding_status="pending") | Q(embedding_status="processing", embedding_updated_at__lt=stale_before))
+            .order_by("created_at")
+            .values_list("photo_id", flat=True)[:batch_size]
+        )
+        if photo_ids:
+            StudentPhoto.objects.filter(photo_id__in=photo_ids).update(
+                embedding_status="processing",
+                embedding_attempts=F("embedding_attempts") + 1,
+                embedding_updated_at=now,
+            )
+    return photo_ids
+
+
+def process_pending_photo_embeddings(batch_size: int | None = None, max_batches: int | None = None) -> dict[str, int]:
+    """
+    Drain pending photos batch by batch until none are left.
+
+    Args:
+        batch_size: Photos per batch (default: FACE_EMBEDDING_BATCH_SIZE)
+        max_batches: Stop after this many batches (default: drain everything)
+
+    Returns:
+        dict: batches run, photos completed / failed, embeddings created
+    """
+    from .face_recognition_service import FaceRecognitionService
+
+    batch_size = batch_size or settings.FACE_EMBEDDING_BATCH_SIZE
+    service = FaceRecognitionService()  # Models load once per drain, not per photo
+    totals = {"batches": 0, "completed": 0, "failed": 0, "embeddings": 0}
+
+    while max_batches is None or totals["batches"] < max_batches:
+        photo_ids = claim_pending_photos(batch_size)
+        if not photo_ids:
+            break
+
+        photos = list(StudentPhoto.objects.filter(photo_id__in=photo_ids).only("photo_id", "student_id", "photo_data", "captured_at", "face_crop", "face_bbox", "face_confidence"))
+        result = service.process_photo_batch(photos)
+
+        totals["batches"] += 1
+        for key in ("completed", "failed", "embeddings"):
+            totals[key] += result[key]
+
+    if totals["batches"]:
+        logger.info(
+            f"Embedded {totals['completed']} photos in {totals['batches']} batches "
+            f"({totals['failed']} failed, {totals['embeddings']} embeddings)"
+        )
+    return totals
+
+
+def retry_failed_photo_embeddings(photo_ids: list[Any] | None = None, max_attempts: int | None = None) -> int:
+    """
+    Put failed photos back in the queue.
+
+    Args:
+        photo_ids: Only these photos, regardless of attempts (default: every failed
+            photo with fewer than max_attempts attempts)
+        max_attempts: Attempt limit (default: FACE_EMBEDDING_MAX_ATTEMPTS)
+
+    Returns:
+        int: Number of photos queued again
+    """
+    photos = StudentPhoto.objects.filter(embedding_status="failed")
+    if photo_ids is not None:
+        photos = photos.filter(photo_id__in=photo_ids)
+    else:
+        photos = photos.filter(embedding_attempts__lt=max_attempts or settings.FACE_EMBEDDING_MAX_ATTEMPTS)
+    return photos.update(embedding_status="pending", embedding_error="", embedding_updated_at=timezone.now())
+
+
+def schedule_photo_embeddings() -> None:
+    """
+    Drain pending photos in the configured FACE_EMBEDDING_EXECUTION_MODE.
+
+    Call after the photos are committed (transaction.on_commit) so the
+    worker sees them.
+    """
+    mode = settings.FACE_EMBEDDING_EXECUTION_MODE
+    if mode == "celery":
+        _schedule_celery_drain()
+    elif mode == "thread":
+        _schedule_thread_drain()
+    else:
+        process_pending_photo_embeddings()
+
+
+def _schedule_celery_drain() -> bool:
+    """Queue one debounced drain task unless one is already pending."""
+    from ..tasks import process_pending_photo_embeddings_task
+
+    debounce = settings.FACE_EMBEDDING_DEBOUNCE_SECONDS
+    # Same debounce as kiosks.tasks.schedule_snapshot_rebuild: a bulk upload queues one drain
+    if not cache.add(DRAIN_SCHEDULED_CACHE_KEY, True, timeout=debounce + settings.CELERY_TASK_TIME_LIMIT):
+        return False
+
+    try:
+        process_pending_photo_embeddings_task.apply_async(countdown=debounce)
+    except Exception as e:
+        # Broker unavailable - photos stay pending until the next drain or retry
+        cache.delete(DRAIN_SCHEDULED_CACHE_KEY)
+        logger.error(f"Failed to queue photo embedding drain: {e}")
+        return False
+    return True
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.FACE_EMBEDDING_THREAD_WORKERS,
+                thread_name_prefix="photo-embedding",
+            )
+        return _executor
+
+
+def _schedule_thread_drain() -> bool:
+    """Queue a drain on the thread pool unless one is already waiting to start."""
+    global _thread_drain_queued
+    with _executor_lock:
+        if _thread_drain_queued:
+            return False  # The queued drain will pick these photos up
+        _thread_drain_queued = True
+    _get_executor().submit(_run_thread_drain)
+    return True
+
+
+def _run_thread_drain() -> None:
+    global _thread_drain_queued
+    with _executor_lock:
+        _thread_drain_queued = False  # Photos committed from now on need another drain
+    try:
+        process_pending_photo_embeddings()
+    except Exception as e:
+        logger.error(f"Photo embedding drain failed: {e}")
+    finally:
+        connection.close()  # Thread-local connection - not closed by request_finished
@@ -0,0 +1,340 @@
+"""
+Face Identification Service
+Matches a face against the enrolled students of a school.
+
+Each (school, model) pair gets an in-memory index of the L2-normalised
+embeddings of the model's current version, loaded from FaceEmbeddingMetadata
+on first query. A top-k query is one matrix-vector product (cosine similarity)
+over the index, keeping each student's best-scoring embedding. The matrix
+takes 4 bytes per dimension per embedding (7.3 MiB per 10k 192-dimensional
+MobileFaceNet embeddings) - scripts/benchmark_face_identification.py measures
+the id bookkeeping on top and query latency.
+
+Indexes stay current two ways:
+- FaceEmbeddingMetadata signals (students/signals.py) apply this process's
+  saves and deletes once they commit.
+- Before each query the kiosk dataset version is checked. Changes made by
+  bulk writes (bulk_create sends no signals) or by other processes are
+  replayed from the SnapshotChange journal by reloading the changed students,
+  or the whole index when the journal cannot express them.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+import logging
+import threading
+from typing import Any
+
+from django.conf import settings
+import numpy as np
+
+from ml_models.config import FACE_RECOGNITION_MODELS
+
+from ..models import EMBEDDING_NUMPY_DTYPE, FaceEmbeddingMetadata, StudentPhoto
+from .reembedding import model_version
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FaceMatch:
+    """Best-scoring embedding of one student for a query."""
+
+    student_id: Any
+    photo_id: Any
+    embedding_id: Any
+    score: float
+
+
+def normalize(vector: Any) -> np.ndarray:
+    """float32 copy of vector scaled to unit length (zero vectors unchanged)."""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class FaceIndex:
+    """
+    L2-normalised embeddings of one school and model, one row each.
+
+    Rows live in a preallocated float32 matrix that doubles when full.
+    Removing a row moves the last row into its place, so the live rows are
+    always matrix[:size]. Not thread-safe - FaceIdentificationService locks.
+    """
+
+    def __init__(self, dimensions: int, dataset_version: int = 0, capacity: int = 1024) -> None:
+        self.dimensions = dimensions
+        self.dataset_version = dataset_version
+        self._matrix = np.empty((max(capacity, 1), dimensions), dtype=np.float32)
+        self._embedding_ids: list[Any] = []
+        self._photo_ids: list[Any] = []
+        self._student_ids: list[Any] = []
+        self._rows: dict[Any, int] = {}
+        self._student_rows: Counter[Any] = Counter()
+        self._max_student_rows = 0  # Upper bound - single removals leave it stale
+
+    def __len__(self) -> int:
+        return len(self._embedding_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the embedding matrix."""
+        return self._matrix.nbytes
+
+    @property
+    def student_count(self) -> int:
+        return len(self._student_rows)
+
+    def upsert(self, embedding_id: Any, student_id: Any, photo_id: Any, vector: Any) -> None:
+        """
+        Add or replace one embedding.
+
+        Raises:
+            ValueError: vector does not have the index's dimensions
+        """
+        vector = normalize(vector)
+        if vector.shape != (self.dimensions,):
+            raise ValueError(f"Expected a {self.dimensions}-dimensional embedding, got {vector.shape[0]}")
+
+        row = self._rows.get(embedding_id)
+        if row is None:
+            row = len(self._embedding_ids)
+            if row == len(self._matrix):
+                grown = np.empty((2 * len(self._matrix), self.dimensions), dtype=np.float32)
+                grown[:row] = self._matrix
+                self._matrix = grown
+            self._rows[embedding_id] = row
+            self._embedding_ids.append(embedding_id)
+            self._photo_ids.append(photo_id)
+            self._student_ids.append(student_id)
+            self._student_rows[student_id] += 1
+            self._max_student_rows = max(self._max_student_rows, self._student_rows[student_id])
+        self._matrix[row] = vector
+
+    def remove(self, embedding_id: Any) -> bool:
+        """Drop one embedding, returns whether it was indexed."""
+        row = self._rows.pop(embedding_id, None)
+        if row is None:
+            return False
+
+        student_id = self._student_ids[row]
+        last = len(self._embedding_ids) - 1
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            for ids in (self._embedding_ids, self._photo_ids, self._student_ids):
+                ids[row] = ids[last]
+            self._rows[self._embedding_ids[row]] = row
+        for ids in (self._embedding_ids, self._photo_ids, self._student_ids):
+            ids.pop()
+
+        self._student_rows[student_id] -= 1
+        if not self._student_rows[student_id]:
+            del self._student_rows[student_id]
+        return True
+
+    def remove_students(self, student_ids: set[Any]) -> int:
+        """Drop every embedding of these students, returns embeddings removed."""
+        embedding_ids = [embedding_id for embedding_id, student_id in zip(self._embedding_ids, self._student_ids, strict=True) if student_id in student_ids]
+        for embedding_id in embedding_ids:
+            self.remove(embedding_id)
+        self._max_student_rows = max(self._student_rows.values(), default=0)
+        return len(embedding_ids)
+
+    def search(self, query: Any, k: int = 5, min_score: float | None = None) -> list[FaceMatch]:
+        """
+        Top-k students by cosine similarity, best first.
+
+        A student's score is that of their closest embedding. Only the
+        k * (most embeddings of one student) best rows are sorted - they
+        always hold k distinct students.
+
+        Raises:
+            ValueError: query does not have the index's dimensions
+        """
+        query = normalize(query)
+        if query.shape != (self.dimensions,):
+            raise ValueError(f"Expected a {self.dimensions}-dimensional embedding, got {query.shape[0]}")
+        size = len(self._embedding_ids)
+        if not size or k < 1:
+            return []
+
+        scores = self._matrix[:size] @ query
+        candidates = min(size, k * self._max_student_rows)
+        top = np.argpartition(scores, size - candidates)[size - candidates :] if candidates < size else np.arange(size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        matches: list[FaceMatch] = []
+        seen: set[Any] = set()
+        for row in top:
+            score = float(scores[row])
+            if min_score is not None and score < min_score:
+                break
+            student_id = self._student_ids[row]
+            if student_id in seen:
+                continue
+            seen.add(student_id)
+            matches.append(FaceMatch(student_id, self._photo_ids[row], self._embedding_ids[row], score))
+            if len(matches) == k:
+                break
+        return matches
+
+
+class FaceIdentificationService:
+    """
+    Process-wide face indexes, keyed by (school_id, model_name).
+    Use the face_identification_service instance.
+    """
+
+    def __init__(self) -> None:
+        self._indexes: dict[tuple[str, str], FaceIndex] = {}
+        self._lock = threading.RLock()
+
+    def identify(self, school_id: Any, embedding: Any, model_name: str, k: int = 5, min_score: float | None = None) -> list[FaceMatch]:
+        """
+        Students of a school closest to an embedding of model_name.
+
+        Raises:
+            ValueError: embedding does not match the model's dimensions
+        """
+        index = self.get_index(school_id, model_name)
+        with self._lock:
+            return index.search(embedding, k, min_score)
+
+    def identify_image(
+        self, school_id: Any, photo_data: bytes, model_name: str, k: int = 5, min_score: float | None = None, detect_face: bool = True
+    ) -> tuple[dict[str, Any], list[FaceMatch]]:
+        """
+        Detect the best face of an image (unless it is a face crop), embed it and identify it.
+
+        Returns:
+            (face with "bbox" and "confidence", matches)
+
+        Raises:
+            PhotoEmbeddingError: Unreadable image, no usable face, no embedding
+        """
+        from .face_recognition_service import FaceRecognitionService
+
+        face, embedding_data = FaceRecognitionService(model_names=[model_name]).embed_image(photo_data, detect_face)
+        return face, self.identify(school_id, embedding_data[model_name]["vector"], model_name, k, min_score)
+
+    def get_index(self, school_id: Any, model_name: str) -> FaceIndex:
+        """Index of a school and model, loaded or brought up to the current dataset version."""
+        from kiosks.models import DatasetVersion
+
+        key = (str(school_id), model_name)
+        # Read before loading: a change committed meanwhile is replayed again next time, never lost
+        dataset_version = DatasetVersion.current()
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None or not self._catch_up(index, key, dataset_version):
+                index = self._indexes[key] = self._load(key, dataset_version)
+            return index
+
+    def embedding_saved(self, embedding: FaceEmbeddingMetadata) -> None:
+        """Apply a committed embedding save to the loaded index of its school."""
+        if embedding.model_version != model_version(embedding.model_name):
+            self.embedding_deleted(embedding)  # Saved as another version - no longer searchable
+            return
+        if not any(model_name == embedding.model_name for _, model_name in list(self._indexes)):
+            return  # Nothing loaded to update - skip the lookup
+        owner = StudentPhoto.objects.filter(pk=embedding.student_photo_id).values_list("student_id", "student__school_id").first()
+        if owner is None:
+            return  # Photo deleted since - its cascade delete removes the embedding
+        student_id, school_id = owner
+        vector = embedding.embedding_array
+        with self._lock:
+            index = self._indexes.get((str(school_id), embedding.model_name))
+            if index is not None and index.dimensions == len(vector):
+                index.upsert(embedding.embedding_id, student_id, embedding.student_photo_id, vector)
+
+    def embedding_deleted(self, embedding: FaceEmbeddingMetadata) -> None:
+        """Apply a committed embedding delete to the loaded indexes (its photo may already be gone)."""
+        with self._lock:
+            for (_, model_name), index in self._indexes.items():
+                if model_name == embedding.model_name:
+                    index.remove(embedding.embedding_id)
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Size of every loaded index."""
+        with self._lock:
+            return [
+                {
+                    "school_id": school_id,
+                    "model_name": model_name,
+                    "embeddings": len(index),
+                    "students": index.student_count,
+                    "matrix_bytes": index.nbytes,
+                    "dataset_version": index.dataset_version,
+                }
+                for (school_id, model_name), index in self._indexes.items()
+            ]
+
+    def clear(self) -> None:
+        """Drop every index (tests, memory pressure) - the next query reloads."""
+        with self._lock:
+            self._indexes.clear()
+
+    def _embeddings(self, school_id: str, model_name: str) -> Any:
+        return FaceEmbeddingMetadata.objects.filter(
+            student_photo__student__school_id=school_id,
+            model_name=model_name,
+            model_version=model_version(model_name),
+        ).values_list("embedding_id", "student_photo__student_id", "student_photo_id", "embedding_vector")
+
+    def _add_rows(self, index: FaceIndex, rows: Any) -> None:
+        for embedding_id, student_id, photo_id, vector in rows:
+            vector = np.frombuffer(vector, dtype=EMBEDDING_NUMPY_DTYPE)
+            if len(vector) != index.dimensions:
+                logger.warning(f"Embedding {embedding_id} has {len(vector)} dimensions, index has {index.dimensions} - skipped")
+                continue
+            index.upsert(embedding_id, student_id, photo_id, vector)
+
+    def _load(self, key: tuple[str, str], dataset_version: int) -> FaceIndex:
+        school_id, model_name = key
+        embeddings = self._embeddings(school_id, model_name)
+        count = embeddings.count()
+        first = embeddings.first()
+        dimensions = len(np.frombuffer(first[3], dtype=EMBEDDING_NUMPY_DTYPE)) if first else int(FACE_RECOGNITION_MODELS[model_name]["dimensions"])
+
+        index = FaceIndex(dimensions, dataset_version, capacity=count)
+        self._add_rows(index, embeddings.iterator(chunk_size=2000))
+        logger.info(f"Loaded face index {model_name} for school {school_id}: {len(index)} embeddings of {index.student_count} students ({index.nbytes / 2**20:.1f}MiB)")
+        return index
+
+    def _catch_up(self, index: FaceIndex, key: tuple[str, str], dataset_version: int) -> bool:
+        """Replay journaled changes into the index, returns False if it needs a full reload."""
+        from kiosks.models import SnapshotChange
+
+        if dataset_version <= index.dataset_version:
+            return True  # Current, or another thread caught up past the version read by this one
+        if dataset_version - index.dataset_version > settings.SNAPSHOT_DELTA_MAX_VERSIONS:
+            return False  # Journal pruned past the index
+
+        changes = SnapshotChange.objects.filter(dataset_version__gt=index.dataset_version, dataset_version__lte=dataset_version)
+        if changes.filter(full_resync=True).exists():
+            return False
+        student_ids = set(changes.values_list("student_id", flat=True).distinct())
+        if len(student_ids) > settings.SNAPSHOT_DELTA_MAX_STUDENTS:
+            return False
+
+        # Students may have left the school or lost embeddings - drop and reload them
+        index.remove_students(student_ids)
+        school_id, model_name = key
+        self._add_rows(index, self._embeddings(school_id, model_name).filter(student_photo__student_id__in=student_ids))
+        index.dataset_version = dataset_version
+        return True
+
+
+def identification_result(model_name: str, face: dict[str, Any] | None, matches: list[FaceMatch]) -> dict[str, Any]:
+    """Identification for FaceIdentificationResultSerializer."""
+    return {
+        "model_name": model_name,
+        "model_version": model_version(model_name),
+        "face": {"bbox": [int(value) for value in face["bbox"]], "confidence": float(face["confidence"])} if face else None,
+        "matches": matches,
+    }
+
+
+face_identification_service = FaceIdentificationService()
@@ -6,7 +6,9 @@ Industry Standard: Clean architecture - ML logic separated in ml_models/
 
 from __future__ import annotations
 
-from importlib import import_module
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from typing import TYPE_CHECKING, Any
 
@@ -17,21 +19,38 @@ else:
 
     File = FileType  # type: ignore[misc, assignment]
 
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
 from ml_models.config import FACE_RECOGNITION_MODELS, FACE_RECOGNITION_SERVICE_CONFIG
+from ml_models.face_recognition.registry import model_registry, pool_size
 
 from ..models import FaceEmbeddingMetadata, StudentPhoto
 
 logger = logging.getLogger(__name__)
 
 
+class PhotoEmbeddingError(Exception):
+    """Photo cannot be embedded (unreadable image, no face, too many faces)."""
+
+
 class FaceRecognitionService:
     """
     Service for processing student photos and generating face embeddings.
     LAZY LOADING: ML libraries only loaded when photo is processed.
+    Models come from the process-wide registry, so constructing a service is cheap.
     """
 
-    def __init__(self) -> None:
-        self.enabled_models = {name: cfg for name, cfg in FACE_RECOGNITION_MODELS.items() if cfg["enabled"]}
+    def __init__(self, model_names: list[str] | None = None) -> None:
+        """
+        Args:
+            model_names: Only generate these FACE_RECOGNITION_MODELS entries (default: all enabled)
+        """
+        if model_names is None:
+            self.enabled_models = {name: cfg for name, cfg in FACE_RECOGNITION_MODELS.items() if cfg["enabled"]}
+        else:
+            self.enabled_models = {name: FACE_RECOGNITION_MODELS[name] for name in model_names}
         self.config = FACE_RECOGNITION_SERVICE_CONFIG
         self._model_instances: dict[str, Any] = {}
         self._face_detector: Any = None  # Lazy load on first use
@@ -49,42 +68,239 @@ class FaceRecognitionService:
         try:
             logger.info(f"Processing photo for student {student_photo.student}")
 
-            # Load and validate image from binary data
-            image = self._load_image_from_binary(student_photo.photo_data)
-            if not image:
-                logger.error("Failed to load image")
-                return False
-
-            # Detect and validate faces
-            faces = self._detect_faces(image)
-            if not faces:
-                logger.warning("No faces detected in photo")
-                return False
-
-            max_faces_val = self.config.get("max_faces_per_image", 1)
-            max_faces = int(max_faces_val) if isinstance(max_faces_val, (int, float)) else 1
-            if len(faces) > max_faces:
-                logger.warning(f"Too many faces detected: {len(faces)} > {max_faces}")
-                return False
-
-            # Process the best face
-            best_face = self._select_best_face(faces)
+            best_face = self._cached_face(student_photo)
+            if best_face is None:
+                best_face = self._detect_best_face(student_photo.photo_data)
+                self._store_face_crops([(student_photo, best_face)])
             embedding_data = self._generate_embeddings(best_face)
 
             if not embedding_data:
-                logger.error("Failed to generate embeddings")
-                return False
+                raise PhotoEmbeddingError("Failed to generate embeddings")
 
             # Save embeddings to database with face detection confidence as quality
             self._save_embeddings(student_photo, embedding_data, best_face["confidence"])
 
-            logger.info(f"Successfully processed photo for student {student_photo.student}")
-            return True
-
+        except PhotoEmbeddingError as e:
+            logger.warning(f"Photo {student_photo.photo_id} not embedded: {e}")
+            self._record_status([student_photo.photo_id], "failed", error=str(e), count_attempt=True)
+            return False
         except Exception as e:
             logger.error(f"Error processing student photo: {e}")
+            self._record_status([student_photo.photo_id], "failed", error=str(e), count_attempt=True)
             return False
 
+        self._record_status([student_photo.photo_id], "completed", count_attempt=True)
+        logger.info(f"Successfully processed photo for student {student_photo.student}")
+        return True
+
+    def process_photo_batch(self, photos: list[StudentPhoto], replace_other_versions: bool = False) -> dict[str, int]:
+        """
+        Generate and store embeddings for a batch of photos.
+
+        Photos with a cached face crop start from it. The others are decoded,
+        their faces detected in batched forward passes and cached. Each model
+        then embeds every face of the batch in one pass. Decoding, detection
+        and embedding run on up to pool_size() threads, one pooled interpreter
+        each. Embeddings are bulk-inserted with a single kiosk dataset version
+        bump; a photo that fails never fails the batch, it is marked failed
+        with its reason instead.
+
+        Args:
+            photos: StudentPhoto instances (photo_data loaded), already claimed
+            replace_other_versions: Delete the embedded photos' embeddings of other
+                versions of the same models (re-embedding after a model upgrade)
+
+        Returns:
+            dict: completed / failed photo counts and embeddings created
+        """
+        from kiosks.signals import batch_dataset_changes, record_dataset_change
+
+        cached_faces = {photo.photo_id: face for photo in photos if (face := self._cached_face(photo)) is not None}
+        uncached = [photo for photo in photos if photo.photo_id not in cached_faces]
+        best_faces = dict(zip([photo.photo_id for photo in uncached], self._detect_best_faces([photo.photo_data for photo in uncached]), strict=True))
+
+        errors: dict[Any, str] = {}
+        detected = []
+        new_crops = []
+        for photo in photos:
+            if photo.photo_id in cached_faces:
+                detected.append((photo, cached_faces[photo.photo_id]))
+                continue
+            face, error = best_faces[photo.photo_id]
+            if face is None:
+                errors[photo.photo_id] = error
+            else:
+                detected.append((photo, face))
+                new_crops.append((photo, face))
+
+        embeddings: list[FaceEmbeddingMetadata] = []
+        face_embeddings = self._generate_batch_embeddings([face for _, face in detected])
+        for (photo, face), embedding_data in zip(detected, face_embeddings, strict=True):
+            if not embedding_data:
+                errors[photo.photo_id] = "Failed to generate embeddings"
+                continue
+            embeddings.extend(self._build_embeddings(photo, embedding_data, face["confidence"]))
+
+        completed = [photo for photo in photos if photo.photo_id not in errors]
+        failed_by_error: dict[str, list[Any]] = defaultdict(list)
+        for photo_id, error in errors.items():
+            failed_by_error[error].append(photo_id)
+
+        with transaction.atomic(), batch_dataset_changes():
+            self._store_face_crops(new_crops)
+            if replace_other_versions:
+                for model_name, model_config in self.enabled_models.items():
+                    FaceEmbeddingMetadata.objects.filter(student_photo__in=completed, model_name=model_name).exclude(
+                        model_version=model_config["version"]
+                    ).delete()
+            FaceEmbeddingMetadata.objects.bulk_create(embeddings)
+            self._record_status([photo.photo_id for photo in completed], "completed")
+            for error, photo_ids in failed_by_error.items():
+                self._record_status(photo_ids, "failed", error=error)
+            if embeddings:
+                # bulk_create skips post_save - bump the kiosk dataset version once (replaced rows included)
+                record_dataset_change({photo.student_id for photo in completed})
+
+        if errors:
+            logger.warning(f"{len(errors)} of {len(photos)} photos not embedded: {errors}")
+
+        return {"completed": len(completed), "failed": len(errors), "embeddings": len(embeddings)}
+
+    def embed_image(self, photo_data: bytes, detect_face: bool = True) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        Best face of an image and its embeddings, without storing anything.
+
+        Used to query the identification index with a photo.
+
+        Args:
+            photo_data: Encoded image
+            detect_face: False if the image already is a face crop (kiosk confirmation faces)
+
+        Returns:
+            (best face, {model_name: {"vector", "dimensions"}})
+
+        Raises:
+            PhotoEmbeddingError: Unreadable image, no usable face, no embedding
+        """
+        if detect_face:
+            face = self._detect_best_face(photo_data)
+        else:
+            from io import BytesIO
+
+            from PIL import Image
+
+            try:
+                image = Image.open(BytesIO(photo_data)).convert("RGB")
+            except OSError:
+                raise PhotoEmbeddingError("Failed to load image") from None
+            face = {"bbox": (0, 0, *image.size), "confidence": 1.0, "image": image}
+        embedding_data = self._generate_embeddings(face)
+        if not embedding_data:
+            raise PhotoEmbeddingError("Failed to generate embeddings")
+        return face, embedding_data
+
+    def _detect_best_face(self, photo_data: bytes | None) -> dict[str, Any]:
+        """
+        Load a photo and return its best face.
+
+        Raises:
+            PhotoEmbeddingError: Unreadable image, no face or too many faces
+        """
+        # Load and validate image from binary data
+        image = self._load_image_from_binary(photo_data)
+        if not image:
+            raise PhotoEmbeddingError("Failed to load image")
+
+        # Detect and validate faces
+        return self._validate_faces(self._detect_faces(image))
+
+    def _cached_face(self, photo: StudentPhoto) -> dict[str, Any] | None:
+        """Best face from the photo's cached crop, or None if it has not been detected yet."""
+        from io import BytesIO
+
+        from PIL import Image
+
+        if not photo.face_crop:
+            return None
+        try:
+            image = Image.open(BytesIO(bytes(photo.face_crop))).convert("RGB")
+        except OSError as e:
+            logger.warning(f"Unreadable face crop of photo {photo.photo_id}, detecting again: {e}")
+            return None
+        return {"bbox": tuple(photo.face_bbox or ()), "confidence": photo.face_confidence, "image": image}
+
+    def _store_face_crops(self, faces: list[tuple[StudentPhoto, dict[str, Any]]]) -> None:
+        """
+        Cache detected faces on their photos (crop, bbox, confidence).
+
+        The crop is stored losslessly (PNG) at its native size, so embedding
+        from the cache feeds the models exactly the pixels of a fresh detection.
+        """
+        from io import BytesIO
+
+        for photo, face in faces:
+            buffer = BytesIO()
+            face["image"].save(buffer, format="PNG")
+            photo.face_crop = buffer.getvalue()
+            photo.face_bbox = [int(value) for value in face["bbox"]]
+            photo.face_confidence = float(face["confidence"])
+        if faces:
+            # bulk_update sends no post_save - caching a crop is not a dataset change
+            StudentPhoto.objects.bulk_update([photo for photo, _ in faces], ["face_crop", "face_bbox", "face_confidence"])
+
+    def _detect_best_faces(self, photos_data: list[bytes | None]) -> list[tuple[dict[str, Any] | None, str]]:
+        """
+        Best face of each photo, detected in batched forward passes.
+
+        Photos are decoded concurrently and split into one detect_batch() call
+        per pooled detector.
+
+        Returns:
+            One (best face, "") or (None, error) per photo
+        """
+        import numpy as np
+
+        results: list[tuple[dict[str, Any] | None, str]] = [(None, "Failed to load image")] * len(photos_data)
+        images = self._map_concurrent(self._load_image_from_binary, photos_data)
+        loaded = [index for index, image in enumerate(images) if image]
+
+        def detect(chunk: Any) -> list[list[dict[str, Any]] | Exception]:
+            try:
+                return list(self._detect_faces_batch([images[index] for index in chunk]))
+            except Exception as e:
+                logger.error(f"Face detection failed for {len(chunk)} photos: {e}")
+                return [e] * len(chunk)
+
+        chunks = [chunk for chunk in np.array_split(np.asarray(loaded, dtype=int), pool_size()) if len(chunk)]
+        face_lists = [faces for chunk_faces in self._map_concurrent(detect, chunks) for faces in chunk_faces]
+        for index, faces in zip(loaded, face_lists, strict=True):
+            if isinstance(faces, Exception):
+                results[index] = (None, str(faces))
+                continue
+            try:
+                results[index] = (self._validate_faces(faces), "")
+            except PhotoEmbeddingError as e:
+                results[index] = (None, str(e))
+        return results
+
+    def _validate_faces(self, faces: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Best of the faces detected in one photo.
+
+        Raises:
+            PhotoEmbeddingError: No face or too many faces
+        """
+        if not faces:
+            raise PhotoEmbeddingError("No faces detected in photo")
+
+        max_faces_val = self.config.get("max_faces_per_image", 1)
+        max_faces = int(max_faces_val) if isinstance(max_faces_val, (int, float)) else 1
+        if len(faces) > max_faces:
+            raise PhotoEmbeddingError(f"Too many faces detected: {len(faces)} > {max_faces}")
+
+        # Process the best face
+        return self._select_best_face(faces)
+
     def _load_image(self, photo_file: File[Any]) -> Any:
         """Load and validate image from file."""
         from PIL import Image
@@ -105,27 +321,20 @@ class FaceRecognitionService:
             return None
 
     def _load_image_from_binary(self, photo_data: bytes | None) -> Any:
-        """Load and validate image from binary data"""
-        from io import BytesIO
+        """
+        Decode binary photo data once, at reduced size (see image_loader).
 
-        from PIL import Image
+        Returns:
+            DecodedImage, or None if the data is missing or not a readable image
+        """
+        from ml_models.face_recognition.preprocessing.image_loader import decode_image
 
         if not photo_data:
             logger.error("No photo data provided")
             return None
 
         try:
-            image_buffer = BytesIO(photo_data)
-            pil_image = Image.open(image_buffer)
-            pil_image.verify()  # Validate image integrity
-            image_buffer.seek(0)  # Reset buffer pointer
-            pil_image = Image.open(image_buffer)  # Re-open after verify
-
-            # Convert to RGB if necessary
-            if pil_image.mode != "RGB":
-                pil_image = pil_image.convert("RGB")  # type: ignore[assignment]
-
-            return pil_image
+            return decode_image(bytes(photo_data))
         except Exception as e:
             logger.error(f"Error loading image from binary: {e}")
             return None
@@ -133,32 +342,33 @@ class FaceRecognitionService:
     def _detect_faces(self, image: Any) -> list[dict[str, Any]]:
         """
         Detect faces using OpenCV (lightweight).
+        Detection runs on the decoded image's small BGR copy; crops come from its RGB version.
         Returns list of face dictionaries with bbox and confidence.
         """
-        import numpy as np
-        from PIL import Image
-
-        # Lazy load face detector on first use
+        # Lazy load face detector on first use (shared by the whole process)
         if self._face_detector is None:
-            from ml_models.face_recognition.preprocessing.face_detector import (
-                FaceDetector,
-            )
+            self._face_detector = model_registry.get_face_detector()
 
-            self._face_detector = FaceDetector()
+        # Real face detection, bboxes in image.rgb coordinates
+        detections = self._face_detector.detect_bgr(image.detection_bgr, image.detection_scale)
+        return self._crop_faces(image, detections)
 
-        # Convert PIL to numpy
-        img_array = np.array(image)
+    def _detect_faces_batch(self, images: list[Any]) -> list[list[dict[str, Any]]]:
+        """Detect faces in several decoded images with one detector forward pass."""
+        if self._face_detector is None:
+            self._face_detector = model_registry.get_face_detector()
 
-        # Real face detection
-        detections = self._face_detector.detect(img_array)
+        detections = self._face_detector.detect_batch([image.detection_bgr for image in images], [image.detection_scale for image in images])
+        return [self._crop_faces(image, image_detections) for image, image_detections in zip(images, detections, strict=True)]
 
-        if not detections:
-            return []
+    def _crop_faces(self, image: Any, detections: list[Any]) -> list[dict[str, Any]]:
+        """Face dictionaries (bbox, confidence, cropped face) for an image's detections."""
+        from PIL import Image
 
         # Convert to dict format with cropped face
         faces = []
         for detection in detections:
-            face_crop = self._face_detector.crop_face(img_array, detection)
+            face_crop = self._face_detector.crop_face(image.rgb, detection)
             faces.append(
                 {
                     "bbox": detection.bbox,
@@ -177,62 +387,83 @@ class FaceRecognitionService:
         """
         Generate embeddings for all enabled models.
         """
+        return self._generate_batch_embeddings([face_data])[0]
+
+    def _generate_batch_embeddings(self, faces: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Generate embeddings of every face for all enabled models.
+
+        Model-major order: each model embeds all eligible faces of the batch
+        before the next model runs, split into one generate_embeddings() call
+        per pooled instance so they run concurrently.
+
+        Returns:
+            One {model_name: {"vector", "dimensions"}} dict per face (empty if no model succeeded)
+        """
         import numpy as np
 
-        face_confidence = face_data["confidence"]
-        embeddings = {}
-        face_image = face_data["image"]
+        embeddings: list[dict[str, Any]] = [{} for _ in faces]
 
         for model_name, model_config in self.enabled_models.items():
-            try:
-                logger.debug(f"Generating embedding with model: {model_name}")
-
-                # Check if face detection confidence meets threshold
+            # Check if face detection confidence meets threshold
+            eligible = []
+            for index, face_data in enumerate(faces):
+                face_confidence = face_data["confidence"]
                 if face_confidence < model_config["quality_threshold"]:
                     logger.warning(f"Face detection confidence too low for {model_name}: {face_confidence} < {model_config['quality_threshold']}")
                     continue
+                eligible.append(index)
+            if not eligible:
+                continue
+
+            try:
+                logger.debug(f"Generating {len(eligible)} embeddings with model: {model_name}")
 
                 # Get or create model instance
                 model = self._get_model_instance(model_name, model_config)
 
-                # Convert face to numpy array (RGB, 0-255)
-                face_array = np.array(face_image)
-
-                # Generate embedding (model handles preprocessing internally)
-                embedding = model.generate_embedding(face_array)
+                # Generate embeddings (model handles preprocessing internally), faces as RGB 0-255 arrays
+                images = [np.array(faces[index]["image"]) for index in eligible]
+                chunks = [chunk for chunk in np.array_split(np.arange(len(images)), pool_size()) if len(chunk)]
+                matrices = self._map_concurrent(lambda chunk: model.generate_embeddings([images[i] for i in chunk]), chunks)
+                matrix = np.concatenate(matrices) if all(m is not None and m.ndim == 2 for m in matrices) else None
+            except Exception as e:
+                logger.error(f"Error generating embeddings for {model_name}: {e}")
+                continue
 
-                # Validate embedding (basic check)
-                if embedding is None or len(embedding) == 0:
-                    logger.error(f"Model {model_name} returned empty embedding")
-                    continue
+            # Validate embeddings (basic check)
+            if matrix is None or matrix.ndim != 2 or matrix.shape[0] != len(eligible) or matrix.shape[1] == 0:
+                logger.error(f"Model {model_name} returned {getattr(matrix, 'shape', None)} for {len(eligible)} faces")
+                continue
 
-                embeddings[model_name] = {
-                    "vector": embedding.tolist(),
-                    "dimensions": len(embedding),
+            for index, vector in zip(eligible, matrix, strict=True):
+                embeddings[index][model_name] = {
+                    "vector": vector,
+                    "dimensions": len(vector),
                 }
 
-            except Exception as e:
-                logger.error(f"Error generating embedding for {model_name}: {e}")
-                continue
-
         return embeddings
 
+    def _map_concurrent(self, func: Callable[[Any], Any], items: list[Any]) -> list[Any]:
+        """
+        func over items in order, on up to pool_size() threads.
+
+        Each inference checks out its own pooled instance, so threads never
+        share an interpreter; with a pool of one this is a plain loop.
+        """
+        workers = min(pool_size(), len(items))
+        if workers <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="face-inference") as executor:
+            return list(executor.map(func, items))
+
     def _get_model_instance(self, model_name: str, model_config: dict[str, Any]) -> Any:
         """
-        Dynamically load model instance (Factory Pattern).
-        Industry standard: lazy loading.
+        Process-wide model instance (Factory Pattern, via the model registry).
+        Loaded on first use in this process, then shared by every service.
         """
         if model_name not in self._model_instances:
-            # Parse class path
-            module_path, class_name = model_config["class"].rsplit(".", 1)
-
-            # Import module and get class
-            module = import_module(module_path)
-            model_class = getattr(module, class_name)
-
-            # Instantiate model
-            self._model_instances[model_name] = model_class()
-            logger.info(f"Loaded model: {model_name}")
+            self._model_instances[model_name] = model_registry.get_model(model_name)
 
         return self._model_instances[model_name]
 
@@ -247,13 +478,43 @@ class FaceRecognitionService:
         quality = min(float(magnitude / 10.0), 1.0) * min(float(variance * 100.0), 1.0)
         return float(quality)
 
+    def _build_embeddings(self, student_photo: StudentPhoto, embedding_data: dict[str, Any], face_confidence: float) -> list[FaceEmbeddingMetadata]:
+        """Unsaved embedding rows of one photo (for bulk_create)."""
+        embeddings = []
+        for model_name, data in embedding_data.items():
+            embedding = FaceEmbeddingMetadata(
+                student_photo=student_photo,
+                model_name=model_name,
+                model_version=self.enabled_models[model_name]["version"],
+                quality_score=face_confidence,  # Face detection confidence
+                captured_at=student_photo.captured_at,
+            )
+            embedding.embedding = data["vector"]
+            embeddings.append(embedding)
+        return embeddings
+
     def _save_embeddings(self, student_photo: StudentPhoto, embedding_data: dict[str, Any], face_confidence: float) -> None:
         """Save embeddings to database."""
         for model_name, data in embedding_data.items():
             FaceEmbeddingMetadata.objects.create(
                 student_photo=student_photo,
                 model_name=model_name,
+                model_version=self.enabled_models[model_name]["version"],
                 embedding=data["vector"],
                 quality_score=face_confidence,  # Face detection confidence
                 captured_at=student_photo.captured_at,
             )
+
+    def _record_status(self, photo_ids: list[Any], status: str, error: str = "", count_attempt: bool = False) -> None:
+        """
+        Persist embedding_status with a queryset update.
+
+        update() sends no post_save, so status changes never bump the kiosk
+        dataset version.
+        """
+        if not photo_ids:
+            return
+        fields: dict[str, Any] = {"embedding_status": status, "embedding_error": error, "embedding_updated_at": timezone.now()}
+        if count_attempt:
+            fields["embedding_attempts"] = F("embedding_attempts") + 1
+        StudentPhoto.objects.filter(photo_id__in=photo_ids).update(**fields)
@@ -0,0 +1,70 @@
+"""
+Re-embedding After Model Upgrades
+Regenerates face embeddings of existing photos for the current version of a
+model (FACE_RECOGNITION_MODELS[name]["version"], stored as
+FaceEmbeddingMetadata.model_version), e.g. after MOBILEFACENET_CONFIG changes
+or a model is added. Driven by `manage.py reembed_photos`.
+
+Progress lives in the database: each batch commits its embeddings (replacing
+other versions of the model), so photos finished before an interruption no
+longer match photos_missing_embeddings() when the command runs again.
+Photos embedded before start from their cached face crop (StudentPhoto.face_crop)
+and never load, decode or run detection on the full image.
+"""
+
+from typing import Any
+
+from django.db.models import Exists, OuterRef, QuerySet
+
+from ml_models.config import FACE_RECOGNITION_MODELS, FACE_RECOGNITION_SERVICE_CONFIG
+
+from ..models import FaceEmbeddingMetadata, StudentPhoto
+from .face_recognition_service import FaceRecognitionService
+
+
+def model_version(model_name: str) -> str:
+    """Current version of a FACE_RECOGNITION_MODELS entry."""
+    return str(FACE_RECOGNITION_MODELS[model_name]["version"])
+
+
+def photos_missing_embeddings(model_name: str, school_id: Any = None) -> QuerySet[StudentPhoto]:
+    """Photos with image data but no embedding of the model's current version, oldest first."""
+    current = FaceEmbeddingMetadata.objects.filter(
+        student_photo=OuterRef("pk"),
+        model_name=model_name,
+        model_version=model_version(model_name),
+    )
+    photos = StudentPhoto.objects.filter(photo_data__isnull=False).exclude(Exists(current))
+    if school_id:
+        photos = photos.filter(student__school_id=school_id)
+    return photos.order_by("created_at", "photo_id")
+
+
+def reembed_photo_batch(photo_ids: list[Any], model_name: str) -> dict[str, Any]:
+    """
+    Embed a batch of photos with one model and bulk-insert the results.
+
+    Returns:
+        dict: completed / failed / embeddings counts and failed_ids (str)
+    """
+    photos = list(StudentPhoto.objects.filter(photo_id__in=photo_ids).defer("photo_data"))
+    # Photos with a cached face crop skip decoding - only fetch the others' image data
+    uncached_ids = [photo.photo_id for photo in photos if not photo.face_crop]
+    photo_data = dict(StudentPhoto.objects.filter(photo_id__in=uncached_ids).values_list("photo_id", "photo_data"))
+    for photo in photos:
+        if photo.photo_id in photo_data:
+            photo.photo_data = photo_data[photo.photo_id]
+    result = FaceRecognitionService(model_names=[model_name]).process_photo_batch(photos, replace_other_versions=True)
+    failed_ids = photos_missing_embeddings(model_name).filter(photo_id__in=photo_ids).values_list("photo_id", flat=True)
+    return {**result, "failed_ids": [str(photo_id) for photo_id in failed_ids]}
+
+
+def init_reembed_worker(num_threads: int) -> None:
+    """
+    ProcessPoolExecutor initializer: one model instance per worker process.
+
+    Parallelism comes from the processes, so each keeps a pool of one with
+    its share of the CPU threads instead of starting its own inference threads.
+    """
+    FACE_RECOGNITION_SERVICE_CONFIG["max_concurrent_processes"] = 1
+    FACE_RECOGNITION_SERVICE_CONFIG["interpreter_num_threads"] = num_threads
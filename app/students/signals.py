@@ -10,11 +10,13 @@ Google-style architecture:
 import logging
 from typing import TYPE_CHECKING, Any
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import StudentPhoto
+from .models import FaceEmbeddingMetadata, StudentPhoto
 
 if TYPE_CHECKING:
     from users.models import User as UserType
@@ -35,13 +37,14 @@ def process_student_photo_embedding(
     """
     Automatically process student photos for face embeddings when uploaded.
 
-    This signal handler triggers asynchronous processing to avoid:
-    - Blocking the upload response
-    - HTTP context issues in web container
-    - Memory constraints during ML processing
+    FACE_EMBEDDING_EXECUTION_MODE=sync embeds the photo right here. The
+    celery and thread modes leave it pending and, once the upload commits,
+    schedule a batched drain (students/services/embedding_worker.py), so
+    admin uploads, enrollment approval and bulk uploads never wait on
+    face detection or model inference.
 
-    If Celery/Redis is unavailable (e.g., in CI or development), the task
-    queuing will fail gracefully without breaking photo uploads.
+    Failures are recorded on the photo (embedding_status/embedding_error)
+    without breaking the photo upload.
     """
     # Only process new photos
     if not created:
@@ -52,6 +55,13 @@ def process_student_photo_embedding(
         logger.debug(f"No photo data for student photo {instance.photo_id}")
         return
 
+    if settings.FACE_EMBEDDING_EXECUTION_MODE != "sync":
+        from .services.embedding_worker import schedule_photo_embeddings
+
+        # Debounced - a bulk upload is embedded in a few batches
+        transaction.on_commit(schedule_photo_embeddings)
+        return
+
     # Process embedding synchronously (simple approach for Cloud Run)
     try:
         from .services.face_recognition_service import FaceRecognitionService
@@ -71,6 +81,24 @@ def process_student_photo_embedding(
         logger.info("Photo uploaded, embedding generation failed")
 
 
+@receiver(post_save, sender=FaceEmbeddingMetadata)
+def index_face_embedding(sender: type[FaceEmbeddingMetadata], instance: FaceEmbeddingMetadata, **kwargs: Any) -> None:
+    """Add a saved embedding to this process's loaded face identification index once it commits."""
+    from .services.face_identification_service import face_identification_service
+
+    if kwargs.get("raw"):
+        return
+    transaction.on_commit(lambda: face_identification_service.embedding_saved(instance))
+
+
+@receiver(post_delete, sender=FaceEmbeddingMetadata)
+def unindex_face_embedding(sender: type[FaceEmbeddingMetadata], instance: FaceEmbeddingMetadata, **kwargs: Any) -> None:
+    """Drop a deleted embedding from this process's face identification indexes once it commits."""
+    from .services.face_identification_service import face_identification_service
+
+    transaction.on_commit(lambda: face_identification_service.embedding_deleted(instance))
+
+
 # REMOVED: Auto-create parent signal
 # Parents are now created explicitly via /api/v1/parents/register/ endpoint
 # Called from parent_easy app after Firebase login.
@@ -122,3 +122,19 @@ def process_student_photo_embedding_task(photo_id: str) -> dict[str, Any]:
         logger.error(f"Error in async embedding generation for photo {photo_id}: {e}")
         # TODO: Send error notification
         return {"status": "error", "photo_id": photo_id, "error": str(e)}
+
+
+@shared_task  # type: ignore[misc]
+def process_pending_photo_embeddings_task() -> dict[str, int]:
+    """
+    Drain photos pending face embedding in batches (FACE_EMBEDDING_EXECUTION_MODE=celery).
+
+    Queued debounced by students.services.embedding_worker.schedule_photo_embeddings.
+    """
+    from django.core.cache import cache
+
+    from .services.embedding_worker import DRAIN_SCHEDULED_CACHE_KEY, process_pending_photo_embeddings
+
+    # Photos committed from here on schedule the next drain
+    cache.delete(DRAIN_SCHEDULED_CACHE_KEY)
+    return process_pending_photo_embeddings()
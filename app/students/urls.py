@@ -16,5 +16,6 @@ router.register(r"student-parents", views.StudentParentViewSet)
 urlpatterns = [
     path("", include(router.urls)),
     path("kiosk/boarding/", views.KioskBoardingView.as_view(), name="kiosk-boarding"),
+    path("face-identification/", views.FaceIdentificationView.as_view(), name="face-identification"),
     path("photos/<uuid:photo_id>/", views.serve_student_photo, name="student-photo-serve"),
 ]
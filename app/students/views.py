@@ -26,6 +26,8 @@ from .serializers import (
     # BusSerializer removed - Use buses.serializers.BusSerializer instead
     FaceEnrollmentStatusSerializer,
     FaceEnrollmentSubmissionSerializer,
+    FaceIdentificationRequestSerializer,
+    FaceIdentificationResultSerializer,
     ParentSerializer,
     SchoolSerializer,
     StudentListSerializer,
@@ -692,6 +694,43 @@ class KioskBoardingView(APIView):
         )
 
 
+class FaceIdentificationView(APIView):
+    """
+    Search a school's students by face (school admins only).
+
+    Answered from the in-memory face identification index
+    (students/services/face_identification_service.py).
+    """
+
+    permission_classes = [IsSchoolAdmin]
+
+    @extend_schema(
+        request=FaceIdentificationRequestSerializer,
+        responses={200: FaceIdentificationResultSerializer},
+        description="Top-k students of a school by cosine similarity to a photo's best face or to an embedding",
+    )
+    def post(self, request):
+        from .services.face_identification_service import face_identification_service, identification_result
+        from .services.face_recognition_service import PhotoEmbeddingError
+
+        serializer = FaceIdentificationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+        school_id = query["school"].school_id
+        model_name = query["model_name"]
+
+        face = None
+        try:
+            if "image" in query:
+                face, matches = face_identification_service.identify_image(school_id, query["image"], model_name, query["k"], query.get("min_score"))
+            else:
+                matches = face_identification_service.identify(school_id, query["embedding"], model_name, query["k"], query.get("min_score"))
+        except (PhotoEmbeddingError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(FaceIdentificationResultSerializer(identification_result(model_name, face, matches)).data)
+
+
 # Serve student photos from database
 def serve_student_photo(request, photo_id):
     """Serve student photo from database binary field"""
@@ -18,6 +18,16 @@ MOBILEFACENET_CONFIG = {
     "input_range": (-1.0, 1.0),  # Normalized range
     "mean": [127.5, 127.5, 127.5],
     "std": [128.0, 128.0, 128.0],
+    "max_batch_size": 32,  # Faces per interpreter invoke in generate_embeddings
+    # Stored as FaceEmbeddingMetadata.model_version. Bump when the weights or
+    # preprocessing change, then run `manage.py reembed_photos`
+    "version": "1",
+}
+
+# Face Detection Model Files (OpenCV DNN ResNet-SSD)
+FACE_DETECTION_MODEL_FILES = {
+    "config": FACE_MODELS_DIR / "deploy.prototxt",
+    "weights": FACE_MODELS_DIR / "res10_300x300_ssd_iter_140000.caffemodel",
 }
 
 # Face Detection Configuration
@@ -26,11 +36,13 @@ FACE_DETECTION_CONFIG = {
     "min_detection_confidence": 0.7,
     "min_face_size": (50, 50),  # pixels
     "max_faces": 1,
+    "max_batch_size": 16,  # Images per forward pass in FaceDetector.detect_batch
 }
 
 # Processing Configuration
 PROCESSING_CONFIG = {
-    "max_image_size": (1920, 1080),
+    "max_image_size": (1920, 1080),  # Decoded photo bounds (long, short side) - face crops come from this size
+    "detection_image_size": (400, 300),  # Detector input bounds - ResNet-SSD runs at 300x300
     "jpeg_quality": 95,
     "timeout_seconds": 30,
     "max_faces_per_image": 1,  # Only process single face per photo
@@ -40,6 +52,8 @@ PROCESSING_CONFIG = {
 FACE_RECOGNITION_MODELS = {
     "mobilefacenet": {
         "class": "ml_models.face_recognition.inference.mobilefacenet.MobileFaceNet",
+        "model_path": MOBILEFACENET_CONFIG["model_path"],
+        "version": MOBILEFACENET_CONFIG["version"],
         "dimensions": MOBILEFACENET_CONFIG["output_dims"],
         "enabled": True,
         "quality_threshold": 0.7,
@@ -50,13 +64,16 @@ FACE_RECOGNITION_MODELS = {
 
 # Service-level config (business logic)
 FACE_RECOGNITION_SERVICE_CONFIG = {
-    "max_concurrent_processes": 2,
+    "max_concurrent_processes": 2,  # Pooled detector / model instances per process
+    "interpreter_num_threads": None,  # Threads per instance (None = CPU cores / pool size)
     "retry_attempts": 3,
     "embedding_batch_size": 10,
     "max_image_size_mb": 10,
     "max_faces_per_image": PROCESSING_CONFIG["max_faces_per_image"],
 }
 
+# Model loading (ml_models/face_recognition/registry.py): with preload, Celery reads
+# model weights before forking workers and every worker warms its models up at start
 MODEL_LOADING_CONFIG = {
     "preload_enabled_models": True,
 }
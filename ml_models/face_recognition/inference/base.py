@@ -4,11 +4,21 @@ Follows Abstract Factory pattern - industry standard.
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from pathlib import Path
 
 import numpy as np
 
 
+def l2_normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2 normalize every row of an (N, dims) matrix in one vectorized op.
+    Zero rows stay zero.
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
 class BaseFaceRecognitionModel(ABC):
     """
     Abstract base class for all face recognition models.
@@ -85,6 +95,23 @@ class BaseFaceRecognitionModel(ABC):
         embedding = self.postprocess(raw_output)
         return embedding
 
+    def generate_embeddings(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Batch entry point: N images → (N, dims) embedding matrix.
+
+        Default loops generate_embedding(); models with batched inference
+        override it.
+
+        Args:
+            images: RGB images (HxWx3), sizes may differ
+
+        Returns:
+            float32 matrix of normalized embeddings, one row per image
+        """
+        if len(images) == 0:
+            return np.empty((0, self.embedding_dims), dtype=np.float32)
+        return np.stack([self.generate_embedding(image) for image in images]).astype(np.float32, copy=False)
+
     @property
     @abstractmethod
     def input_shape(self) -> tuple[int, int, int]:
@@ -4,13 +4,14 @@ Optimized for production - matches frontend exactly.
 LAZY LOADING: TensorFlow is imported only when model is actually loaded.
 """
 
+from collections.abc import Sequence
 from typing import TYPE_CHECKING, cast
 
 import numpy as np
 
 from ml_models.config import MOBILEFACENET_CONFIG
 
-from .base import BaseFaceRecognitionModel
+from .base import BaseFaceRecognitionModel, l2_normalize_rows
 
 if TYPE_CHECKING:
     pass
@@ -20,9 +21,15 @@ class MobileFaceNet(BaseFaceRecognitionModel):
     """
     MobileFaceNet implementation using TensorFlow Lite.
     Same model as frontend - zero drift guaranteed.
+    Not thread-safe: share instances through the registry's InstancePool.
     """
 
-    def __init__(self):
+    def __init__(self, num_threads: int | None = None):
+        """
+        Args:
+            num_threads: Interpreter CPU threads (None = LiteRT default)
+        """
+        self.num_threads = num_threads
         model_path = MOBILEFACENET_CONFIG["model_path"]
         super().__init__(model_path)
 
@@ -36,13 +43,20 @@ class MobileFaceNet(BaseFaceRecognitionModel):
         """Load TFLite model - lazy import ai_edge_litert here."""
         from ai_edge_litert.interpreter import Interpreter
 
-        self.interpreter = Interpreter(model_path=str(self.model_path))
+        from ml_models.face_recognition.registry import model_registry
+
+        # Model bytes are read once per process (shared copy-on-write when preloaded before fork)
+        self.interpreter = Interpreter(model_content=model_registry.read_weights(self.model_path), num_threads=self.num_threads)
         self.interpreter.allocate_tensors()
 
         # Get input/output details
         self.input_details = self.interpreter.get_input_details()[0]
         self.output_details = self.interpreter.get_output_details()[0]
 
+        # Batch dimension the interpreter is currently allocated for; None once
+        # resizing failed (fixed-batch model - batches loop invoke instead)
+        self._batch_size: int | None = int(self.input_details["shape"][0])
+
     def preprocess(self, image: np.ndarray) -> np.ndarray:
         """
         Preprocess image to match frontend preprocessing.
@@ -68,13 +82,101 @@ class MobileFaceNet(BaseFaceRecognitionModel):
 
         return image
 
+    def preprocess_batch(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Preprocess N face crops into one contiguous input tensor.
+
+        Args:
+            images: RGB images (HxWx3), values 0-255, sizes may differ
+
+        Returns:
+            Preprocessed batch, shape (N, 112, 112, 3), values -1 to 1
+        """
+        import cv2
+
+        height, width, channels = self.input_shape
+        batch = np.empty((len(images), height, width, channels), dtype=np.float32)
+        for index, image in enumerate(images):
+            batch[index] = cv2.resize(image, (width, height))
+
+        # Normalize the whole batch in place: (pixel - 127.5) / 128.0
+        batch -= np.array(MOBILEFACENET_CONFIG["mean"], dtype=np.float32)
+        batch /= np.array(MOBILEFACENET_CONFIG["std"], dtype=np.float32)
+        return batch
+
     def predict(self, preprocessed_image: np.ndarray) -> np.ndarray:
         """Run TFLite inference."""
+        self._resize_input(1)
         self.interpreter.set_tensor(self.input_details["index"], preprocessed_image)
         self.interpreter.invoke()
         output = self.interpreter.get_tensor(self.output_details["index"])
         return output
 
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run TFLite inference on a preprocessed batch.
+
+        One invoke with the input resized to the batch size where the model
+        allows it; otherwise one invoke per row into a preallocated output.
+
+        Returns:
+            Raw output, shape (N, 192)
+        """
+        count = len(batch)
+        if self._resize_input(count):
+            self.interpreter.set_tensor(self.input_details["index"], batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_details["index"]).reshape(count, -1)
+
+        output = np.empty((count, self.embedding_dims), dtype=np.float32)
+        for index in range(count):
+            self.interpreter.set_tensor(self.input_details["index"], batch[index : index + 1])
+            self.interpreter.invoke()
+            output[index] = self.interpreter.get_tensor(self.output_details["index"]).reshape(-1)
+        return output
+
+    def generate_embeddings(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Batch inference: N face crops → (N, 192) L2-normalized embeddings.
+
+        Processed in chunks of max_batch_size to bound interpreter memory.
+        """
+        if len(images) == 0:
+            return np.empty((0, self.embedding_dims), dtype=np.float32)
+
+        max_batch_size = cast(int, MOBILEFACENET_CONFIG["max_batch_size"])
+        raw_output = np.empty((len(images), self.embedding_dims), dtype=np.float32)
+        for start in range(0, len(images), max_batch_size):
+            chunk = images[start : start + max_batch_size]
+            raw_output[start : start + len(chunk)] = self.predict_batch(self.preprocess_batch(chunk))
+
+        return l2_normalize_rows(raw_output)
+
+    def _resize_input(self, batch_size: int) -> bool:
+        """
+        Allocate the interpreter for batch_size inputs.
+
+        Returns False when the model has a fixed batch of 1 (callers then
+        invoke row by row).
+        """
+        if self._batch_size == batch_size:
+            return True
+        if self._batch_size is None:
+            return batch_size == 1
+
+        try:
+            self.interpreter.resize_tensor_input(self.input_details["index"], [batch_size, *self.input_shape])
+            self.interpreter.allocate_tensors()
+        except (RuntimeError, ValueError):
+            # Fixed-batch model - restore single-image allocation and loop instead
+            self.interpreter.resize_tensor_input(self.input_details["index"], [1, *self.input_shape])
+            self.interpreter.allocate_tensors()
+            self._batch_size = None
+            return batch_size == 1
+
+        self._batch_size = batch_size
+        return True
+
     def postprocess(self, raw_output: np.ndarray) -> np.ndarray:
         """
         L2 normalize embedding (same as frontend).
@@ -85,14 +187,8 @@ class MobileFaceNet(BaseFaceRecognitionModel):
         Returns:
             Normalized embedding (192,)
         """
-        embedding = raw_output.squeeze()  # Remove batch dim
-
-        # L2 normalization
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
-
-        return embedding
+        # L2 normalization (remove batch dim)
+        return l2_normalize_rows(raw_output.reshape(1, -1))[0]
 
     @property
     def input_shape(self) -> tuple[int, int, int]:
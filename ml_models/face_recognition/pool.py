@@ -0,0 +1,135 @@
+"""
+Bounded Instance Pool
+Thread-safe checkout/return of model instances that must not be shared
+between threads (TFLite interpreters, OpenCV DNN nets).
+
+At most `size` instances ever exist, so memory stays predictable; they are
+created lazily on first demand and a checkout blocks while all are busy.
+PooledModel / PooledFaceDetector are drop-in wrappers that check an instance
+out for the duration of each inference call.
+"""
+
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+import queue
+import threading
+from typing import Any, Generic, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+class InstancePool(Generic[T]):
+    """Up to `size` instances built by `factory`, handed out one thread at a time."""
+
+    def __init__(self, factory: Callable[[], T], size: int, name: str = "") -> None:
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.name = name
+        self._idle: queue.LifoQueue[T] = queue.LifoQueue()  # Most recently used first - warm caches
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None) -> Iterator[T]:
+        """
+        Borrow an instance for the duration of the block.
+
+        Raises:
+            TimeoutError: No instance became free within timeout seconds
+        """
+        instance = self._acquire(timeout)
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(instance)
+
+    def warm(self, run: Callable[[T], Any]) -> None:
+        """Create every instance of the pool and call run(instance) on each."""
+        borrowed = [self._acquire(None) for _ in range(self.size)]
+        try:
+            for instance in borrowed:
+                run(instance)
+        finally:
+            with self._lock:
+                self._in_use -= len(borrowed)
+            for instance in borrowed:
+                self._idle.put(instance)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"pool_size": self.size, "instances": self._created, "in_use": self._in_use}
+
+    def _acquire(self, timeout: float | None) -> T:
+        try:
+            instance = self._idle.get_nowait()
+        except queue.Empty:
+            instance = self._create_or_wait(timeout)
+        with self._lock:
+            self._in_use += 1
+        return instance
+
+    def _create_or_wait(self, timeout: float | None) -> T:
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1  # Reserve the slot before the (slow) factory call
+        if not can_create:
+            try:
+                return self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No {self.name or 'pool'} instance free after {timeout}s") from None
+
+        try:
+            return self.factory()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+
+
+class PooledModel:
+    """Face recognition model facade - each call runs on a pooled instance."""
+
+    def __init__(self, pool: InstancePool[Any]) -> None:
+        self.pool = pool
+
+    def generate_embedding(self, image: np.ndarray) -> np.ndarray:
+        with self.pool.checkout() as model:
+            return model.generate_embedding(image)
+
+    def generate_embeddings(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        with self.pool.checkout() as model:
+            return model.generate_embeddings(images)
+
+
+class PooledFaceDetector:
+    """FaceDetector facade - each detection runs on a pooled DNN net."""
+
+    def __init__(self, pool: InstancePool[Any]) -> None:
+        self.pool = pool
+
+    def detect(self, image: np.ndarray) -> list[Any]:
+        with self.pool.checkout() as detector:
+            return detector.detect(image)
+
+    def detect_bgr(self, image_bgr: np.ndarray, scale: float = 1.0) -> list[Any]:
+        with self.pool.checkout() as detector:
+            return detector.detect_bgr(image_bgr, scale)
+
+    def detect_batch(self, images_bgr: Sequence[np.ndarray], scales: Sequence[float] | None = None) -> list[list[Any]]:
+        with self.pool.checkout() as detector:
+            return detector.detect_batch(images_bgr, scales)
+
+    @staticmethod
+    def crop_face(image: np.ndarray, detection: Any) -> np.ndarray:
+        # Plain array slicing - no pooled net needed
+        from ml_models.face_recognition.preprocessing.face_detector import crop_face
+
+        return crop_face(image, detection)
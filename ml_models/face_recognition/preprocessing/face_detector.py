@@ -4,13 +4,13 @@ Lightweight (~10MB), accurate (90-95%), production-ready.
 Uses pre-trained ResNet-based face detection model.
 """
 
+from collections.abc import Sequence
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Any, cast
 
 import numpy as np
 
-from ml_models.config import FACE_DETECTION_CONFIG
+from ml_models.config import FACE_DETECTION_CONFIG, FACE_DETECTION_MODEL_FILES
 
 
 @dataclass
@@ -22,6 +22,33 @@ class FaceDetection:
     landmarks: list | None = None
 
 
+def crop_face(image: np.ndarray, detection: FaceDetection) -> np.ndarray:
+    """
+    Crop face from image with padding.
+
+    Args:
+        image: RGB image
+        detection: Face detection result
+
+    Returns:
+        Cropped face image
+    """
+    x, y, w, h = detection.bbox
+
+    # Add 10% padding
+    padding = 0.1
+    pad_w = int(w * padding)
+    pad_h = int(h * padding)
+
+    x1 = max(0, x - pad_w)
+    y1 = max(0, y - pad_h)
+    x2 = min(image.shape[1], x + w + pad_w)
+    y2 = min(image.shape[0], y + h + pad_h)
+
+    face_crop = image[y1:y2, x1:x2]
+    return face_crop
+
+
 class FaceDetector:
     """
     OpenCV DNN face detector using ResNet-SSD.
@@ -29,28 +56,39 @@ class FaceDetector:
     - Lightweight: ~10MB model files
     - Fast: Optimized for CPU inference
     - Robust: Handles angles, lighting, occlusions
+    - Not thread-safe: share instances through the registry's InstancePool
     """
 
-    def __init__(self) -> None:
+    def __init__(self, num_threads: int | None = None) -> None:
         self.config = FACE_DETECTION_CONFIG
+        self.num_threads = num_threads
         self.net: Any = None  # Lazy load on first use (cv2 types not available)
 
     def _load_model(self) -> None:
         """Lazy load OpenCV DNN face detection model."""
         import cv2
 
+        from ml_models.face_recognition.registry import model_registry
+
         # Load ResNet-SSD model for face detection
-        model_dir = Path(__file__).parent.parent / "models"
-        model_path = model_dir / "res10_300x300_ssd_iter_140000.caffemodel"
-        config_path = model_dir / "deploy.prototxt"
+        model_path = FACE_DETECTION_MODEL_FILES["weights"]
+        config_path = FACE_DETECTION_MODEL_FILES["config"]
 
         if not model_path.exists() or not config_path.exists():
             raise FileNotFoundError(
-                f"Face detection model files not found at {model_dir}. "
+                f"Face detection model files not found at {model_path.parent}. "
                 f"Download from: https://github.com/opencv/opencv/tree/master/samples/dnn/face_detector"
             )
 
-        self.net = cv2.dnn.readNetFromCaffe(str(config_path), str(model_path))  # type: ignore[assignment]
+        if self.num_threads:
+            # OpenCV's thread count is process-wide, not per net
+            cv2.setNumThreads(self.num_threads)
+
+        # Build from in-memory buffers (shared copy-on-write when preloaded before fork)
+        self.net = cv2.dnn.readNetFromCaffe(  # type: ignore[assignment]
+            np.frombuffer(model_registry.read_weights(config_path), dtype=np.uint8),
+            np.frombuffer(model_registry.read_weights(model_path), dtype=np.uint8),
+        )
 
     def detect(self, image: np.ndarray) -> list[FaceDetection]:
         """
@@ -62,90 +100,121 @@ class FaceDetector:
         Returns:
             List of face detections, sorted by confidence (highest first)
         """
-        # Lazy load model on first use
-        if self.net is None:
-            self._load_model()
-
         import cv2
 
-        h, w = image.shape[:2]
-        detections = []
-
         # Convert RGB to BGR for OpenCV
-        image_bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-        # Create blob and run detection
-        blob = cv2.dnn.blobFromImage(image_bgr, 1.0, (300, 300), (104.0, 177.0, 123.0))
-        self.net.setInput(blob)  # type: ignore[attr-defined]
-        detections_dnn = self.net.forward()  # type: ignore[attr-defined]
+        return self.detect_bgr(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
 
-        # Ensure min_confidence is a float — config.get returns Any/object
-        _mc = self.config.get("min_detection_confidence", 0.5)
-        if isinstance(_mc, (float, int)):
-            min_confidence = float(_mc)
-        elif isinstance(_mc, str):
-            try:
-                min_confidence = float(_mc)
-            except ValueError:
-                min_confidence = 0.5
-        else:
-            # Fallback to sensible default
-            min_confidence = 0.5
-
-        for i in range(detections_dnn.shape[2]):
-            confidence = float(detections_dnn[0, 0, i, 2])
-
-            if confidence > min_confidence:
-                # Get bounding box coordinates
-                box = detections_dnn[0, 0, i, 3:7] * np.array([w, h, w, h])
-                x, y, x2, y2 = box.astype(int)
-                width = x2 - x
-                height = y2 - y
-
-                # Validate minimum size
-                min_face_size = cast(tuple[int, int], self.config.get("min_face_size", (30, 30)))
-                if width < min_face_size[0] or height < min_face_size[1]:
-                    continue
-
-                detections.append(
-                    FaceDetection(
-                        bbox=(int(x), int(y), int(width), int(height)),
-                        confidence=confidence,
-                    )
-                )
+    def detect_bgr(self, image_bgr: np.ndarray, scale: float = 1.0) -> list[FaceDetection]:
+        """
+        Detect faces in a BGR image, e.g. image_loader's downscaled detection copy.
 
-        # Sort by confidence (highest first)
-        detections.sort(key=lambda d: d.confidence, reverse=True)
+        Args:
+            image_bgr: BGR image (HxWx3), uint8
+            scale: Factor from image_bgr to the coordinates wanted in the results
+                (DecodedImage.detection_scale); min_face_size applies after scaling
 
-        # Limit to max_faces
-        max_faces = cast(int, self.config.get("max_faces", 1))
-        return detections[:max_faces]
+        Returns:
+            List of face detections, sorted by confidence (highest first)
+        """
+        return self.detect_batch([image_bgr], [scale])[0]
 
-    def crop_face(self, image: np.ndarray, detection: FaceDetection) -> np.ndarray:
+    def detect_batch(self, images_bgr: Sequence[np.ndarray], scales: Sequence[float] | None = None) -> list[list[FaceDetection]]:
         """
-        Crop face from image with padding.
+        Detect faces in several BGR images with one forward pass per chunk.
+
+        Images are stacked into a single blob (cv2.dnn.blobFromImages, each
+        resized to 300x300) of at most FACE_DETECTION_CONFIG["max_batch_size"]
+        images, and the detections of the whole chunk are filtered at once.
 
         Args:
-            image: RGB image
-            detection: Face detection result
+            images_bgr: BGR images (HxWx3), uint8, sizes may differ
+            scales: Per-image factor to result coordinates, see detect_bgr (default 1.0)
 
         Returns:
-            Cropped face image
+            One list of detections per image, sorted by confidence (highest first)
         """
-        x, y, w, h = detection.bbox
+        # Lazy load model on first use
+        if self.net is None:
+            self._load_model()
 
-        # Add 10% padding
-        padding = 0.1
-        pad_w = int(w * padding)
-        pad_h = int(h * padding)
+        import cv2
+
+        scales = list(scales) if scales is not None else [1.0] * len(images_bgr)
+        max_batch_size = int(cast(int, self.config.get("max_batch_size", 16)))
+        results: list[list[FaceDetection]] = []
+        for start in range(0, len(images_bgr), max_batch_size):
+            chunk = images_bgr[start : start + max_batch_size]
+
+            # Create blob and run detection
+            blob = cv2.dnn.blobFromImages(chunk, 1.0, (300, 300), (104.0, 177.0, 123.0))
+            self.net.setInput(blob)  # type: ignore[attr-defined]
+            detections_dnn = self.net.forward()  # type: ignore[attr-defined]
+
+            results.extend(self._postprocess(detections_dnn, chunk, scales[start : start + max_batch_size]))
+        return results
+
+    def _postprocess(self, detections_dnn: np.ndarray, images: Sequence[np.ndarray], scales: Sequence[float]) -> list[list[FaceDetection]]:
+        """
+        Turn raw SSD output into per-image detections.
+
+        Output rows are [image_id, label, confidence, x1, y1, x2, y2] with
+        relative coordinates; confidence and size filters run vectorized.
+        """
+        rows = detections_dnn.reshape(-1, 7)
+        image_ids = rows[:, 0].astype(int)
+        confidences = rows[:, 2]
 
-        x1 = max(0, x - pad_w)
-        y1 = max(0, y - pad_h)
-        x2 = min(image.shape[1], x + w + pad_w)
-        y2 = min(image.shape[0], y + h + pad_h)
+        # Pixel size of each row's image, times its scale
+        dims = np.array([[w, h, w, h] for h, w in (image.shape[:2] for image in images)], dtype=np.float64)
+        dims *= np.asarray(scales, dtype=np.float64)[:, None]
 
-        face_crop = image[y1:y2, x1:x2]
-        return face_crop
+        # Padding rows carry image_id -1
+        valid = (image_ids >= 0) & (image_ids < len(images)) & (confidences > self._min_confidence())
+        boxes = (rows[valid, 3:7] * dims[image_ids[valid]]).astype(int)
+        widths = boxes[:, 2] - boxes[:, 0]
+        heights = boxes[:, 3] - boxes[:, 1]
+
+        # Validate minimum size
+        min_face_size = cast(tuple[int, int], self.config.get("min_face_size", (30, 30)))
+        large_enough = (widths >= min_face_size[0]) & (heights >= min_face_size[1])
+
+        keep_ids = image_ids[valid][large_enough]
+        keep_confidences = confidences[valid][large_enough]
+        keep_boxes = np.column_stack([boxes[:, :2], widths, heights])[large_enough]
+
+        # Sort by confidence (highest first), limit to max_faces per image
+        max_faces = cast(int, self.config.get("max_faces", 1))
+        detections: list[list[FaceDetection]] = [[] for _ in images]
+        for index in np.argsort(-keep_confidences, kind="stable"):
+            image_detections = detections[keep_ids[index]]
+            if len(image_detections) < max_faces:
+                x, y, width, height = keep_boxes[index]
+                image_detections.append(
+                    FaceDetection(
+                        bbox=(int(x), int(y), int(width), int(height)),
+                        confidence=float(keep_confidences[index]),
+                    )
+                )
+        return detections
+
+    def _min_confidence(self) -> float:
+        # Ensure min_confidence is a float — config.get returns Any/object
+        _mc = self.config.get("min_detection_confidence", 0.5)
+        if isinstance(_mc, (float, int)):
+            return float(_mc)
+        if isinstance(_mc, str):
+            try:
+                return float(_mc)
+            except ValueError:
+                return 0.5
+        # Fallback to sensible default
+        return 0.5
+
+    @staticmethod
+    def crop_face(image: np.ndarray, detection: FaceDetection) -> np.ndarray:
+        """Crop face from image with padding (needs no model - see crop_face)."""
+        return crop_face(image, detection)
 
     def __del__(self):
         """Cleanup resources."""
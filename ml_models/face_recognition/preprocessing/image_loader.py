@@ -0,0 +1,86 @@
+"""
+Photo Decoding for Face Detection
+Decodes a photo once, at reduced size, into the two arrays the pipeline needs.
+
+Phone photos are ~12MP but the ResNet-SSD detector only sees 300x300 and the
+embedding models 112x112 face crops. JPEGs are therefore decoded with PIL's
+draft mode (libjpeg DCT scaling: 1/2, 1/4 or 1/8 size straight out of the
+decoder, no full-resolution bitmap), capped at PROCESSING_CONFIG["max_image_size"]:
+- rgb: crop source, moderately sized so face crops keep their detail
+- detection_bgr: small BGR uint8 copy handed directly to the OpenCV detector
+"""
+
+from dataclasses import dataclass
+from io import BytesIO
+
+import numpy as np
+
+from ml_models.config import PROCESSING_CONFIG
+
+
+@dataclass
+class DecodedImage:
+    """Photo decoded for detection and cropping."""
+
+    rgb: np.ndarray  # HxWx3 uint8, within max_image_size
+    detection_bgr: np.ndarray  # HxWx3 uint8, within detection_image_size
+    detection_scale: float  # rgb pixels per detection_bgr pixel
+
+
+def fit_within(size: tuple[int, int], bounds: tuple[int, int]) -> tuple[int, int]:
+    """
+    Largest size with size's aspect ratio inside bounds (never upscales).
+
+    Bounds are orientation-agnostic: (1920, 1080) caps the long side at 1920
+    and the short side at 1080 for portrait and landscape photos alike.
+    """
+    width, height = size
+    long_bound, short_bound = max(bounds), min(bounds)
+    ratio = min(1.0, long_bound / max(width, height), short_bound / min(width, height))
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+def decode_image(
+    photo_data: bytes,
+    max_size: tuple[int, int] | None = None,
+    detection_size: tuple[int, int] | None = None,
+) -> DecodedImage:
+    """
+    Decode photo bytes once into a crop source and a detector input.
+
+    Args:
+        photo_data: Encoded image (JPEG, PNG, ...)
+        max_size: Crop source bounds (default PROCESSING_CONFIG["max_image_size"])
+        detection_size: Detector input bounds (default PROCESSING_CONFIG["detection_image_size"])
+
+    Raises:
+        OSError: Unreadable or truncated image (PIL.UnidentifiedImageError included)
+    """
+    from PIL import Image
+
+    max_size = max_size or PROCESSING_CONFIG["max_image_size"]
+    detection_size = detection_size or PROCESSING_CONFIG["detection_image_size"]
+
+    image = Image.open(BytesIO(photo_data))
+    # JPEG only (no-op otherwise): decode directly to RGB at the smallest DCT scale still >= target
+    image.draft("RGB", fit_within(image.size, max_size))
+    # Single decode of the pixel data - raises on corrupt / truncated input
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    else:
+        image.load()
+
+    target = fit_within(image.size, max_size)
+    if target != image.size:
+        image = image.resize(target, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    detection_image = image
+    detection_target = fit_within(image.size, detection_size)
+    if detection_target != image.size:
+        detection_image = image.resize(detection_target, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    return DecodedImage(
+        rgb=np.asarray(image),
+        detection_bgr=np.ascontiguousarray(np.asarray(detection_image)[:, :, ::-1]),
+        detection_scale=image.width / detection_image.width,
+    )
@@ -0,0 +1,208 @@
+"""
+Process-wide Model Registry
+A bounded pool of each face model per process, shared by every
+FaceRecognitionService (signal, Celery task, batch worker).
+
+Loading reads weights from disk and builds the TFLite interpreter / OpenCV
+DNN net, so it now happens once per pooled instance and process instead of
+once per photo. Interpreters and nets are not thread-safe: each inference
+checks an instance out of an InstancePool (pool.py) of
+FACE_RECOGNITION_SERVICE_CONFIG["max_concurrent_processes"] instances, each
+running interpreter_num_threads threads.
+- preload_weights(): read the model files into memory. Run it in a pre-fork
+  parent (Celery worker_init) so forked workers share the pages copy-on-write.
+- warm_up(): build every pooled instance from those bytes and run one dummy
+  inference on each, so the first real photo pays no first-call cost.
+  Runtime objects (interpreters, OpenCV thread pools) are not fork-safe and
+  are only ever created after fork (worker_process_init).
+
+Both honour MODEL_LOADING_CONFIG["preload_enabled_models"]; without preload,
+instances still load lazily on first use. metrics() reports load / warm-up
+time, the resident memory loads added and pool usage.
+"""
+
+from importlib import import_module
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any
+
+from ml_models.config import (
+    FACE_DETECTION_MODEL_FILES,
+    FACE_RECOGNITION_MODELS,
+    FACE_RECOGNITION_SERVICE_CONFIG,
+    MODEL_LOADING_CONFIG,
+)
+
+from .pool import InstancePool, PooledFaceDetector, PooledModel
+
+logger = logging.getLogger(__name__)
+
+FACE_DETECTOR_KEY = "face_detector"
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process."""
+    import psutil
+
+    return int(psutil.Process().memory_info().rss)
+
+
+def pool_size() -> int:
+    """Instances per model (= photos one process can run inference on at once)."""
+    return max(1, int(FACE_RECOGNITION_SERVICE_CONFIG["max_concurrent_processes"]))
+
+
+def interpreter_num_threads() -> int:
+    """Threads per instance - by default the CPU cores split across the pool."""
+    configured = FACE_RECOGNITION_SERVICE_CONFIG["interpreter_num_threads"]
+    if configured:
+        return int(configured)
+    return max(1, (os.cpu_count() or 1) // pool_size())
+
+
+class ModelRegistry:
+    """Lazily loaded, process-wide model instance pools and weight buffers."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._weights: dict[Path, bytes] = {}
+        self._pools: dict[str, InstancePool[Any]] = {}
+        self._metrics: dict[str, dict[str, Any]] = {}
+
+    def read_weights(self, path: Path) -> bytes:
+        """
+        Model file contents, read from disk once per process.
+
+        Bytes read before fork are inherited by every worker process.
+        """
+        with self._lock:
+            if path not in self._weights:
+                self._weights[path] = path.read_bytes()
+            return self._weights[path]
+
+    def get_model(self, model_name: str) -> PooledModel:
+        """Pooled instances of an enabled FACE_RECOGNITION_MODELS entry."""
+        return PooledModel(self._pool(model_name, lambda: self._create_model(model_name)))
+
+    def get_face_detector(self) -> PooledFaceDetector:
+        """Pooled FaceDetector instances (DNN net loaded per instance)."""
+        return PooledFaceDetector(self._pool(FACE_DETECTOR_KEY, self._create_face_detector))
+
+    def preload_weights(self) -> int:
+        """
+        Read the detector and enabled model files into memory (pre-fork).
+
+        Returns:
+            int: Bytes read
+        """
+        if not MODEL_LOADING_CONFIG["preload_enabled_models"]:
+            return 0
+
+        paths = [*FACE_DETECTION_MODEL_FILES.values()]
+        paths += [config["model_path"] for config in FACE_RECOGNITION_MODELS.values() if config["enabled"] and "model_path" in config]
+        total = 0
+        for path in paths:
+            try:
+                total += len(self.read_weights(path))
+            except OSError as e:
+                # Missing weights surface when the model is first used
+                logger.warning(f"Could not preload model weights {path}: {e}")
+        logger.info(f"Preloaded {total / 2**20:.1f} MiB of model weights in process {os.getpid()}")
+        return total
+
+    def warm_up(self) -> dict[str, dict[str, Any]]:
+        """
+        Load every pooled detector / model instance and run one dummy inference on each.
+
+        Returns:
+            dict: metrics() after warm-up
+        """
+        if not MODEL_LOADING_CONFIG["preload_enabled_models"]:
+            return self.metrics()
+
+        import numpy as np
+
+        dummy_image = np.zeros((300, 400, 3), dtype=np.uint8)  # Size of a decoded photo's detection copy
+        targets: list[tuple[str, InstancePool[Any], Any]] = [
+            (FACE_DETECTOR_KEY, self.get_face_detector().pool, lambda detector: detector.detect_bgr(dummy_image))
+        ]
+        for model_name, config in FACE_RECOGNITION_MODELS.items():
+            if config["enabled"]:
+                targets.append((model_name, self.get_model(model_name).pool, lambda model: model.generate_embedding(dummy_image[:112, :112])))
+
+        # Creates every pooled instance, then pays the first-inference cost
+        # (buffer allocation, kernel setup) on each
+        for name, pool, run_inference in targets:
+            inference_seconds: list[float] = []
+
+            def timed(instance: Any, run_inference: Any = run_inference, inference_seconds: list[float] = inference_seconds) -> None:
+                start = time.perf_counter()
+                run_inference(instance)
+                inference_seconds.append(time.perf_counter() - start)
+
+            try:
+                pool.warm(timed)
+            except Exception as e:
+                logger.error(f"Warm-up failed for {name}: {e}")
+                continue
+            with self._lock:
+                self._metrics.setdefault(name, {})["warmup_seconds"] = max(inference_seconds)
+
+        logger.info(f"Warmed up face models in process {os.getpid()}: {self.metrics()}")
+        return self.metrics()
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """
+        Per model: load seconds (latest instance), slowest first inference,
+        resident memory added by all instances and pool usage.
+        """
+        with self._lock:
+            return {name: {**self._metrics.get(name, {}), **pool.stats(), "pid": os.getpid()} for name, pool in self._pools.items()}
+
+    def clear(self) -> None:
+        """Drop every pool, buffer and metric (tests)."""
+        with self._lock:
+            self._weights.clear()
+            self._pools.clear()
+            self._metrics.clear()
+
+    def _pool(self, name: str, create: Any) -> InstancePool[Any]:
+        with self._lock:
+            if name not in self._pools:
+                self._pools[name] = InstancePool(lambda: self._timed_load(name, create), pool_size(), name=name)
+            return self._pools[name]
+
+    def _create_model(self, model_name: str) -> Any:
+        module_path, class_name = FACE_RECOGNITION_MODELS[model_name]["class"].rsplit(".", 1)
+        model_class = getattr(import_module(module_path), class_name)
+        return model_class(num_threads=interpreter_num_threads())
+
+    def _create_face_detector(self) -> Any:
+        from ml_models.face_recognition.preprocessing.face_detector import FaceDetector
+
+        detector = FaceDetector(num_threads=interpreter_num_threads())
+        detector._load_model()  # Load the net now so the pooled instance is ready (and timed)
+        return detector
+
+    def _timed_load(self, name: str, load: Any) -> Any:
+        """
+        Call load() and record its wall time and the resident memory it added.
+
+        RSS deltas are approximate when several instances load concurrently.
+        """
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        result = load()
+        load_seconds = time.perf_counter() - start
+        with self._lock:
+            metrics = self._metrics.setdefault(name, {})
+            metrics["load_seconds"] = load_seconds  # Latest instance
+            metrics["rss_delta_bytes"] = metrics.get("rss_delta_bytes", 0) + _rss_bytes() - rss_before
+        logger.info(f"Loaded {name} in {load_seconds:.2f}s")
+        return result
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Benchmark the in-memory face identification index.
+
+Builds FaceIndex instances from synthetic embeddings (N embeddings, --per-student
+embeddings per student, UUID ids like the database rows) and measures: build
+time, memory (embedding matrix and total Python allocations via tracemalloc,
+both also per 10k embeddings) and top-k query latency (median and p95 of
+--queries noisy copies of indexed embeddings, one matmul each). No database
+needed - loading from FaceEmbeddingMetadata adds the query time on top.
+
+Results are written as JSON so runs can be compared across commits.
+
+Usage (from the repository root):
+    python scripts/benchmark_face_identification.py
+    python scripts/benchmark_face_identification.py --sizes 10000,100000 --dimensions 192 --k 10
+    python scripts/benchmark_face_identification.py --output identification.json
+"""
+
+import argparse
+from datetime import UTC, datetime
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess  # nosec B404
+import sys
+import time
+import tracemalloc
+import uuid
+
+import django
+
+# Setup Django
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "app"))
+sys.path.insert(0, str(REPO_ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bus_kiosk_backend.settings")
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from students.services.face_identification_service import FaceIndex  # noqa: E402
+
+DEFAULT_SIZES = "1000,10000,50000,100000"
+
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()  # noqa: S603, S607  # nosec B603 B607
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_index(vectors, per_student):
+    index = FaceIndex(vectors.shape[1], capacity=len(vectors))
+    student_id = None
+    for row, vector in enumerate(vectors):
+        if row % per_student == 0:
+            student_id = uuid.uuid4()
+        index.upsert(uuid.uuid4(), student_id, uuid.uuid4(), vector)
+    return index
+
+
+def run(options):
+    rng = np.random.default_rng(0)
+    results = []
+    for size in options.sizes:
+        vectors = rng.standard_normal((size, options.dimensions)).astype(np.float32)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = build_index(vectors, options.per_student)
+        build_seconds = time.perf_counter() - start
+        total_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Queries: indexed faces seen again with noise, like a new photo of an enrolled student
+        targets = rng.integers(0, size, options.queries)
+        queries = vectors[targets] + rng.standard_normal((options.queries, options.dimensions)).astype(np.float32) * 0.3
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, options.k)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+
+        result = {
+            "embeddings": size,
+            "students": index.student_count,
+            "dimensions": options.dimensions,
+            "build_seconds": build_seconds,
+            "matrix_bytes": index.nbytes,
+            "total_bytes": total_bytes,
+            "matrix_bytes_per_10k": index.nbytes / size * 10_000,
+            "total_bytes_per_10k": total_bytes / size * 10_000,
+            "query_median_seconds": statistics.median(timings),
+            "query_p95_seconds": timings[int(0.95 * (len(timings) - 1))],
+        }
+        results.append(result)
+        print(
+            f"  {size:>8} embeddings: build {build_seconds:.2f}s, "
+            f"memory {total_bytes / 2**20:.1f}MiB ({result['total_bytes_per_10k'] / 2**20:.1f}MiB per 10k, matrix {result['matrix_bytes_per_10k'] / 2**20:.1f}MiB), "
+            f"top-{options.k} query median {result['query_median_seconds'] * 1000:.2f}ms p95 {result['query_p95_seconds'] * 1000:.2f}ms"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes(DEFAULT_SIZES), help=f"Comma-separated embedding counts (default: {DEFAULT_SIZES})")
+    parser.add_argument("--dimensions", type=int, default=192, help="Embedding dimensions (default: 192, MobileFaceNet)")
+    parser.add_argument("--per-student", type=int, default=3, help="Embeddings per student (default: 3)")
+    parser.add_argument("--k", type=int, default=5, help="Students returned per query (default: 5)")
+    parser.add_argument("--queries", type=int, default=200, help="Timed queries per size (default: 200)")
+    parser.add_argument("--output", default="face_identification_benchmark.json", help="Result JSON path (default: face_identification_benchmark.json)")
+    options = parser.parse_args()
+
+    results = run(options)
+
+    report = {
+        "git_commit": git_commit(),
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "results": results,
+    }
+    Path(options.output).write_text(json.dumps(report, indent=2))
+    print(f"\n[OK] Wrote {len(results)} results to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Benchmark photo decoding for face detection.
+
+Compares the previous decode path (PIL verify + full-resolution reopen, RGB
+conversion, NumPy copy, RGB->BGR for OpenCV) with image_loader.decode_image
+(JPEG draft decoding, max_image_size cap, small BGR detection copy) on
+synthetic photos of typical upload sizes. Reports the median decode time of
+--repeat runs and the decoded array sizes. No Django or model files needed.
+
+Results are written as JSON so runs can be compared across commits.
+
+Usage (from the repository root):
+    python scripts/benchmark_image_decode.py
+    python scripts/benchmark_image_decode.py --sizes 1280x960,4032x3024 --repeat 20
+    python scripts/benchmark_image_decode.py --output decode.json
+"""
+
+import argparse
+from datetime import UTC, datetime
+from io import BytesIO
+import json
+from pathlib import Path
+import platform
+import statistics
+import subprocess  # nosec B404
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from ml_models.face_recognition.preprocessing.image_loader import decode_image  # noqa: E402
+
+# Phone camera sizes: VGA, 1080p, 12MP (4:3), 24MP portrait
+DEFAULT_SIZES = "640x480,1920x1080,4032x3024,4000x6000"
+
+
+def parse_sizes(value):
+    return [tuple(int(side) for side in size.strip().split("x")) for size in value.split(",") if size.strip()]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()  # noqa: S603, S607  # nosec B603 B607
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def synthetic_photo(width, height, quality, rng):
+    """JPEG with camera-like content: smooth gradients plus sensor noise."""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)), (x + y) / 2], axis=2)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def legacy_decode(photo_data):
+    """Decode path before image_loader: two opens, full-resolution RGB, BGR copy."""
+    buffer = BytesIO(photo_data)
+    image = Image.open(buffer)
+    image.verify()
+    buffer.seek(0)
+    image = Image.open(buffer)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    rgb = np.array(image)
+    return rgb, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def measure(decode, photo_data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(photo_data)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(options):
+    rng = np.random.default_rng(0)
+    results = []
+    for width, height in options.sizes:
+        photo_data = synthetic_photo(width, height, options.quality, rng)
+        legacy_rgb, legacy_bgr = legacy_decode(photo_data)
+        decoded = decode_image(photo_data)
+        result = {
+            "width": width,
+            "height": height,
+            "jpeg_bytes": len(photo_data),
+            "legacy_seconds": measure(legacy_decode, photo_data, options.repeat),
+            "decode_seconds": measure(decode_image, photo_data, options.repeat),
+            "legacy_array_bytes": legacy_rgb.nbytes + legacy_bgr.nbytes,
+            "decode_array_bytes": decoded.rgb.nbytes + decoded.detection_bgr.nbytes,
+            "crop_source_shape": list(decoded.rgb.shape),
+            "detection_shape": list(decoded.detection_bgr.shape),
+        }
+        results.append(result)
+        print(
+            f"  {width}x{height:<6} {result['jpeg_bytes'] / 2**20:>6.1f}MiB jpeg "
+            f"legacy {result['legacy_seconds'] * 1000:>8.1f}ms -> {result['decode_seconds'] * 1000:>7.1f}ms "
+            f"({result['legacy_seconds'] / result['decode_seconds']:.1f}x), "
+            f"arrays {result['legacy_array_bytes'] / 2**20:.1f} -> {result['decode_array_bytes'] / 2**20:.1f}MiB"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes(DEFAULT_SIZES), help=f"Comma-separated WIDTHxHEIGHT photo sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG quality of the synthetic photos (default: 90)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per size (default: 10)")
+    parser.add_argument("--output", default="image_decode_benchmark.json", help="Result JSON path (default: image_decode_benchmark.json)")
+    options = parser.parse_args()
+
+    results = run(options)
+
+    report = {
+        "git_commit": git_commit(),
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "pillow": Image.__version__,
+        "results": results,
+    }
+    Path(options.output).write_text(json.dumps(report, indent=2))
+    print(f"\n[OK] Wrote {len(results)} results to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""
+Benchmark kiosk snapshot generation at scale.
+
+Seeds synthetic schools (N students x M photos x K embeddings, built with the
+factories in tests/factories.py and bulk-inserted), then measures
+SnapshotGenerator.generate for every build mode: build time (median of
+--repeat runs), peak Python memory (tracemalloc, separate run), query count
+and artifact size. All seeded data is rolled back afterwards, so it is safe
+to point at a local development database.
+
+Results are written as JSON so runs can be compared across commits.
+
+Usage (from the repository root):
+    python scripts/benchmark_snapshots.py
+    python scripts/benchmark_snapshots.py --students 1000,10000 --photos 2 --embeddings 2
+    python scripts/benchmark_snapshots.py --scopes bus,school --dtypes float32,int8
+    python scripts/benchmark_snapshots.py --output before.json
+    python scripts/benchmark_snapshots.py --output after.json --compare before.json
+
+    # Throwaway in-memory SQLite database
+    DJANGO_SETTINGS_MODULE=bus_kiosk_backend.settings.ci python scripts/benchmark_snapshots.py --migrate
+
+    # Local Postgres: point the settings module at it as usual (DATABASE_URL / DB_* env)
+"""
+
+import argparse
+from datetime import UTC, datetime
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess  # nosec B404
+import sys
+import time
+import tracemalloc
+
+import django
+
+# Setup Django
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "app"))
+sys.path.insert(0, str(REPO_ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bus_kiosk_backend.settings")
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+import numpy as np  # noqa: E402
+
+from kiosks.services import SnapshotGenerator, SnapshotScope  # noqa: E402
+from students.models import FaceEmbeddingMetadata, Student, StudentPhoto  # noqa: E402
+from tests.factories import (  # noqa: E402
+    BusFactory,
+    FaceEmbeddingMetadataFactory,
+    SchoolFactory,
+    StudentFactory,
+    StudentPhotoFactory,
+)
+
+BULK_BATCH_SIZE = 1000
+EMBEDDING_DIMENSIONS = 192
+# Tiny placeholder - photo bytes are not part of the snapshot
+PHOTO_BYTES = b"\xff\xd8\xff\xe0benchmark\xff\xd9"
+
+
+class Rollback(Exception):
+    """Raised to roll back the seeded data."""
+
+
+def parse_list(value, cast=str):
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()  # noqa: S603, S607  # nosec B603 B607
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(student_count, photos_per_student, embeddings_per_photo, schools, buses_per_school, rng):
+    """Seed synthetic schools and return the buses (students spread evenly across them)."""
+    placements = []
+    for _ in range(schools):
+        school = SchoolFactory()
+        placements.extend((school, BusFactory()) for _ in range(buses_per_school))
+
+    students = []
+    for index in range(student_count):
+        school, bus = placements[index % len(placements)]
+        students.append(StudentFactory.build(school=school, assigned_bus=bus))
+    Student.objects.bulk_create(students, batch_size=BULK_BATCH_SIZE)
+
+    photos = [
+        StudentPhotoFactory.build(student=student, is_primary=index == 0, photo_data=PHOTO_BYTES)
+        for student in students
+        for index in range(photos_per_student)
+    ]
+    StudentPhoto.objects.bulk_create(photos, batch_size=BULK_BATCH_SIZE)
+
+    vectors = rng.standard_normal((len(photos) * embeddings_per_photo, EMBEDDING_DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    embeddings = [
+        FaceEmbeddingMetadataFactory.build(
+            student_photo=photo,
+            embedding=vectors[photo_index * embeddings_per_photo + index],
+            is_primary=index == 0,
+            quality_score=float(rng.uniform(0.5, 1.0)),
+        )
+        for photo_index, photo in enumerate(photos)
+        for index in range(embeddings_per_photo)
+    ]
+    FaceEmbeddingMetadata.objects.bulk_create(embeddings, batch_size=BULK_BATCH_SIZE)
+
+    return [bus for _, bus in placements]
+
+
+def measure(bus_id, build_mode, scope, repeat):
+    """Median build time, query count, peak memory and artifact size of one configuration."""
+    timings = []
+    db_bytes, metadata = b"", {}
+    query_count = 0
+    for _ in range(repeat):
+        generator = SnapshotGenerator(bus_id, build_mode=build_mode, scope=scope)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            db_bytes, metadata = generator.generate()
+            timings.append(time.perf_counter() - start)
+        query_count = len(queries)
+
+    # Separate run - tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        SnapshotGenerator(bus_id, build_mode=build_mode, scope=scope).generate()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "build_seconds": statistics.median(timings),
+        "build_seconds_runs": timings,
+        "peak_memory_bytes": peak_memory,
+        "query_count": query_count,
+        "artifact_bytes": len(db_bytes),
+        "snapshot_student_count": metadata["student_count"],
+        "snapshot_embedding_count": metadata["embedding_count"],
+    }
+
+
+def run(options):
+    rng = np.random.default_rng(options.seed)
+    results = []
+    for student_count in options.students:
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                buses = seed(student_count, options.photos, options.embeddings, options.schools, options.buses, rng)
+                seed_seconds = time.perf_counter() - start
+                print(f"\n[SEED] {student_count} students x {options.photos} photos x {options.embeddings} embeddings in {seed_seconds:.1f}s")
+
+                for scope_name in options.scopes:
+                    for dtype in options.dtypes:
+                        scope = SnapshotScope(scope=scope_name, embedding_dtype=dtype)
+                        for build_mode in options.modes:
+                            result = {
+                                "students": student_count,
+                                "photos_per_student": options.photos,
+                                "embeddings_per_photo": options.embeddings,
+                                "schools": options.schools,
+                                "buses_per_school": options.buses,
+                                "scope": scope_name,
+                                "embedding_dtype": dtype,
+                                "build_mode": build_mode,
+                                **measure(buses[0].bus_id, build_mode, scope, options.repeat),
+                            }
+                            results.append(result)
+                            print(
+                                f"  {scope_name:<6} {dtype:<7} {build_mode:<6} "
+                                f"{result['build_seconds'] * 1000:>9.1f}ms {result['peak_memory_bytes'] / 2**20:>8.1f}MiB "
+                                f"{result['query_count']:>4} queries {result['artifact_bytes'] / 1024:>9.0f}KiB "
+                                f"({result['snapshot_embedding_count']} embeddings)"
+                            )
+                raise Rollback
+        except Rollback:
+            pass
+    return results
+
+
+def result_key(result):
+    return (result["students"], result["photos_per_student"], result["embeddings_per_photo"], result["scope"], result["embedding_dtype"], result["build_mode"])
+
+
+def compare(results, baseline_path):
+    baseline = {result_key(result): result for result in json.loads(Path(baseline_path).read_text())["results"]}
+    print(f"\n[COMPARE] against {baseline_path}")
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            continue
+        changes = [
+            f"{field}={(result[field] - previous[field]) / previous[field]:+.1%}"
+            for field in ("build_seconds", "peak_memory_bytes", "query_count", "artifact_bytes")
+            if previous[field]
+        ]
+        students, _, _, scope, dtype, build_mode = result_key(result)
+        print(f"  {students:>7} {scope:<6} {dtype:<7} {build_mode:<6} " + " ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=lambda value: parse_list(value, int), default=[1000, 5000], help="Comma-separated student counts (default: 1000,5000)")
+    parser.add_argument("--photos", type=int, default=2, help="Photos per student (default: 2)")
+    parser.add_argument("--embeddings", type=int, default=1, help="Embeddings per photo (default: 1)")
+    parser.add_argument("--schools", type=int, default=1, help="Synthetic schools (default: 1)")
+    parser.add_argument("--buses", type=int, default=10, help="Buses per school (default: 10)")
+    parser.add_argument("--modes", type=parse_list, default=list(SnapshotGenerator.BUILD_MODES), help="Build modes (default: all)")
+    parser.add_argument("--scopes", type=parse_list, default=["school"], help="Snapshot scopes: bus,route,school (default: school)")
+    parser.add_argument("--dtypes", type=parse_list, default=["float32"], help="Embedding dtypes: float32,float16,int8 (default: float32)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per configuration (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for synthetic embeddings")
+    parser.add_argument("--output", default="snapshot_benchmark.json", help="Result JSON path (default: snapshot_benchmark.json)")
+    parser.add_argument("--compare", help="Previous result JSON to print relative changes against")
+    parser.add_argument("--migrate", action="store_true", help="Run migrations first (fresh databases, e.g. in-memory SQLite)")
+    options = parser.parse_args()
+
+    if options.migrate:
+        call_command("migrate", verbosity=0)
+
+    results = run(options)
+
+    report = {
+        "git_commit": git_commit(),
+        "created_at": datetime.now(UTC).isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    Path(options.output).write_text(json.dumps(report, indent=2))
+    print(f"\n[OK] Wrote {len(results)} results to {options.output}")
+
+    if options.compare:
+        compare(results, options.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -91,6 +91,39 @@ def authenticated_client(db):
     return client
 
 
+@pytest.fixture
+def snapshot_store(settings, tmp_path):
+    """Kiosk snapshot artifact store backed by a throwaway directory."""
+    from django.core.cache import cache
+
+    from kiosks.snapshot_store import SnapshotArtifactStore
+
+    settings.SNAPSHOT_STORAGE_DIR = tmp_path
+    cache.clear()
+    yield SnapshotArtifactStore()
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def model_registry():
+    """Process-wide face models are rebuilt per test, so patched detectors/models never leak."""
+    from ml_models.face_recognition.registry import model_registry
+
+    model_registry.clear()
+    yield model_registry
+    model_registry.clear()
+
+
+@pytest.fixture(autouse=True)
+def face_identification_service():
+    """In-memory face indexes are reloaded per test, so rows of rolled-back tests never leak."""
+    from students.services.face_identification_service import face_identification_service
+
+    face_identification_service.clear()
+    yield face_identification_service
+    face_identification_service.clear()
+
+
 @pytest.fixture
 def test_kiosk(db):
     """Creates an active kiosk for testing."""
@@ -123,7 +123,7 @@ class TestKioskWorkflow:
         assert "attachment; filename=" in snapshot_response["Content-Disposition"]
 
         # Verify the content is a valid SQLite file by checking the header
-        assert snapshot_response.content.startswith(b"SQLite format 3\x00")
+        assert b"".join(snapshot_response.streaming_content).startswith(b"SQLite format 3\x00")
 
     @pytest.mark.skip(reason="JWT tests skipped during Firebase migration")
     def test_workflow_fails_without_authentication(self, api_client, test_kiosk, openapi_helper):
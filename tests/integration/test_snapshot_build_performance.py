@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import statistics
+import struct
+import time
+import uuid
+
+import pytest
+
+from kiosks.services import SnapshotGenerator
+
+RUN_LOAD_TESTS = os.getenv("RUN_LOAD_TESTS", "false").lower() == "true"
+
+EMBEDDING_DIMENSIONS = 192
+EMBEDDINGS_PER_STUDENT = 3
+
+
+def synthetic_rows(student_count):
+    """Snapshot rows shaped like production data (192-d float32 embeddings)"""
+    blob = struct.pack(f"<{EMBEDDING_DIMENSIONS}f", *([0.072] * EMBEDDING_DIMENSIONS))
+    student_rows = []
+    embedding_rows = []
+    for i in range(student_count):
+        student_id = str(uuid.uuid4())
+        student_rows.append((student_id, f"Student {i}", "active", str(uuid.uuid4()), f"B{i % 50}"))
+        embedding_rows.extend((student_id, blob, 0.9, "mobilefacenet", None, None) for _ in range(EMBEDDINGS_PER_STUDENT))
+    return student_rows, embedding_rows
+
+
+def time_build(build_mode, student_rows, embedding_rows, runs=3):
+    generator = SnapshotGenerator(bus_id=uuid.uuid4(), build_mode=build_mode)
+    timings = []
+    db_bytes = b""
+    for _ in range(runs):
+        start = time.perf_counter()
+        db_bytes = generator.build_database(student_rows, embedding_rows, content_hash="benchmark")
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), db_bytes
+
+
+def count_rows(db_bytes, table):
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.deserialize(db_bytes)
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]  # noqa: S608
+    finally:
+        conn.close()
+
+
+@pytest.mark.integration
+@pytest.mark.performance
+class TestSnapshotBuildPerformance:
+    """Benchmark in-memory (serialize) vs temp-file snapshot builds."""
+
+    @pytest.mark.parametrize("student_count", [1_000, 10_000, 50_000])
+    def test_memory_build_vs_file_build(self, student_count):
+        if not RUN_LOAD_TESTS:
+            pytest.skip("Snapshot build benchmark skipped. Set RUN_LOAD_TESTS=true to run.")
+
+        student_rows, embedding_rows = synthetic_rows(student_count)
+
+        file_time, file_bytes = time_build("file", student_rows, embedding_rows)
+        memory_time, memory_bytes = time_build("memory", student_rows, embedding_rows)
+
+        print(
+            f"\n{student_count} students / {len(embedding_rows)} embeddings: "
+            f"file={file_time * 1000:.1f}ms memory={memory_time * 1000:.1f}ms "
+            f"speedup={file_time / memory_time:.2f}x size={len(memory_bytes) / 1024:.0f}KB"
+        )
+
+        # Both paths must produce equivalent databases
+        assert count_rows(memory_bytes, "students") == count_rows(file_bytes, "students") == student_count
+        assert count_rows(memory_bytes, "face_embeddings") == len(embedding_rows)
+
+        # In-memory build must never be meaningfully slower than the disk path
+        assert memory_time <= file_time * 1.2, f"In-memory build slower than file build: {memory_time:.3f}s vs {file_time:.3f}s"
@@ -0,0 +1,76 @@
+import gzip
+import os
+import time
+import uuid
+
+import numpy as np
+import pytest
+
+from kiosks.services import SnapshotGenerator
+from kiosks.utils.snapshot_utils import ENCODING_ZSTD, available_encodings, compress_snapshot, decompress_snapshot
+
+RUN_LOAD_TESTS = os.getenv("RUN_LOAD_TESTS", "false").lower() == "true"
+
+EMBEDDING_DIMENSIONS = 192
+EMBEDDINGS_PER_STUDENT = 3
+
+
+def realistic_rows(student_count, with_embeddings=True):
+    """Snapshot rows with random L2-normalised embeddings (high entropy, like real model output)"""
+    rng = np.random.default_rng(0)
+    student_rows = []
+    embedding_rows = []
+    for i in range(student_count):
+        student_id = str(uuid.uuid4())
+        student_rows.append((student_id, f"Student Name {i}", "active", str(uuid.uuid4()), f"B{i % 50}"))
+        if not with_embeddings:
+            continue
+        vectors = rng.normal(size=(EMBEDDINGS_PER_STUDENT, EMBEDDING_DIMENSIONS)).astype("<f4")
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        embedding_rows.extend((student_id, vector.tobytes(), 0.9, "mobilefacenet", None, None) for vector in vectors)
+    return student_rows, embedding_rows
+
+
+def measure(data, encoding, level=None):
+    start = time.perf_counter()
+    compressed = gzip.compress(data, compresslevel=level, mtime=0) if level is not None else compress_snapshot(data, encoding)
+    compress_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    restored = decompress_snapshot(compressed, encoding)
+    decompress_time = time.perf_counter() - start
+
+    assert restored == data
+    return len(compressed) / len(data), compress_time, decompress_time
+
+
+@pytest.mark.integration
+@pytest.mark.performance
+class TestSnapshotCompressionPerformance:
+    """Benchmark transport compression ratio and CPU time on realistic snapshots."""
+
+    @pytest.mark.parametrize("student_count", [1_000, 10_000])
+    def test_compression_ratio_and_cpu_time(self, student_count):
+        if not RUN_LOAD_TESTS:
+            pytest.skip("Snapshot compression benchmark skipped. Set RUN_LOAD_TESTS=true to run.")
+
+        generator = SnapshotGenerator(bus_id=uuid.uuid4())
+        full = generator.build_database(*realistic_rows(student_count), content_hash="benchmark")
+        text_only = generator.build_database(*realistic_rows(student_count, with_embeddings=False), content_hash="benchmark")
+
+        candidates = [("gzip-6", "gzip", 6), ("gzip-9", "gzip", None)]
+        if ENCODING_ZSTD in available_encodings():
+            candidates.append(("zstd-19", ENCODING_ZSTD, None))
+
+        print(f"\n{student_count} students: full={len(full) / 1024:.0f}KB text-only={len(text_only) / 1024:.0f}KB")
+        for label, encoding, level in candidates:
+            full_ratio, compress_time, decompress_time = measure(full, encoding, level)
+            text_ratio, _, _ = measure(text_only, encoding, level)
+            print(
+                f"  {label:<8} full ratio={full_ratio:.2f} text-only ratio={text_ratio:.2f} "
+                f"compress={compress_time * 1000:.0f}ms decompress={decompress_time * 1000:.0f}ms"
+            )
+
+            # Text and index pages compress well; float32 embeddings barely do
+            assert text_ratio < full_ratio
+            assert full_ratio < 1.0
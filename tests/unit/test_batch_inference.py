@@ -0,0 +1,248 @@
+"""
+Unit tests for batched inference: face embeddings (generate_embeddings) and
+face detection (detect_batch).
+Fake TFLite interpreters / DNN nets stand in for the real models.
+"""
+
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import numpy as np
+from PIL import Image
+import pytest
+
+from ml_models.config import FACE_DETECTION_CONFIG, FACE_RECOGNITION_SERVICE_CONFIG
+from ml_models.face_recognition.inference.base import BaseFaceRecognitionModel, l2_normalize_rows
+from ml_models.face_recognition.inference.mobilefacenet import MobileFaceNet
+from ml_models.face_recognition.preprocessing.face_detector import FaceDetection, FaceDetector
+from students.services.face_recognition_service import FaceRecognitionService
+
+
+class FakeInterpreter:
+    """Output row i = mean of input image i repeated over 192 dims (+ row index so rows differ)."""
+
+    def __init__(self, resizable=True):
+        self.resizable = resizable
+        self.shape = [1, 112, 112, 3]
+        self.invocations = 0
+        self._input = None
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array(self.shape)}]
+
+    def get_output_details(self):
+        return [{"index": 1}]
+
+    def resize_tensor_input(self, index, shape):
+        if not self.resizable and shape[0] != 1:
+            raise RuntimeError("Fixed batch dimension")
+        self.shape = list(shape)
+
+    def allocate_tensors(self):
+        pass
+
+    def set_tensor(self, index, value):
+        assert list(value.shape) == self.shape, "Input must match the allocated shape"
+        self._input = value
+
+    def invoke(self):
+        self.invocations += 1
+
+    def get_tensor(self, index):
+        means = self._input.reshape(len(self._input), -1).mean(axis=1, keepdims=True)
+        return np.tile(means, (1, 192)) + np.arange(192, dtype=np.float32)
+
+
+def build_model(interpreter):
+    model = MobileFaceNet.__new__(MobileFaceNet)  # Skip loading the .tflite file
+    model.interpreter = interpreter
+    model.input_details = interpreter.get_input_details()[0]
+    model.output_details = interpreter.get_output_details()[0]
+    model._batch_size = 1
+    return model
+
+
+def face_crops(count):
+    return [np.full((100 + index, 90, 3), 20 * index, dtype=np.uint8) for index in range(count)]
+
+
+def test_l2_normalize_rows_keeps_zero_rows():
+    matrix = np.array([[3.0, 4.0], [0.0, 0.0]], dtype=np.float32)
+
+    normalized = l2_normalize_rows(matrix)
+
+    np.testing.assert_allclose(normalized, [[0.6, 0.8], [0.0, 0.0]])
+
+
+class TestMobileFaceNetBatch:
+    def test_batch_matches_single_image_embeddings(self):
+        model = build_model(FakeInterpreter())
+        images = face_crops(4)
+
+        batch = model.generate_embeddings(images)
+        singles = np.stack([model.generate_embedding(image) for image in images])
+
+        assert batch.shape == (4, 192)
+        assert batch.dtype == np.float32
+        np.testing.assert_allclose(batch, singles, rtol=1e-5)
+        np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-5)
+
+    def test_resizable_model_runs_one_invoke_per_batch(self):
+        interpreter = FakeInterpreter()
+        model = build_model(interpreter)
+
+        model.generate_embeddings(face_crops(5))
+
+        assert interpreter.invocations == 1
+        assert interpreter.shape[0] == 5
+
+    def test_fixed_batch_model_loops_invoke(self):
+        interpreter = FakeInterpreter(resizable=False)
+        model = build_model(interpreter)
+
+        embeddings = model.generate_embeddings(face_crops(3))
+
+        assert interpreter.invocations == 3
+        assert embeddings.shape == (3, 192)
+        assert model._batch_size is None
+        model.generate_embedding(face_crops(1)[0])  # Single-image path still works
+
+    def test_batches_chunked_by_max_batch_size(self, monkeypatch):
+        from ml_models.config import MOBILEFACENET_CONFIG
+
+        monkeypatch.setitem(MOBILEFACENET_CONFIG, "max_batch_size", 2)
+        interpreter = FakeInterpreter()
+        model = build_model(interpreter)
+
+        embeddings = model.generate_embeddings(face_crops(5))
+
+        assert interpreter.invocations == 3
+        assert embeddings.shape == (5, 192)
+
+    def test_empty_batch(self):
+        assert build_model(FakeInterpreter()).generate_embeddings([]).shape == (0, 192)
+
+
+class LoopingModel(BaseFaceRecognitionModel):
+    """Model without its own batch path - uses the base class default."""
+
+    def __init__(self):
+        super().__init__(Path("unused"))
+
+    def _validate_model(self):
+        pass
+
+    def _load_model(self):
+        pass
+
+    def preprocess(self, image):
+        return image
+
+    def predict(self, preprocessed_image):
+        return np.array([float(preprocessed_image.mean()), 1.0])
+
+    def postprocess(self, raw_output):
+        return raw_output / np.linalg.norm(raw_output)
+
+    @property
+    def input_shape(self):
+        return (2, 2, 3)
+
+    @property
+    def embedding_dims(self):
+        return 2
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_base_class_default_loops_generate_embedding(count):
+    embeddings = LoopingModel().generate_embeddings(face_crops(count))
+
+    assert embeddings.shape == (count, 2)
+    assert embeddings.dtype == np.float32
+
+
+def ssd_output(*rows):
+    """Raw SSD output from (image_id, confidence, x1, y1, x2, y2) rows."""
+    output = np.zeros((1, 1, len(rows), 7), dtype=np.float32)
+    for index, (image_id, confidence, *box) in enumerate(rows):
+        output[0, 0, index] = [image_id, 1, confidence, *box]
+    return output
+
+
+class TestFaceDetectorBatch:
+    def detector(self, *outputs):
+        detector = FaceDetector()
+        detector.net = Mock()
+        detector.net.forward.side_effect = list(outputs)
+        return detector
+
+    def test_one_forward_pass_for_all_images(self):
+        detector = self.detector(
+            ssd_output(
+                (0, 0.80, 0.1, 0.1, 0.5, 0.5),
+                (2, 0.95, 0.2, 0.2, 0.6, 0.6),
+                (0, 0.99, 0.5, 0.5, 0.9, 0.9),
+                (1, 0.30, 0.1, 0.1, 0.5, 0.5),  # Below min_detection_confidence
+                (-1, 0.0, 0, 0, 0, 0),  # Padding row
+            )
+        )
+        images = [np.zeros((300, 400, 3), dtype=np.uint8)] * 3
+
+        detections = detector.detect_batch(images, [1.0, 1.0, 2.0])
+
+        detector.net.forward.assert_called_once()
+        assert detector.net.setInput.call_args.args[0].shape == (3, 3, 300, 300)
+        assert [len(image_detections) for image_detections in detections] == [1, 0, 1]
+        assert detections[0][0].confidence == pytest.approx(0.99)  # Best face wins max_faces=1
+        assert detections[2][0].bbox == (160, 120, 320, 240)  # Scaled by 2
+
+    def test_min_face_size_filters_per_image_size(self):
+        detector = self.detector(ssd_output((0, 0.9, 0.0, 0.0, 0.1, 0.1), (1, 0.9, 0.0, 0.0, 0.1, 0.1)))
+        small = np.zeros((300, 400, 3), dtype=np.uint8)  # 40x30 px face - too small
+        large = np.zeros((1000, 1000, 3), dtype=np.uint8)  # 100x100 px face
+
+        detections = detector.detect_batch([small, large])
+
+        assert detections[0] == []
+        assert detections[1] == [FaceDetection(bbox=(0, 0, 100, 100), confidence=pytest.approx(0.9))]
+
+    def test_chunked_by_max_batch_size(self, monkeypatch):
+        monkeypatch.setitem(FACE_DETECTION_CONFIG, "max_batch_size", 2)
+        detector = self.detector(ssd_output((1, 0.9, 0.1, 0.1, 0.5, 0.5)), ssd_output((0, 0.9, 0.1, 0.1, 0.5, 0.5)))
+
+        detections = detector.detect_batch([np.zeros((300, 300, 3), dtype=np.uint8)] * 3)
+
+        assert detector.net.forward.call_count == 2
+        assert [len(image_detections) for image_detections in detections] == [0, 1, 1]  # Image ids are per chunk
+
+    def test_detect_bgr_matches_batch(self):
+        output = ssd_output((0, 0.9, 0.1, 0.1, 0.5, 0.5))
+        detector = self.detector(output, output)
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+
+        assert detector.detect_bgr(image) == detector.detect_batch([image])[0]
+
+
+def encode_photo():
+    buffer = BytesIO()
+    Image.new("RGB", (640, 480), "white").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_service_detects_photo_batch_per_pooled_detector(model_registry):
+    detection = FaceDetection(bbox=(100, 100, 200, 200), confidence=0.95)
+    detector = Mock()
+    detector.detect_batch.side_effect = lambda images, scales: [[detection] for _ in images]
+    detector.crop_face.return_value = np.zeros((220, 220, 3), dtype=np.uint8)
+    photos = [encode_photo(), b"not an image", encode_photo(), encode_photo()]
+
+    with (
+        patch.dict(FACE_RECOGNITION_SERVICE_CONFIG, {"max_concurrent_processes": 2}),
+        patch.object(model_registry, "get_face_detector", return_value=detector),
+    ):
+        results = FaceRecognitionService()._detect_best_faces(photos)
+
+    assert [error for _, error in results] == ["", "Failed to load image", "", ""]
+    assert results[0][0]["confidence"] == 0.95
+    assert sorted(len(call.args[0]) for call in detector.detect_batch.call_args_list) == [1, 2]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from kiosks.utils.embedding_codec import decode_embeddings, encode_embedding_blobs, encode_embeddings
+
+
+@pytest.fixture
+def embeddings():
+    """L2-normalised 192-d embeddings, like the production model output"""
+    matrix = np.random.default_rng(42).normal(size=(64, 192)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class TestEmbeddingCodec:
+    """Snapshot embedding precisions round-trip close to float32."""
+
+    @pytest.mark.parametrize(("dtype", "itemsize", "tolerance"), [("float32", 4, 0), ("float16", 2, 1e-3), ("int8", 1, 1e-2)])
+    def test_round_trip(self, embeddings, dtype, itemsize, tolerance):
+        encoded, scales = encode_embeddings(embeddings, dtype)
+        decoded = decode_embeddings(encoded, dtype, scales)
+
+        assert encoded.itemsize == itemsize
+        assert np.abs(decoded - embeddings).max() <= tolerance
+        # Quantisation must not change which vector is most similar
+        assert ((embeddings @ decoded.T).argmax(axis=1) == np.arange(len(embeddings))).all()
+
+    def test_int8_zero_vector_keeps_unit_scale(self):
+        encoded, scales = encode_embeddings(np.zeros((1, 4), dtype=np.float32), "int8")
+
+        assert encoded.tolist() == [[0, 0, 0, 0]]
+        assert scales.tolist() == [1.0]
+
+    def test_blobs_of_mixed_dimensions_keep_order(self):
+        blobs = [np.array(values, dtype="<f4").tobytes() for values in ([1.0, -0.5], [0.25, 0.5, 1.0], [0.5, 0.5])]
+
+        encoded, scales = encode_embedding_blobs(blobs, "int8")
+
+        assert [len(blob) for blob in encoded] == [2, 3, 2]
+        assert scales == pytest.approx([1 / 127, 1 / 127, 0.5 / 127])
+
+    def test_unknown_dtype_is_rejected(self, embeddings):
+        with pytest.raises(ValueError, match="Unsupported embedding dtype"):
+            encode_embeddings(embeddings, "bfloat16")
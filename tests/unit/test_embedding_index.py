@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from kiosks.utils.embedding_index import assign_clusters, cluster_count, train_centroids
+
+
+@pytest.fixture
+def embeddings():
+    """Four well-separated groups of L2-normalised 64-d embeddings"""
+    rng = np.random.default_rng(7)
+    centres = rng.normal(size=(4, 64))
+    matrix = np.repeat(centres, 50, axis=0) + rng.normal(scale=0.05, size=(200, 64))
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestEmbeddingIndex:
+    """Coarse quantizer training is deterministic and incremental."""
+
+    def test_training_is_deterministic(self, embeddings):
+        first, first_labels = train_centroids(embeddings, 4, seed=3)
+        second, second_labels = train_centroids(embeddings, 4, seed=3)
+
+        assert np.array_equal(first, second)
+        assert np.array_equal(first_labels, second_labels)
+        # Each well-separated group lands in exactly one cluster
+        assert sorted(np.bincount(first_labels).tolist()) == [50, 50, 50, 50]
+
+    def test_labels_match_nearest_centroid(self, embeddings):
+        centroids, labels = train_centroids(embeddings, 4)
+
+        assert np.array_equal(assign_clusters(embeddings, centroids), labels)
+        assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0)
+
+    def test_warm_start_keeps_cluster_ids(self, embeddings):
+        centroids, labels = train_centroids(embeddings, 4)
+
+        # A few embeddings change - ids of untouched vectors must not move
+        changed = embeddings.copy()
+        changed[:3] = embeddings[150:153]
+        _, new_labels = train_centroids(changed, 4, seed=99, initial=centroids, max_iterations=2)
+
+        assert np.array_equal(new_labels[3:], labels[3:])
+
+    def test_warm_start_with_other_dimensions_starts_over(self, embeddings):
+        centroids, _ = train_centroids(embeddings, 4, initial=np.ones((4, 8), dtype=np.float32))
+
+        assert centroids.shape == (4, 64)
+
+    @pytest.mark.parametrize(("count", "expected"), [(1, 1), (64, 1), (65, 2), (100_000, 256)])
+    def test_cluster_count(self, count, expected):
+        assert cluster_count(count, cluster_size=64, max_clusters=256) == expected
@@ -0,0 +1,36 @@
+import numpy as np
+
+from kiosks.utils.embedding_selection import select_embeddings
+
+MATRIX = np.array(
+    [
+        [1.0, 0.0],
+        [0.999, 0.045],  # Near-duplicate of row 0
+        [0.0, 1.0],
+        [-1.0, 0.0],
+    ],
+    dtype=np.float32,
+)
+
+
+class TestSelectEmbeddings:
+    """Per-student selection keeps the best diverse embeddings."""
+
+    def test_no_limits_keeps_everything(self):
+        assert select_embeddings(MATRIX, [0.5, 0.6, 0.7, 0.8]) == [0, 1, 2, 3]
+
+    def test_top_k_by_quality_in_input_order(self):
+        assert select_embeddings(MATRIX, [0.5, 0.6, 0.9, 0.8], max_count=2) == [2, 3]
+
+    def test_near_duplicates_are_dropped(self):
+        assert select_embeddings(MATRIX, [0.9, 0.95, 0.5, 0.4], max_similarity=0.99) == [1, 2, 3]
+
+    def test_duplicate_does_not_use_a_slot(self):
+        assert select_embeddings(MATRIX, [0.9, 0.95, 0.5, 0.4], max_count=2, max_similarity=0.99) == [1, 2]
+
+    def test_quality_floor_keeps_best_embedding(self):
+        assert select_embeddings(MATRIX, [0.2, 0.9, 0.3, 0.1], min_quality=0.5) == [1]
+        assert select_embeddings(MATRIX, [0.2, 0.1, 0.3, 0.1], min_quality=0.5) == [2]
+
+    def test_empty(self):
+        assert select_embeddings(np.empty((0, 2), dtype=np.float32), []) == []
@@ -14,7 +14,7 @@ import pytest
 
 from students.models import FaceEmbeddingMetadata, StudentPhoto
 from students.services.face_recognition_service import FaceRecognitionService
-from tests.factories import StudentFactory, StudentPhotoFactory
+from tests.factories import FaceEmbeddingMetadataFactory, StudentFactory, StudentPhotoFactory
 
 
 @pytest.fixture
@@ -58,7 +58,7 @@ def mock_face_detector():
         mock_detection.bbox = (50, 50, 100, 100)
         mock_detection.confidence = 0.95
 
-        detector_instance.detect.return_value = [mock_detection]
+        detector_instance.detect_bgr.return_value = [mock_detection]
         # Return a PIL Image instead of numpy array for crop_face
         from PIL import Image as PILImage
 
@@ -73,7 +73,7 @@ def mock_face_detector():
 @pytest.fixture
 def mock_mobilefacenet():
     """Mock MobileFaceNet model that generates high-quality embeddings."""
-    with patch("students.services.face_recognition_service.import_module") as mock_import:
+    with patch("ml_models.face_recognition.registry.import_module") as mock_import:
         model_instance = Mock()
 
         # Generate realistic high-variance normalized embedding (192-dim)
@@ -94,6 +94,8 @@ def mock_mobilefacenet():
         fake_embedding = np.random.uniform(low=-5.0, high=5.0, size=192).astype(np.float32)
         # Don't normalize - keep high magnitude for quality check
         model_instance.generate_embedding.return_value = fake_embedding
+        # Batch API behaves like the BaseFaceRecognitionModel default (one generate_embedding per image)
+        model_instance.generate_embeddings.side_effect = lambda images: np.stack([model_instance.generate_embedding(image) for image in images])
 
         # Mock the MobileFaceNet class
         mock_module = Mock()
@@ -179,7 +181,7 @@ class TestEmbeddingService:
         """Test processing fails gracefully when no face detected."""
         with patch("ml_models.face_recognition.preprocessing.face_detector.FaceDetector") as MockDetector:
             detector_instance = Mock()
-            detector_instance.detect.return_value = []  # No faces
+            detector_instance.detect_bgr.return_value = []  # No faces
             MockDetector.return_value = detector_instance
 
             student = StudentFactory()
@@ -206,7 +208,7 @@ class TestEmbeddingService:
             mock_detection2.bbox = (150, 150, 200, 200)
             mock_detection2.confidence = 0.90
 
-            detector_instance.detect.return_value = [mock_detection1, mock_detection2]
+            detector_instance.detect_bgr.return_value = [mock_detection1, mock_detection2]
             MockDetector.return_value = detector_instance
 
             student = StudentFactory()
@@ -231,7 +233,7 @@ class TestEmbeddingService:
         photo.photo = real_face_image
         photo.save()
 
-        with patch("students.services.face_recognition_service.import_module"):
+        with patch("ml_models.face_recognition.registry.import_module"):
             service.process_student_photo(photo)
 
         assert service._face_detector is not None, "Should be loaded after use"
@@ -328,3 +330,28 @@ class TestServiceDirectCall:
             assert len(embedding.embedding) > 0
             assert embedding.quality_score > 0
             assert embedding.model_name in ["mobilefacenet"]
+
+
+@pytest.mark.django_db
+class TestBinaryEmbeddingStorage:
+    """Embeddings are stored as little-endian float32 bytes."""
+
+    def test_embedding_round_trips_through_database(self):
+        values = np.linspace(-1, 1, 192, dtype=np.float32)
+        embedding = FaceEmbeddingMetadataFactory(embedding=values.tolist())
+
+        stored = FaceEmbeddingMetadata.objects.get(pk=embedding.pk)
+
+        assert stored.embedding_dimensions == 192
+        assert stored.embedding_dtype == "float32"
+        assert len(bytes(stored.embedding_vector)) == 192 * 4
+        np.testing.assert_array_equal(stored.embedding_array, values)
+        assert stored.embedding == values.tolist()
+
+    def test_embedding_array_is_zero_copy_view(self):
+        embedding = FaceEmbeddingMetadataFactory(embedding=[1.0, 2.0])
+
+        array = embedding.embedding_array
+
+        assert array.dtype == np.dtype("<f4")
+        assert not array.flags.writeable  # Read-only view over the stored bytes
@@ -0,0 +1,225 @@
+"""
+Unit tests for the in-memory face identification index, its sync with the
+database and the identification endpoints.
+"""
+
+from unittest.mock import patch
+
+from django.utils import timezone
+import numpy as np
+from PIL import Image
+import pytest
+
+from events.models import BoardingEvent
+from kiosks.signals import record_dataset_change
+from students.models import FaceEmbeddingMetadata
+from students.services.face_identification_service import FaceIndex
+from students.services.face_recognition_service import FaceRecognitionService
+from students.services.reembedding import model_version
+from tests.factories import FaceEmbeddingMetadataFactory, SchoolFactory, StudentFactory, StudentPhotoFactory
+
+DIMENSIONS = 8
+
+
+def unit(axis, noise=0.0):
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    vector[axis] = 1.0
+    return vector + noise
+
+
+class TestFaceIndex:
+    def test_best_embedding_per_student(self):
+        index = FaceIndex(DIMENSIONS)
+        index.upsert("a1", "alice", "p1", unit(0))
+        index.upsert("a2", "alice", "p2", unit(1))
+        index.upsert("b1", "bob", "p3", unit(1, noise=0.2))
+
+        matches = index.search(unit(1) * 5, k=2)  # Scale does not matter
+
+        assert [(match.student_id, match.embedding_id) for match in matches] == [("alice", "a2"), ("bob", "b1")]
+        assert matches[0].score == pytest.approx(1.0)
+        assert matches[0].score > matches[1].score
+
+    def test_remove_moves_last_row(self):
+        index = FaceIndex(DIMENSIONS)
+        for axis in range(3):
+            index.upsert(f"e{axis}", f"s{axis}", f"p{axis}", unit(axis))
+
+        assert index.remove("e0")
+        assert not index.remove("e0")
+
+        assert len(index) == 2
+        assert index.search(unit(2), k=1)[0].embedding_id == "e2"
+        assert {match.student_id for match in index.search(unit(0), k=5)} == {"s1", "s2"}
+
+    def test_grows_past_capacity(self):
+        index = FaceIndex(DIMENSIONS, capacity=1)
+        for axis in range(DIMENSIONS):
+            index.upsert(f"e{axis}", f"s{axis}", f"p{axis}", unit(axis))
+
+        assert len(index) == DIMENSIONS
+        assert all(index.search(unit(axis), k=1)[0].student_id == f"s{axis}" for axis in range(DIMENSIONS))
+
+    def test_remove_students(self):
+        index = FaceIndex(DIMENSIONS)
+        index.upsert("a1", "alice", "p1", unit(0))
+        index.upsert("a2", "alice", "p2", unit(1))
+        index.upsert("b1", "bob", "p3", unit(2))
+
+        assert index.remove_students({"alice"}) == 2
+        assert [match.student_id for match in index.search(unit(0), k=5)] == ["bob"]
+
+    def test_min_score(self):
+        index = FaceIndex(DIMENSIONS)
+        index.upsert("a1", "alice", "p1", unit(0))
+        index.upsert("b1", "bob", "p2", unit(1))
+
+        assert [match.student_id for match in index.search(unit(0), k=5, min_score=0.5)] == ["alice"]
+
+    def test_dimension_mismatch_raises(self):
+        index = FaceIndex(DIMENSIONS)
+
+        with pytest.raises(ValueError, match="8-dimensional"):
+            index.search(np.ones(4))
+
+
+@pytest.fixture
+def photos_without_signal_embedding(settings):
+    """Photo saves only schedule the worker, which is not run."""
+    settings.FACE_EMBEDDING_EXECUTION_MODE = "celery"
+    with patch("students.services.embedding_worker.schedule_photo_embeddings"):
+        yield
+
+
+def enrolled(school, axis, version=None):
+    """Embedding of a new student of school pointing along axis."""
+    return FaceEmbeddingMetadataFactory(
+        student_photo=StudentPhotoFactory(student=StudentFactory(school=school)),
+        model_name="mobilefacenet",
+        model_version=version or model_version("mobilefacenet"),
+        embedding=unit(axis),
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("photos_without_signal_embedding")
+class TestFaceIdentificationService:
+    def test_loads_current_version_of_school(self, face_identification_service):
+        school = SchoolFactory()
+        current = enrolled(school, 0)
+        enrolled(school, 1, version="0")
+        enrolled(SchoolFactory(), 0)
+
+        matches = face_identification_service.identify(school.school_id, unit(0), "mobilefacenet", k=5)
+
+        assert [match.embedding_id for match in matches] == [current.embedding_id]
+        assert matches[0].student_id == current.student_photo.student_id
+
+    def test_bulk_created_embeddings_replayed_from_journal(self, face_identification_service):
+        school = SchoolFactory()
+        enrolled(school, 0)
+        index = face_identification_service.get_index(school.school_id, "mobilefacenet")
+
+        # Like process_photo_batch: bulk_create (no post_save) plus one journaled dataset change
+        photo = StudentPhotoFactory(student=StudentFactory(school=school))
+        embedding = FaceEmbeddingMetadata(student_photo=photo, model_name="mobilefacenet", model_version=model_version("mobilefacenet"), quality_score=0.9, captured_at=timezone.now())
+        embedding.embedding = unit(3)
+        FaceEmbeddingMetadata.objects.bulk_create([embedding])
+        record_dataset_change([photo.student_id])
+
+        matches = face_identification_service.identify(school.school_id, unit(3), "mobilefacenet", k=1)
+
+        assert face_identification_service.get_index(school.school_id, "mobilefacenet") is index  # Caught up, not reloaded
+        assert matches[0].student_id == photo.student_id
+        assert len(index) == 2
+
+    def test_signals_apply_committed_changes(self, face_identification_service, django_capture_on_commit_callbacks):
+        school = SchoolFactory()
+        enrolled(school, 0)
+        index = face_identification_service.get_index(school.school_id, "mobilefacenet")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            embedding = enrolled(school, 1)
+        assert index.search(unit(1), k=1)[0].embedding_id == embedding.embedding_id
+
+        with django_capture_on_commit_callbacks(execute=True):
+            embedding.delete()
+        assert len(index) == 1
+
+    def test_identify_image_embeds_best_face(self, face_identification_service):
+        school = SchoolFactory()
+        target = enrolled(school, 2)
+        face = {"bbox": (10, 20, 110, 120), "confidence": 0.97, "image": Image.new("RGB", (112, 112))}
+
+        with patch.object(FaceRecognitionService, "embed_image", return_value=(face, {"mobilefacenet": {"vector": unit(2)}})) as embed:
+            found, matches = face_identification_service.identify_image(school.school_id, b"photo", "mobilefacenet")
+
+        embed.assert_called_once_with(b"photo", True)
+        assert found is face
+        assert matches[0].embedding_id == target.embedding_id
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("photos_without_signal_embedding")
+class TestFaceIdentificationEndpoints:
+    url = "/api/v1/face-identification/"
+
+    def test_identify_by_embedding(self, api_client, school_admin_user):
+        school = SchoolFactory()
+        target = enrolled(school, 4)
+        enrolled(school, 5)
+        api_client.force_authenticate(user=school_admin_user)
+
+        response = api_client.post(self.url, {"school": str(school.school_id), "embedding": unit(4).tolist(), "k": 1}, format="json")
+
+        assert response.status_code == 200
+        assert response.data["face"] is None
+        assert response.data["model_version"] == model_version("mobilefacenet")
+        assert [match["embedding_id"] for match in response.data["matches"]] == [str(target.embedding_id)]
+
+    def test_image_or_embedding_required(self, api_client, school_admin_user):
+        api_client.force_authenticate(user=school_admin_user)
+
+        response = api_client.post(self.url, {"school": str(SchoolFactory().school_id)}, format="json")
+
+        assert response.status_code == 400
+
+    def test_wrong_dimensions_rejected(self, api_client, school_admin_user):
+        school = SchoolFactory()
+        enrolled(school, 0)
+        api_client.force_authenticate(user=school_admin_user)
+
+        response = api_client.post(self.url, {"school": str(school.school_id), "embedding": [0.1, 0.2]}, format="json")
+
+        assert response.status_code == 400
+        assert "8-dimensional" in response.data["error"]
+
+    def test_school_admin_only(self, authenticated_client):
+        response = authenticated_client.post(self.url, {"school": str(SchoolFactory().school_id), "embedding": [1.0]}, format="json")
+
+        assert response.status_code == 403
+
+    def test_identify_boarding_event_from_confirmation_face(self, api_client, school_admin_user):
+        school = SchoolFactory()
+        target = enrolled(school, 6)
+        event = BoardingEvent.objects.create(
+            kiosk_id="KIOSK-1",
+            confidence_score=0.3,
+            timestamp=timezone.now(),
+            model_version="1",
+            confirmation_face_2_gcs="boarding_events/event/face_2.jpg",
+        )
+        face = {"bbox": (0, 0, 112, 112), "confidence": 1.0, "image": Image.new("RGB", (112, 112))}
+        api_client.force_authenticate(user=school_admin_user)
+
+        with (
+            patch("events.services.storage_service.BoardingEventStorageService") as storage,
+            patch.object(FaceRecognitionService, "embed_image", return_value=(face, {"mobilefacenet": {"vector": unit(6)}})) as embed,
+        ):
+            storage.return_value.download_image.return_value = b"face-crop"
+            response = api_client.post(f"/api/v1/boarding-events/{event.event_id}/identify/", {"school": str(school.school_id)}, format="json")
+
+        assert response.status_code == 200
+        storage.return_value.download_image.assert_called_once_with("boarding_events/event/face_2.jpg")
+        embed.assert_called_once_with(b"face-crop", False)  # Already a face crop - no detection
+        assert response.data["matches"][0]["student_id"] == str(target.student_photo.student_id)
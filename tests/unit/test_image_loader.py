@@ -0,0 +1,100 @@
+"""
+Unit tests for photo decoding (image_loader) and detection on the reduced copy.
+"""
+
+from io import BytesIO
+from unittest.mock import Mock
+
+import numpy as np
+from PIL import Image
+import pytest
+
+from ml_models.face_recognition.preprocessing.face_detector import FaceDetector
+from ml_models.face_recognition.preprocessing.image_loader import decode_image, fit_within
+
+
+def encode(width, height, color=(200, 30, 10), mode="RGB", format="JPEG"):
+    buffer = BytesIO()
+    Image.new(mode, (width, height), color).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        ((4032, 3024), (1440, 1080)),  # Landscape: short side capped
+        ((3024, 4032), (1080, 1440)),  # Portrait: same bounds
+        ((4000, 1000), (1920, 480)),  # Panorama: long side capped
+        ((640, 480), (640, 480)),  # Never upscaled
+    ],
+)
+def test_fit_within(size, expected):
+    assert fit_within(size, (1920, 1080)) == expected
+
+
+class TestDecodeImage:
+    def test_large_jpeg_capped_to_max_image_size(self):
+        decoded = decode_image(encode(4032, 3024), max_size=(1920, 1080), detection_size=(400, 300))
+
+        assert decoded.rgb.shape == (1080, 1440, 3)
+        assert decoded.detection_bgr.shape == (300, 400, 3)
+        assert decoded.detection_scale == pytest.approx(3.6)
+        assert decoded.rgb.dtype == decoded.detection_bgr.dtype == np.uint8
+
+    def test_detection_copy_is_bgr(self):
+        decoded = decode_image(encode(800, 600, color=(255, 0, 0)))
+
+        red, _, blue = decoded.rgb[300, 400].astype(int)
+        blue_channel, _, red_channel = decoded.detection_bgr[150, 200].astype(int)
+        assert red > 200 and blue < 50
+        assert red_channel > 200 and blue_channel < 50
+        assert decoded.detection_bgr.flags["C_CONTIGUOUS"]  # Ready for cv2.dnn
+
+    def test_small_image_not_resized(self):
+        decoded = decode_image(encode(320, 240))
+
+        assert decoded.rgb.shape == (240, 320, 3)
+        assert decoded.detection_bgr.shape == (240, 320, 3)
+        assert decoded.detection_scale == 1.0
+
+    def test_non_jpeg_converted_to_rgb(self):
+        decoded = decode_image(encode(500, 500, color=(0, 0, 255, 128), mode="RGBA", format="PNG"))
+
+        assert decoded.rgb.shape == (500, 500, 3)
+
+    def test_unreadable_data_raises(self):
+        with pytest.raises(OSError):
+            decode_image(b"not an image")
+
+    def test_truncated_jpeg_raises(self):
+        data = encode(800, 600)
+
+        with pytest.raises(OSError):
+            decode_image(data[: len(data) // 2])
+
+
+class TestDetectOnReducedImage:
+    def detector_with_face(self, box):
+        """FaceDetector whose net reports one face at box (relative x1, y1, x2, y2)."""
+        detector = FaceDetector()
+        output = np.zeros((1, 1, 1, 7), dtype=np.float32)
+        output[0, 0, 0, 2] = 0.99
+        output[0, 0, 0, 3:7] = box
+        detector.net = Mock()
+        detector.net.forward.return_value = output
+        return detector
+
+    def test_bbox_scaled_to_crop_source(self):
+        detector = self.detector_with_face([0.25, 0.25, 0.5, 0.5])
+
+        detections = detector.detect_bgr(np.zeros((300, 400, 3), dtype=np.uint8), scale=3.6)
+
+        assert detections[0].bbox == (360, 270, 360, 270)
+
+    def test_min_face_size_applies_after_scaling(self):
+        # 40x30 px in the detection copy, 144x108 px in the crop source
+        detector = self.detector_with_face([0.5, 0.5, 0.6, 0.6])
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+
+        assert detector.detect_bgr(image) == []
+        assert len(detector.detect_bgr(image, scale=3.6)) == 1
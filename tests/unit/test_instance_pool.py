@@ -0,0 +1,114 @@
+"""
+Unit tests for the bounded model instance pool.
+Instances are created lazily up to the pool size and never shared between threads.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ml_models.face_recognition.pool import InstancePool, PooledFaceDetector
+from ml_models.face_recognition.preprocessing.face_detector import FaceDetection
+
+
+class Counter:
+    """Factory that numbers the instances it builds."""
+
+    def __init__(self):
+        self.created = 0
+
+    def __call__(self):
+        self.created += 1
+        return {"id": self.created}
+
+
+class TestInstancePool:
+    def test_instances_created_lazily_and_reused(self):
+        factory = Counter()
+        pool = InstancePool(factory, size=3)
+
+        assert factory.created == 0
+        with pool.checkout() as first:
+            pass
+        with pool.checkout() as second:
+            pass
+
+        assert first is second
+        assert pool.stats() == {"pool_size": 3, "instances": 1, "in_use": 0}
+
+    def test_checkout_blocks_when_every_instance_is_busy(self):
+        pool = InstancePool(Counter(), size=1, name="detector")
+
+        with pool.checkout():
+            with pytest.raises(TimeoutError, match="detector"), pool.checkout(timeout=0.01):
+                pass
+
+        with pool.checkout() as instance:  # Freed again
+            assert instance == {"id": 1}
+
+    def test_failed_factory_frees_its_slot(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("Model file missing")
+            return object()
+
+        pool = InstancePool(flaky, size=1)
+
+        with pytest.raises(RuntimeError), pool.checkout():
+            pass
+        with pool.checkout() as instance:
+            assert instance is not None
+        assert pool.stats()["instances"] == 1
+
+    def test_concurrent_threads_never_share_an_instance(self):
+        pool = InstancePool(Counter(), size=2)
+        active: set[int] = set()
+        lock = threading.Lock()
+        shared = []
+
+        def infer(_):
+            with pool.checkout() as instance:
+                with lock:
+                    if instance["id"] in active:
+                        shared.append(instance["id"])
+                    active.add(instance["id"])
+                time.sleep(0.005)
+                with lock:
+                    active.discard(instance["id"])
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(infer, range(30)))
+
+        assert shared == []
+        assert pool.stats() == {"pool_size": 2, "instances": 2, "in_use": 0}
+
+    def test_warm_builds_and_runs_every_instance(self):
+        pool = InstancePool(Counter(), size=3)
+        warmed = []
+
+        pool.warm(lambda instance: warmed.append(instance["id"]))
+
+        assert sorted(warmed) == [1, 2, 3]
+        assert pool.stats()["in_use"] == 0
+
+    def test_size_must_be_positive(self):
+        with pytest.raises(ValueError):
+            InstancePool(Counter(), size=0)
+
+
+class TestPooledFaceDetector:
+    def test_crop_face_does_not_check_out_a_detector(self):
+        factory = Counter()
+        detector = PooledFaceDetector(InstancePool(factory, size=1))
+        image = np.zeros((100, 200, 3), dtype=np.uint8)
+
+        face = detector.crop_face(image, FaceDetection(bbox=(50, 20, 40, 40), confidence=0.9))
+
+        assert face.shape == (48, 48, 3)  # 10% padding on each side
+        assert factory.created == 0
@@ -0,0 +1,107 @@
+"""
+Unit tests for the process-wide face model registry.
+Models load into per-process instance pools, warm up with a dummy inference and report metrics.
+"""
+
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from ml_models.config import (
+    FACE_DETECTION_MODEL_FILES,
+    FACE_RECOGNITION_MODELS,
+    FACE_RECOGNITION_SERVICE_CONFIG,
+    MODEL_LOADING_CONFIG,
+)
+from students.services.face_recognition_service import FaceRecognitionService
+
+
+@pytest.fixture
+def fake_mobilefacenet():
+    """Registry imports a fake MobileFaceNet class instead of loading TFLite."""
+    model = Mock()
+    model.generate_embedding.return_value = np.ones(192, dtype=np.float32)
+    module = Mock()
+    module.MobileFaceNet.return_value = model
+    with patch("ml_models.face_recognition.registry.import_module", return_value=module):
+        yield module
+
+
+@pytest.fixture
+def fake_detector():
+    with patch("ml_models.face_recognition.preprocessing.face_detector.FaceDetector") as detector_class:
+        detector_class.return_value.net = object()  # Net already built
+        detector_class.return_value.detect.return_value = []
+        detector_class.return_value.detect_bgr.return_value = []
+        yield detector_class
+
+
+class TestModelRegistry:
+    def test_model_loaded_once_per_process(self, model_registry, fake_mobilefacenet):
+        config = FACE_RECOGNITION_MODELS["mobilefacenet"]
+        first = FaceRecognitionService()._get_model_instance("mobilefacenet", config)
+        second = FaceRecognitionService()._get_model_instance("mobilefacenet", config)
+
+        first.generate_embedding(np.zeros((112, 112, 3)))
+        second.generate_embedding(np.zeros((112, 112, 3)))
+
+        assert first.pool is second.pool
+        fake_mobilefacenet.MobileFaceNet.assert_called_once()  # Sequential calls reuse the idle instance
+        assert model_registry.metrics()["mobilefacenet"]["load_seconds"] >= 0
+
+    def test_face_detector_shared_between_services(self, model_registry, fake_detector):
+        model_registry.get_face_detector().detect(np.zeros((10, 10, 3)))
+        model_registry.get_face_detector().detect(np.zeros((10, 10, 3)))
+
+        assert model_registry.get_face_detector().pool is model_registry.get_face_detector().pool
+        fake_detector.assert_called_once()
+
+    def test_instances_get_share_of_cpu_threads(self, model_registry, fake_mobilefacenet):
+        with (
+            patch.dict(FACE_RECOGNITION_SERVICE_CONFIG, {"max_concurrent_processes": 2, "interpreter_num_threads": None}),
+            patch("ml_models.face_recognition.registry.os.cpu_count", return_value=8),
+        ):
+            model_registry.get_model("mobilefacenet").generate_embedding(np.zeros((112, 112, 3)))
+
+        fake_mobilefacenet.MobileFaceNet.assert_called_once_with(num_threads=4)
+
+    def test_weights_read_from_disk_once(self, model_registry, tmp_path):
+        path = tmp_path / "model.tflite"
+        path.write_bytes(b"v1")
+
+        assert model_registry.read_weights(path) == b"v1"
+        path.write_bytes(b"v2")
+        assert model_registry.read_weights(path) == b"v1"
+
+    def test_preload_reads_enabled_model_files(self, model_registry, tmp_path):
+        files = {"config": tmp_path / "deploy.prototxt", "weights": tmp_path / "detector.caffemodel"}
+        for path in files.values():
+            path.write_bytes(b"1234")
+        model_path = tmp_path / "mobilefacenet.tflite"
+        model_path.write_bytes(b"12345678")
+
+        with (
+            patch.dict(FACE_DETECTION_MODEL_FILES, files),
+            patch.dict(FACE_RECOGNITION_MODELS["mobilefacenet"], {"model_path": model_path}),
+        ):
+            assert model_registry.preload_weights() == 16
+
+    def test_warm_up_runs_dummy_inference_and_records_metrics(self, model_registry, fake_mobilefacenet, fake_detector):
+        with patch.dict(FACE_RECOGNITION_SERVICE_CONFIG, {"max_concurrent_processes": 2}):
+            metrics = model_registry.warm_up()
+
+        # Every pooled instance is built and warmed
+        assert fake_detector.call_count == 2
+        assert fake_detector.return_value.detect_bgr.call_count == 2
+        assert fake_mobilefacenet.MobileFaceNet.return_value.generate_embedding.call_count == 2
+        assert {"load_seconds", "rss_delta_bytes", "warmup_seconds", "pid"} <= set(metrics["mobilefacenet"])
+        assert metrics["mobilefacenet"]["instances"] == 2
+        assert metrics["face_detector"]["in_use"] == 0
+
+    def test_preload_disabled_loads_nothing(self, model_registry, fake_mobilefacenet, fake_detector):
+        with patch.dict(MODEL_LOADING_CONFIG, {"preload_enabled_models": False}):
+            assert model_registry.preload_weights() == 0
+            assert model_registry.warm_up() == {}
+
+        fake_mobilefacenet.MobileFaceNet.assert_not_called()
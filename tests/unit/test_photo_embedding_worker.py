@@ -0,0 +1,167 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.utils import timezone
+import numpy as np
+from PIL import Image
+import pytest
+
+from kiosks.models import DatasetVersion
+from ml_models.config import FACE_RECOGNITION_SERVICE_CONFIG
+from students.models import FaceEmbeddingMetadata, StudentPhoto
+from students.services.embedding_worker import (
+    claim_pending_photos,
+    process_pending_photo_embeddings,
+    retry_failed_photo_embeddings,
+    schedule_photo_embeddings,
+)
+from students.services.face_recognition_service import FaceRecognitionService, PhotoEmbeddingError
+from tests.factories import StudentPhotoFactory
+
+NO_FACE = b"no-face"
+
+
+@pytest.fixture
+def worker_mode(settings):
+    """Embedding deferred to the batched worker - photo saves only schedule a drain."""
+    settings.FACE_EMBEDDING_EXECUTION_MODE = "celery"
+    cache.clear()
+    with patch("students.services.embedding_worker.schedule_photo_embeddings") as schedule:
+        yield schedule
+    cache.clear()
+
+
+@pytest.fixture
+def fake_models():
+    """Detector finds one face unless the photo is NO_FACE; the model returns a fixed vector."""
+
+    def detect_best_face(photo_data):
+        if bytes(photo_data) == NO_FACE:
+            raise PhotoEmbeddingError("No faces detected in photo")
+        return {"bbox": (10, 10, 100, 100), "confidence": 0.95, "image": Image.new("RGB", (112, 112))}
+
+    def detect_best_faces(photos_data):
+        results = []
+        for photo_data in photos_data:
+            try:
+                results.append((detect_best_face(photo_data), ""))
+            except PhotoEmbeddingError as e:
+                results.append((None, str(e)))
+        return results
+
+    model = Mock()
+    model.generate_embeddings.side_effect = lambda images: np.full((len(images), 192), 0.5, dtype=np.float32)
+    with (
+        patch.object(FaceRecognitionService, "_detect_best_face", side_effect=detect_best_face),
+        patch.object(FaceRecognitionService, "_detect_best_faces", side_effect=detect_best_faces),
+        patch.object(FaceRecognitionService, "_get_model_instance", return_value=model),
+    ):
+        yield model
+
+
+@pytest.mark.django_db
+class TestEmbeddingExecutionMode:
+    def test_worker_mode_leaves_photo_pending_and_schedules_after_commit(self, worker_mode, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            photo = StudentPhotoFactory()
+            worker_mode.assert_not_called()  # Not before the upload commits
+
+        photo.refresh_from_db()
+        assert photo.embedding_status == "pending"
+        assert not FaceEmbeddingMetadata.objects.filter(student_photo=photo).exists()
+        worker_mode.assert_called_once()
+
+    def test_sync_mode_records_failure_on_photo(self, settings, fake_models):
+        settings.FACE_EMBEDDING_EXECUTION_MODE = "sync"
+
+        photo = StudentPhotoFactory(photo_data=NO_FACE)
+
+        photo.refresh_from_db()
+        assert photo.embedding_status == "failed"
+        assert photo.embedding_error == "No faces detected in photo"
+        assert photo.embedding_attempts == 1
+
+    def test_celery_drain_is_debounced(self, settings):
+        settings.FACE_EMBEDDING_EXECUTION_MODE = "celery"
+        cache.clear()
+
+        with patch("students.tasks.process_pending_photo_embeddings_task.apply_async") as apply_async:
+            schedule_photo_embeddings()
+            schedule_photo_embeddings()
+
+        apply_async.assert_called_once_with(countdown=settings.FACE_EMBEDDING_DEBOUNCE_SECONDS)
+        cache.clear()
+
+
+@pytest.mark.django_db
+class TestBatchedEmbeddingWorker:
+    def test_drain_embeds_pending_photos_in_batches(self, worker_mode, fake_models):
+        photos = StudentPhotoFactory.create_batch(5)
+        version_before = DatasetVersion.current()
+
+        result = process_pending_photo_embeddings(batch_size=2)
+
+        assert result == {"batches": 3, "completed": 5, "failed": 0, "embeddings": 5}
+        assert FaceEmbeddingMetadata.objects.filter(student_photo__in=photos).count() == 5
+        assert set(StudentPhoto.objects.values_list("embedding_status", "embedding_attempts")) == {("completed", 1)}
+        assert DatasetVersion.current() == version_before + 3  # One bump per batch, not per embedding
+
+    def test_model_runs_once_per_batch(self, worker_mode, fake_models):
+        StudentPhotoFactory.create_batch(3)
+
+        with (
+            patch.dict(FACE_RECOGNITION_SERVICE_CONFIG, {"max_concurrent_processes": 1}),
+            patch.object(FaceRecognitionService, "_get_model_instance", return_value=fake_models) as get_model,
+        ):
+            process_pending_photo_embeddings(batch_size=3)
+
+        get_model.assert_called_once()
+        fake_models.generate_embeddings.assert_called_once()  # Whole batch in one inference call
+        assert len(fake_models.generate_embeddings.call_args.args[0]) == 3
+
+    def test_batch_split_across_pooled_instances(self, worker_mode, fake_models):
+        StudentPhotoFactory.create_batch(5)
+
+        with patch.dict(FACE_RECOGNITION_SERVICE_CONFIG, {"max_concurrent_processes": 2}):
+            result = process_pending_photo_embeddings(batch_size=5)
+
+        assert result["embeddings"] == 5
+        chunk_sizes = sorted(len(call.args[0]) for call in fake_models.generate_embeddings.call_args_list)
+        assert chunk_sizes == [2, 3]  # One concurrent inference call per pooled instance
+
+    def test_failed_photo_does_not_fail_batch(self, worker_mode, fake_models):
+        good = StudentPhotoFactory()
+        bad = StudentPhotoFactory(photo_data=NO_FACE)
+
+        result = process_pending_photo_embeddings()
+
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        assert result["completed"] == 1
+        assert result["failed"] == 1
+        assert good.embedding_status == "completed"
+        assert bad.embedding_status == "failed"
+        assert bad.embedding_error == "No faces detected in photo"
+
+    def test_retry_failed_respects_max_attempts(self, worker_mode, fake_models, settings):
+        settings.FACE_EMBEDDING_MAX_ATTEMPTS = 2
+        photo = StudentPhotoFactory(photo_data=NO_FACE)
+
+        process_pending_photo_embeddings()
+        assert retry_failed_photo_embeddings() == 1
+        process_pending_photo_embeddings()
+
+        photo.refresh_from_db()
+        assert photo.embedding_attempts == 2
+        assert retry_failed_photo_embeddings() == 0  # Out of attempts
+        assert retry_failed_photo_embeddings([photo.photo_id]) == 1  # Explicit retry ignores the limit
+
+    def test_stale_processing_photo_is_claimed_again(self, worker_mode, settings):
+        stale = StudentPhotoFactory()
+        active = StudentPhotoFactory()
+        long_ago = timezone.now() - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT + 60)
+        StudentPhoto.objects.filter(pk=stale.pk).update(embedding_status="processing", embedding_updated_at=long_ago)
+        StudentPhoto.objects.filter(pk=active.pk).update(embedding_status="processing", embedding_updated_at=timezone.now())
+
+        assert claim_pending_photos(10) == [stale.photo_id]
@@ -1,10 +1,20 @@
+from datetime import time
+import json
 from unittest.mock import AsyncMock, patch
 
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
 from django.utils import timezone
 import pytest
 
 from buses.models import Bus, Route
 from kiosks.models import BusLocation, Kiosk
+from kiosks.models_operation_timing import OperationSlot, OperationTiming
+from kiosks.signals import record_dataset_change
+from realtime.consumers import BusTrackingConsumer, DashboardConsumer, KioskConsumer
+from tests.factories import UserFactory
 
 
 @pytest.mark.django_db
@@ -114,3 +124,124 @@ class TestBusLocationSignal:
             BusLocation.objects.create(kiosk=kiosk, latitude=22.5726, longitude=88.3639, timestamp=timezone.now())
         except Exception as e:
             pytest.fail(f"Signal handler raised exception: {e}")
+
+
+@pytest.mark.django_db
+class TestKioskPushSignals:
+    """Test snapshot invalidation, config and schedule pushes to kiosks."""
+
+    @pytest.fixture
+    def channel_layer(self):
+        with patch("realtime.signals.get_channel_layer") as mock_get_channel_layer:
+            mock_get_channel_layer.return_value = AsyncMock()
+            yield mock_get_channel_layer.return_value
+
+    def sent(self, channel_layer):
+        return [(call.args[0], call.args[1]) for call in channel_layer.group_send.await_args_list]
+
+    def test_dataset_change_pushed_to_fleet_after_commit(self, channel_layer, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            record_dataset_change(full_resync=True)
+            channel_layer.group_send.assert_not_awaited()  # Not before commit
+
+        assert len(callbacks) == 1
+        [(group, event)] = self.sent(channel_layer)
+        assert group == "kiosk_updates"
+        assert event["type"] == "dataset_version_changed"
+        assert event["dataset_version"] >= 1
+
+    def test_config_change_pushed_to_kiosk(self, channel_layer, django_capture_on_commit_callbacks):
+        kiosk = Kiosk.objects.create(kiosk_id="KIOSK_PUSH")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            kiosk.snapshot_embedding_dtype = "int8"
+            kiosk.save()
+
+        [(group, event)] = self.sent(channel_layer)
+        assert group == "kiosk_KIOSK_PUSH"
+        assert event["type"] == "kiosk_config_changed"
+
+    def test_heartbeat_update_not_pushed(self, channel_layer, django_capture_on_commit_callbacks):
+        kiosk = Kiosk.objects.create(kiosk_id="KIOSK_PUSH")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            kiosk.update_heartbeat()
+
+        channel_layer.group_send.assert_not_awaited()
+
+    def test_schedule_change_pushed_to_kiosks_using_timing(self, channel_layer, django_capture_on_commit_callbacks):
+        timing = OperationTiming.objects.create(name="Morning Shift")
+        Kiosk.objects.create(kiosk_id="KIOSK_A", operation_timing=timing)
+        Kiosk.objects.create(kiosk_id="KIOSK_B")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            OperationSlot.objects.create(timing=timing, start_time=time(8, 0), end_time=time(10, 0))
+
+        [(group, event)] = self.sent(channel_layer)
+        assert group == "kiosk_KIOSK_A"
+        assert event["type"] == "kiosk_schedule_changed"
+        assert event["operation_timing_id"] == timing.pk
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestKioskConsumer:
+    """Test the kiosk WebSocket consumer."""
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(KioskConsumer.as_asgi(), "/ws/kiosk/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    async def test_rejects_non_kiosk(self):
+        communicator, connected = await self.connect(AnonymousUser())
+
+        assert not connected
+        await communicator.disconnect()
+
+    async def test_kiosk_receives_version_and_pushes(self):
+        kiosk = await sync_to_async(Kiosk.objects.create)(kiosk_id="KIOSK_WS")
+        communicator, connected = await self.connect(kiosk)
+        assert connected
+
+        hello = json.loads(await communicator.receive_from())
+        assert hello == {"type": "dataset_version", "data": {"dataset_version": 0}}
+
+        await get_channel_layer().group_send("kiosk_updates", {"type": "dataset_version_changed", "dataset_version": 7})
+        pushed = json.loads(await communicator.receive_from())
+        assert pushed == {"type": "dataset_version", "data": {"dataset_version": 7}}
+
+        await communicator.disconnect()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestConsumerPrincipals:
+    """Dashboard and bus tracking sockets are for users; kiosk tokens are closed with 4001."""
+
+    async def connect(self, consumer, path, user):
+        communicator = WebsocketCommunicator(consumer.as_asgi(), path)
+        communicator.scope["user"] = user
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    @pytest.mark.parametrize(("consumer", "path"), [(DashboardConsumer, "/ws/dashboard/"), (BusTrackingConsumer, "/ws/bus-tracking/")])
+    async def test_kiosk_is_rejected(self, consumer, path):
+        kiosk = await sync_to_async(Kiosk.objects.create)(kiosk_id="KIOSK_PRINCIPAL")
+
+        communicator, connected, code = await self.connect(consumer, path, kiosk)
+
+        assert not connected
+        assert code == 4001
+        await communicator.disconnect()
+
+    async def test_user_can_track_buses(self):
+        user = await sync_to_async(UserFactory)()
+
+        communicator, connected, _ = await self.connect(BusTrackingConsumer, "/ws/bus-tracking/", user)
+
+        assert connected
+        initial = json.loads(await communicator.receive_from())
+        assert initial["type"] == "initial_locations"
+        await communicator.disconnect()
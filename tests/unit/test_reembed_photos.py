@@ -0,0 +1,124 @@
+from io import BytesIO
+import json
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
+import numpy as np
+from PIL import Image
+import pytest
+
+from ml_models.config import FACE_RECOGNITION_MODELS
+from students.models import FaceEmbeddingMetadata, StudentPhoto
+from students.services.face_recognition_service import FaceRecognitionService
+from students.services.reembedding import model_version, photos_missing_embeddings
+from tests.factories import FaceEmbeddingMetadataFactory, SchoolFactory, StudentFactory, StudentPhotoFactory
+
+NO_FACE = b"no-face"
+
+
+@pytest.fixture
+def photos_without_signal_embedding(settings):
+    """Photo saves only schedule the worker, which is not run."""
+    settings.FACE_EMBEDDING_EXECUTION_MODE = "celery"
+    with patch("students.services.embedding_worker.schedule_photo_embeddings"):
+        yield
+
+
+@pytest.fixture
+def fake_models():
+    """Every photo has one face unless it is NO_FACE; the model returns a fixed vector."""
+
+    def detect_best_faces(photos_data):
+        pixels = np.random.default_rng(0).integers(0, 256, (112, 112, 3), dtype=np.uint8)
+        face = {"bbox": (10, 10, 100, 100), "confidence": 0.95, "image": Image.fromarray(pixels)}
+        return [(None, "No faces detected in photo") if bytes(data) == NO_FACE else (face, "") for data in photos_data]
+
+    model = Mock()
+    model.generate_embeddings.side_effect = lambda images: np.full((len(images), 192), 0.5, dtype=np.float32)
+    with (
+        patch.object(FaceRecognitionService, "_detect_best_faces", side_effect=detect_best_faces) as detect,
+        patch.object(FaceRecognitionService, "_get_model_instance", return_value=model),
+    ):
+        model.detect = detect
+        yield model
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("photos_without_signal_embedding")
+class TestReembedPhotos:
+    def test_selects_photos_without_current_version(self):
+        current = FaceEmbeddingMetadataFactory(model_name="mobilefacenet", model_version=model_version("mobilefacenet")).student_photo
+        outdated = FaceEmbeddingMetadataFactory(model_name="mobilefacenet", model_version="0").student_photo
+        other_model = FaceEmbeddingMetadataFactory(model_name="arcface", model_version=model_version("mobilefacenet")).student_photo
+        missing = StudentPhotoFactory()
+
+        selected = set(photos_missing_embeddings("mobilefacenet"))
+
+        assert selected == {outdated, other_model, missing}
+        assert current not in selected
+
+    def test_school_filter(self):
+        school = SchoolFactory()
+        in_school = StudentPhotoFactory(student=StudentFactory(school=school))
+        StudentPhotoFactory()
+
+        assert list(photos_missing_embeddings("mobilefacenet", school.school_id)) == [in_school]
+
+    def test_command_replaces_outdated_embeddings(self, fake_models, tmp_path):
+        outdated = FaceEmbeddingMetadataFactory(model_name="mobilefacenet", model_version="0")
+        StudentPhotoFactory.create_batch(2)
+
+        call_command("reembed_photos", "--model", "mobilefacenet", "--batch-size", "2", "--checkpoint-dir", str(tmp_path))
+
+        assert not FaceEmbeddingMetadata.objects.filter(pk=outdated.pk).exists()
+        assert set(FaceEmbeddingMetadata.objects.values_list("model_name", "model_version")) == {("mobilefacenet", model_version("mobilefacenet"))}
+        assert FaceEmbeddingMetadata.objects.count() == 3
+
+    def test_checkpoint_skips_failed_photos_on_resume(self, fake_models, tmp_path):
+        good = StudentPhotoFactory()
+        bad = StudentPhotoFactory(photo_data=NO_FACE)
+        args = ["reembed_photos", "--model", "mobilefacenet", "--checkpoint-dir", str(tmp_path)]
+
+        call_command(*args)
+
+        checkpoint = json.loads((tmp_path / f"reembed_mobilefacenet_v{model_version('mobilefacenet')}.json").read_text())
+        assert checkpoint["completed"] == 1
+        assert checkpoint["failed_ids"] == [str(bad.photo_id)]
+        assert FaceEmbeddingMetadata.objects.filter(student_photo=good).exists()
+
+        fake_models.generate_embeddings.reset_mock()
+        call_command(*args)  # Resume: nothing left but the skipped photo
+        fake_models.generate_embeddings.assert_not_called()
+
+        call_command(*args, "--restart")
+        assert FaceEmbeddingMetadata.objects.filter(student_photo=bad).count() == 0  # Retried, still no face
+
+    def test_limit(self, fake_models, tmp_path):
+        StudentPhotoFactory.create_batch(3)
+
+        call_command("reembed_photos", "--model", "mobilefacenet", "--limit", "2", "--checkpoint-dir", str(tmp_path))
+
+        assert FaceEmbeddingMetadata.objects.count() == 2
+        assert photos_missing_embeddings("mobilefacenet").count() == 1
+
+    def test_new_version_starts_from_cached_face_crop(self, fake_models, tmp_path):
+        photo = StudentPhotoFactory()
+        args = ["reembed_photos", "--model", "mobilefacenet", "--checkpoint-dir", str(tmp_path)]
+        call_command(*args)
+
+        photo.refresh_from_db()
+        assert Image.open(BytesIO(photo.face_crop)).size == (112, 112)
+        assert photo.face_bbox == [10, 10, 100, 100]
+        assert photo.face_confidence == 0.95
+
+        with patch.dict(FACE_RECOGNITION_MODELS["mobilefacenet"], {"version": "upgraded"}):
+            call_command(*args)
+
+        assert fake_models.detect.call_args.args[0] == []  # No photo decoded or detected again
+        assert set(FaceEmbeddingMetadata.objects.values_list("model_version", flat=True)) == {"upgraded"}
+        # Lossless crop - the model sees the same pixels as the fresh detection
+        fresh_input = fake_models.generate_embeddings.call_args_list[0].args[0][0]
+        cached_input = fake_models.generate_embeddings.call_args.args[0][0]
+        assert cached_input.shape == (112, 112, 3)
+        np.testing.assert_array_equal(cached_input, fresh_input)
+        assert StudentPhoto.objects.get(pk=photo.pk).embedding_status == "completed"
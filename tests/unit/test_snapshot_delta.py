@@ -0,0 +1,115 @@
+import base64
+import struct
+
+import pytest
+
+from kiosks.models import DatasetVersion
+from kiosks.services import SnapshotDeltaGenerator, SnapshotScope
+from tests.factories import BusFactory, FaceEmbeddingMetadataFactory, SchoolFactory, StudentFactory
+
+
+@pytest.mark.django_db
+class TestSnapshotDeltaGenerator:
+    """Deltas carry only students changed since the kiosk's dataset version."""
+
+    def test_delta_contains_only_changed_students(self):
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+        changed = StudentFactory(assigned_bus=bus)
+        base_version = DatasetVersion.current()
+
+        FaceEmbeddingMetadataFactory(student_photo__student=changed, embedding=[1.0, 2.0])
+
+        delta = SnapshotDeltaGenerator(bus.bus_id, base_version).generate()  # type: ignore[attr-defined]
+
+        assert delta["full_snapshot_required"] is False
+        assert delta["target_version"] == DatasetVersion.current()
+        assert [row["student_id"] for row in delta["students"]] == [str(changed.student_id)]  # type: ignore[attr-defined]
+        assert len(delta["face_embeddings"]) == 1
+        blob = base64.b64decode(delta["face_embeddings"][0]["embedding_vector"])
+        assert struct.unpack("<2f", blob) == (1.0, 2.0)
+        assert delta["deleted_student_ids"] == []
+
+    def test_deleted_student_is_tombstoned(self):
+        student = StudentFactory()
+        bus = student.assigned_bus
+        student_id = str(student.student_id)  # type: ignore[attr-defined]
+        base_version = DatasetVersion.current()
+
+        student.delete()
+
+        delta = SnapshotDeltaGenerator(bus.bus_id, base_version).generate()
+
+        assert delta["students"] == []
+        assert delta["deleted_student_ids"] == [student_id]
+
+    def test_no_changes_gives_empty_delta(self):
+        student = StudentFactory()
+        base_version = DatasetVersion.current()
+
+        delta = SnapshotDeltaGenerator(student.assigned_bus.bus_id, base_version).generate()
+
+        assert delta["full_snapshot_required"] is False
+        assert delta["students"] == []
+        assert delta["deleted_student_ids"] == []
+
+    def test_base_too_old_requires_full_snapshot(self, settings):
+        settings.SNAPSHOT_DELTA_MAX_VERSIONS = 1
+        bus = BusFactory()
+        base_version = DatasetVersion.current()
+
+        StudentFactory(assigned_bus=bus)
+        StudentFactory(assigned_bus=bus)
+
+        delta = SnapshotDeltaGenerator(bus.bus_id, base_version).generate()  # type: ignore[attr-defined]
+
+        assert delta["full_snapshot_required"] is True
+
+    def test_bus_deletion_requires_full_snapshot(self):
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+        base_version = DatasetVersion.current()
+
+        bus_id = bus.bus_id  # type: ignore[attr-defined]
+        bus.delete()
+
+        delta = SnapshotDeltaGenerator(bus_id, base_version).generate()
+
+        assert delta["full_snapshot_required"] is True
+
+    def test_student_leaving_scope_becomes_hint(self):
+        school = SchoolFactory()
+        bus = BusFactory()
+        other_bus = BusFactory()
+        StudentFactory(assigned_bus=bus, school=school)
+        mover = StudentFactory(assigned_bus=bus, school=school)
+        base_version = DatasetVersion.current()
+
+        mover.assigned_bus = other_bus
+        mover.save()
+
+        delta = SnapshotDeltaGenerator(bus.bus_id, base_version, SnapshotScope(scope="bus")).generate()  # type: ignore[attr-defined]
+
+        mover_id = str(mover.student_id)  # type: ignore[attr-defined]
+        assert delta["students"] == []
+        assert delta["wrong_bus_hints"] == [{"student_id": mover_id, "bus_number": other_bus.bus_number}]
+        assert delta["deleted_student_ids"] == [mover_id]
+
+    def test_ann_snapshot_requires_full_snapshot(self, snapshot_store, settings):
+        settings.SNAPSHOT_ANN_ENABLED = True
+        settings.SNAPSHOT_ANN_MIN_EMBEDDINGS = 1
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 0.0])
+        metadata = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+        assert metadata["ann_cluster_count"] > 0
+
+        FaceEmbeddingMetadataFactory(student_photo__student=StudentFactory(assigned_bus=bus), embedding=[0.0, 1.0])
+
+        # Delta rows carry no cluster_id - the kiosk must re-download its ANN snapshot
+        ann_indexed = snapshot_store.has_ann_index(bus.bus_id)  # type: ignore[attr-defined]
+        delta = SnapshotDeltaGenerator(bus.bus_id, metadata["dataset_version"], ann_indexed=ann_indexed).generate()  # type: ignore[attr-defined]
+
+        assert ann_indexed is True
+        assert delta["full_snapshot_required"] is True
+        assert delta["face_embeddings"] == []
@@ -0,0 +1,201 @@
+import gzip
+
+from django.urls import reverse
+import pytest
+from rest_framework import status
+
+from kiosks.services import SnapshotScope
+from kiosks.utils import calculate_checksum
+from kiosks.utils.http_range import etag_matches, negotiate_encoding, parse_range_header
+from tests.factories import KioskFactory, StudentFactory
+
+
+def body(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.fixture
+def kiosk(db):
+    kiosk = KioskFactory()
+    StudentFactory(assigned_bus=kiosk.bus)
+    return kiosk
+
+
+@pytest.fixture
+def kiosk_client(api_client, kiosk, snapshot_store):
+    api_client.force_authenticate(user=kiosk)
+    return api_client
+
+
+@pytest.fixture
+def snapshot_url(kiosk):
+    return reverse("kiosk-snapshot", kwargs={"kiosk_id": kiosk.kiosk_id})
+
+
+@pytest.mark.django_db
+class TestSnapshotDownload:
+    """Snapshot downloads stream the stored artifact with ETag and Range support."""
+
+    def test_full_download_has_etag(self, kiosk_client, snapshot_url):
+        response = kiosk_client.get(snapshot_url)
+
+        content = body(response)
+        assert response.status_code == status.HTTP_200_OK
+        assert content.startswith(b"SQLite format 3\x00")
+        assert response["ETag"] == f'"{response["x-snapshot-checksum"]}"'
+        assert response["Accept-Ranges"] == "bytes"
+        assert int(response["Content-Length"]) == len(content)
+
+    def test_matching_if_none_match_returns_304(self, kiosk_client, snapshot_url):
+        etag = kiosk_client.get(snapshot_url)["ETag"]
+
+        response = kiosk_client.get(snapshot_url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert response.content == b""
+
+    def test_range_resumes_download(self, kiosk_client, snapshot_url):
+        full = kiosk_client.get(snapshot_url)
+        content = body(full)
+
+        response = kiosk_client.get(snapshot_url, HTTP_RANGE="bytes=100-", HTTP_IF_RANGE=full["ETag"])
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response["Content-Range"] == f"bytes 100-{len(content) - 1}/{len(content)}"
+        assert body(response) == content[100:]
+
+    def test_stale_if_range_sends_full_body(self, kiosk_client, snapshot_url):
+        response = kiosk_client.get(snapshot_url, HTTP_RANGE="bytes=100-", HTTP_IF_RANGE='"stale"')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert body(response).startswith(b"SQLite format 3\x00")
+
+    def test_unsatisfiable_range_returns_416(self, kiosk_client, snapshot_url):
+        size = len(body(kiosk_client.get(snapshot_url)))
+
+        response = kiosk_client.get(snapshot_url, HTTP_RANGE=f"bytes={size}-")
+
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response["Content-Range"] == f"bytes */{size}"
+
+    def test_gzip_is_negotiated(self, kiosk_client, snapshot_url, settings):
+        settings.SNAPSHOT_COMPRESSION_ENCODINGS = ["gzip"]
+        identity = kiosk_client.get(snapshot_url)
+        identity_content = body(identity)
+
+        response = kiosk_client.get(snapshot_url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Vary"] == "Accept-Encoding"
+        assert gzip.decompress(body(response)) == identity_content
+        # Each representation has its own validator
+        assert response["ETag"] == f'"{response["x-snapshot-compressed-checksum"]}"'
+        assert response["ETag"] != identity["ETag"]
+        assert response["x-snapshot-checksum"] == identity["x-snapshot-checksum"]
+        assert int(response["x-snapshot-size"]) == len(identity_content)
+
+    def test_identity_without_accept_encoding(self, kiosk_client, snapshot_url):
+        response = kiosk_client.get(snapshot_url)
+
+        assert "Content-Encoding" not in response
+        assert body(response).startswith(b"SQLite format 3\x00")
+
+    def test_missing_artifact_is_rebuilt_on_next_request(self, kiosk_client, kiosk, snapshot_url, snapshot_store):
+        kiosk_client.get(snapshot_url)
+        metadata = snapshot_store.get_or_build(kiosk.bus.bus_id, SnapshotScope.for_kiosk(kiosk))
+        snapshot_store.storage.delete(metadata["artifact_name"])
+
+        response = kiosk_client.get(snapshot_url)
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert "Retry-After" in response
+        retried = kiosk_client.get(snapshot_url)
+        assert retried.status_code == status.HTTP_200_OK
+        assert body(retried).startswith(b"SQLite format 3\x00")
+
+
+@pytest.mark.django_db
+class TestSnapshotChunks:
+    """Chunked transfer: manifest of checksummed chunks, served by index."""
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, settings):
+        settings.SNAPSHOT_CHUNK_SIZE = 4096
+
+    def test_chunks_reassemble_snapshot(self, kiosk_client, kiosk, snapshot_url):
+        content = body(kiosk_client.get(snapshot_url))
+        manifest = kiosk_client.get(reverse("kiosk-snapshot-manifest", kwargs={"kiosk_id": kiosk.kiosk_id})).data
+
+        assert manifest["checksum"] == calculate_checksum(content)
+        assert manifest["chunk_size"] == 4096
+        assert len(manifest["chunks"]) == -(-len(content) // 4096)
+
+        parts = []
+        for chunk in manifest["chunks"]:
+            url = reverse("kiosk-snapshot-chunk", kwargs={"kiosk_id": kiosk.kiosk_id, "index": chunk["index"]})
+            response = kiosk_client.get(url, {"checksum": manifest["checksum"]})
+            data = body(response)
+            assert calculate_checksum(data) == chunk["checksum"] == response["x-chunk-checksum"]
+            parts.append(data)
+
+        assert b"".join(parts) == content
+
+    def test_changed_snapshot_returns_409(self, kiosk_client, kiosk):
+        url = reverse("kiosk-snapshot-chunk", kwargs={"kiosk_id": kiosk.kiosk_id, "index": 0})
+
+        response = kiosk_client.get(url, {"checksum": "stale"})
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data["checksum"]
+
+    def test_unknown_chunk_returns_404(self, kiosk_client, kiosk):
+        url = reverse("kiosk-snapshot-chunk", kwargs={"kiosk_id": kiosk.kiosk_id, "index": 10_000})
+
+        assert kiosk_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestRangeHeaders:
+    """Range, If-None-Match and Accept-Encoding parsing."""
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (None, None),
+            ("bytes=0-99", (0, 99)),
+            ("bytes=900-", (900, 999)),
+            ("bytes=-100", (900, 999)),
+            ("bytes=990-5000", (990, 999)),
+            ("bytes=0-1,5-9", None),
+            ("items=0-1", None),
+            ("bytes=abc-", None),
+        ],
+    )
+    def test_parse_range_header(self, header, expected):
+        assert parse_range_header(header, 1000) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+    def test_unsatisfiable_range(self, header):
+        with pytest.raises(ValueError):
+            parse_range_header(header, 1000)
+
+    def test_etag_matches_weak_and_wildcard(self):
+        assert etag_matches('W/"abc", "def"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"def"', '"abc"')
+        assert not etag_matches(None, '"abc"')
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (None, None),
+            ("gzip", "gzip"),
+            ("gzip, zstd", "zstd"),
+            ("gzip;q=1.0, zstd;q=0.5", "gzip"),
+            ("*", "zstd"),
+            ("zstd;q=0, *", "gzip"),
+            ("br", None),
+        ],
+    )
+    def test_negotiate_encoding(self, header, expected):
+        assert negotiate_encoding(header, ("zstd", "gzip")) == expected
@@ -2,10 +2,12 @@ from pathlib import Path
 import sqlite3
 import tempfile
 
+import numpy as np
 import pytest
 
-from kiosks.services import SnapshotGenerator
-from tests.factories import BusFactory, FaceEmbeddingMetadataFactory, StudentFactory
+from kiosks.services import SnapshotGenerator, SnapshotScope, snapshot_students
+from kiosks.utils import calculate_checksum
+from tests.factories import BusFactory, FaceEmbeddingMetadataFactory, RouteFactory, SchoolFactory, StudentFactory
 
 
 @pytest.mark.django_db
@@ -13,13 +15,14 @@ class TestSnapshotGenerator:
     """Test the new in-memory SnapshotGenerator."""
 
     def test_snapshot_contains_correct_data(self):
-        """Verify snapshot contains ALL students (not bus-specific) with bus_id for cross-bus recognition."""
+        """Verify school-scoped snapshot contains all school students with bus_id for cross-bus recognition."""
+        school = SchoolFactory()
         bus1 = BusFactory()
-        student1 = StudentFactory(assigned_bus=bus1)
+        student1 = StudentFactory(assigned_bus=bus1, school=school)
         FaceEmbeddingMetadataFactory(student_photo__student=student1, embedding=[1.0, 2.0])
 
         bus2 = BusFactory()
-        student2 = StudentFactory(assigned_bus=bus2)  # Different bus
+        student2 = StudentFactory(assigned_bus=bus2, school=school)  # Different bus, same school
         FaceEmbeddingMetadataFactory(student_photo__student=student2, embedding=[3.0, 4.0])
 
         # Generate snapshot for bus1 - should include ALL students
@@ -64,13 +67,14 @@ class TestSnapshotGenerator:
             Path(db_path).unlink()
 
     def test_snapshot_has_valid_metadata(self):
-        """Verify the generated snapshot metadata is correct (includes all students)."""
+        """Verify the generated snapshot metadata is correct (includes all school students)."""
+        school = SchoolFactory()
         bus1 = BusFactory()
-        student1 = StudentFactory(assigned_bus=bus1)
+        student1 = StudentFactory(assigned_bus=bus1, school=school)
         FaceEmbeddingMetadataFactory(student_photo__student=student1)
 
         bus2 = BusFactory()
-        student2 = StudentFactory(assigned_bus=bus2)
+        student2 = StudentFactory(assigned_bus=bus2, school=school)
         FaceEmbeddingMetadataFactory(student_photo__student=student2)
 
         generator = SnapshotGenerator(bus_id=str(bus1.bus_id))  # type: ignore[attr-defined]
@@ -125,3 +129,246 @@ class TestSnapshotGenerator:
             conn.close()
         finally:
             Path(db_path).unlink()
+
+
+@pytest.mark.django_db
+class TestSnapshotScopes:
+    """Snapshot scope tiers, school boundary, budget and wrong-bus hints."""
+
+    def _read(self, snapshot_bytes):
+        conn = sqlite3.connect(":memory:")
+        conn.deserialize(snapshot_bytes)
+        students = {row[0] for row in conn.execute("SELECT student_id FROM students")}
+        hints = dict(conn.execute("SELECT student_id, bus_number FROM wrong_bus_hints").fetchall())
+        conn.close()
+        return students, hints
+
+    def test_photo_blobs_are_not_loaded(self):
+        student = StudentFactory()
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 2.0])
+
+        (loaded,) = snapshot_students([student.student_id])  # type: ignore[attr-defined]
+        (photo,) = loaded.photos.all()
+
+        assert {"photo_data", "face_crop"} <= photo.get_deferred_fields()
+        assert len(photo.face_embeddings.all()) == 1
+
+    def test_other_schools_are_excluded(self):
+        bus = BusFactory()
+        own = StudentFactory(assigned_bus=bus)
+        StudentFactory(assigned_bus=BusFactory())  # Different school
+
+        snapshot_bytes, metadata = SnapshotGenerator(bus_id=bus.bus_id).generate()  # type: ignore[attr-defined]
+        students, hints = self._read(snapshot_bytes)
+
+        assert students == {str(own.student_id)}  # type: ignore[attr-defined]
+        assert hints == {}
+        assert metadata["snapshot_scope"] == "school"
+
+    def test_route_scope_ships_route_and_hints_rest_of_school(self):
+        school = SchoolFactory()
+        route = RouteFactory()
+        bus = BusFactory(route=route)
+        route_bus = BusFactory(route=route)
+        other_bus = BusFactory()
+        own = StudentFactory(assigned_bus=bus, school=school)
+        route_peer = StudentFactory(assigned_bus=route_bus, school=school)
+        elsewhere = StudentFactory(assigned_bus=other_bus, school=school)
+
+        generator = SnapshotGenerator(bus_id=bus.bus_id, scope=SnapshotScope(scope="route"))  # type: ignore[attr-defined]
+        students, hints = self._read(generator.generate()[0])
+
+        assert students == {str(own.student_id), str(route_peer.student_id)}  # type: ignore[attr-defined]
+        assert hints == {str(elsewhere.student_id): other_bus.bus_number}  # type: ignore[attr-defined]
+
+    def test_budget_trims_wider_tiers_but_keeps_bus_students(self):
+        school = SchoolFactory()
+        bus = BusFactory()
+        own = StudentFactory(assigned_bus=bus, school=school)
+        FaceEmbeddingMetadataFactory.create_batch(2, student_photo__student=own)
+        peer = StudentFactory(assigned_bus=BusFactory(), school=school)
+        FaceEmbeddingMetadataFactory(student_photo__student=peer)
+
+        generator = SnapshotGenerator(bus_id=bus.bus_id, scope=SnapshotScope(max_embeddings=1))  # type: ignore[attr-defined]
+        snapshot_bytes, metadata = generator.generate()
+        students, hints = self._read(snapshot_bytes)
+
+        assert students == {str(own.student_id)}  # type: ignore[attr-defined]
+        assert str(peer.student_id) in hints  # type: ignore[attr-defined]
+        assert metadata["embedding_count"] == 2
+
+
+@pytest.mark.django_db
+class TestEmbeddingSelection:
+    """Snapshots ship the best, diverse embeddings of each student."""
+
+    def test_top_k_per_student_and_model(self, settings):
+        settings.SNAPSHOT_EMBEDDINGS_PER_STUDENT = 1
+        student = StudentFactory()
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 0.0], quality_score=0.6)
+        best = FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[0.0, 1.0], quality_score=0.9)
+        other_model = FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 0.0], model_name="arcface")
+
+        snapshot_bytes, metadata = SnapshotGenerator(bus_id=student.assigned_bus.bus_id).generate()
+        conn = sqlite3.connect(":memory:")
+        conn.deserialize(snapshot_bytes)
+        rows = conn.execute("SELECT embedding_vector, model_name FROM face_embeddings ORDER BY model_name").fetchall()
+        conn.close()
+
+        assert metadata["embedding_count"] == 2
+        assert rows == [(best.embedding_vector, "MobileFaceNet"), (other_model.embedding_vector, "arcface")]
+
+    def test_near_duplicates_and_floor(self, settings):
+        settings.SNAPSHOT_EMBEDDING_MAX_SIMILARITY = 0.99
+        settings.SNAPSHOT_EMBEDDING_MIN_QUALITY = 0.5
+        student = StudentFactory()
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 0.0], quality_score=0.9)
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[0.999, 0.045], quality_score=0.8)
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[0.0, 1.0], quality_score=0.3)
+
+        _, metadata = SnapshotGenerator(bus_id=student.assigned_bus.bus_id).generate()
+
+        assert metadata["embedding_count"] == 1
+
+    def test_budget_counts_selected_embeddings(self, settings):
+        settings.SNAPSHOT_EMBEDDINGS_PER_STUDENT = 1
+        school = SchoolFactory()
+        bus = BusFactory()
+        own = StudentFactory(assigned_bus=bus, school=school)
+        FaceEmbeddingMetadataFactory(student_photo__student=own)
+        peer = StudentFactory(assigned_bus=BusFactory(), school=school)
+        FaceEmbeddingMetadataFactory.create_batch(3, student_photo__student=peer)
+
+        _, metadata = SnapshotGenerator(bus_id=bus.bus_id, scope=SnapshotScope(max_embeddings=2)).generate()  # type: ignore[attr-defined]
+
+        assert metadata["student_count"] == 2
+        assert metadata["embedding_count"] == 2
+
+
+@pytest.mark.django_db
+class TestQuantizedSnapshots:
+    """Snapshots ship embeddings in the kiosk's configured precision."""
+
+    def _read(self, snapshot_bytes):
+        conn = sqlite3.connect(":memory:")
+        conn.deserialize(snapshot_bytes)
+        embedding_vector, embedding_scale = conn.execute("SELECT embedding_vector, embedding_scale FROM face_embeddings").fetchone()
+        metadata = dict(conn.execute("SELECT key, value FROM sync_metadata").fetchall())
+        conn.close()
+        return embedding_vector, embedding_scale, metadata
+
+    def test_float16_snapshot(self):
+        student = StudentFactory()
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[0.5, -0.25])
+
+        generator = SnapshotGenerator(bus_id=student.assigned_bus.bus_id, scope=SnapshotScope(embedding_dtype="float16"))
+        embedding_vector, embedding_scale, metadata = self._read(generator.generate()[0])
+
+        assert np.frombuffer(embedding_vector, dtype="<f2").tolist() == [0.5, -0.25]
+        assert embedding_scale is None
+        assert metadata["embedding_dtype"] == "float16"
+        assert metadata["embedding_scale"] == "1.0"
+
+    def test_int8_snapshot_stores_per_vector_scale(self):
+        student = StudentFactory()
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[0.5, -0.125])
+
+        generator = SnapshotGenerator(bus_id=student.assigned_bus.bus_id, scope=SnapshotScope(embedding_dtype="int8"))
+        embedding_vector, embedding_scale, metadata = self._read(generator.generate()[0])
+
+        assert np.frombuffer(embedding_vector, dtype="i1").tolist() == [127, -32]
+        assert embedding_scale == pytest.approx(0.5 / 127)
+        assert metadata["embedding_dtype"] == "int8"
+        assert metadata["embedding_scale"] == "per_vector"
+
+
+@pytest.mark.django_db
+class TestSnapshotAnnIndex:
+    """Large snapshots carry IVF-style centroids and per-embedding cluster ids."""
+
+    @pytest.fixture(autouse=True)
+    def ann_settings(self, settings):
+        settings.SNAPSHOT_ANN_ENABLED = True
+        settings.SNAPSHOT_ANN_MIN_EMBEDDINGS = 1
+        settings.SNAPSHOT_ANN_CLUSTER_SIZE = 2
+
+    def _read(self, snapshot_bytes):
+        conn = sqlite3.connect(":memory:")
+        conn.deserialize(snapshot_bytes)
+        cluster_ids = [row[0] for row in conn.execute("SELECT cluster_id FROM face_embeddings")]
+        centroids = conn.execute("SELECT cluster_id, model_name, member_count FROM embedding_centroids ORDER BY cluster_id").fetchall()
+        conn.close()
+        return cluster_ids, centroids
+
+    def test_embeddings_are_assigned_to_centroids(self):
+        student = StudentFactory()
+        for embedding in ([1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.1, 0.9]):
+            FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=embedding, model_name="mobilefacenet")
+
+        generator = SnapshotGenerator(bus_id=student.assigned_bus.bus_id)
+        snapshot_bytes, metadata = generator.generate()
+        cluster_ids, centroids = self._read(snapshot_bytes)
+
+        assert metadata["ann_cluster_count"] == 2
+        assert [(cluster_id, model_name) for cluster_id, model_name, _ in centroids] == [(0, "mobilefacenet"), (1, "mobilefacenet")]
+        assert sorted(cluster_ids) == [0, 0, 1, 1]
+        assert sum(member_count for _, _, member_count in centroids) == 4
+        assert set(generator.centroids) == {"mobilefacenet:2"}
+
+    def test_small_snapshot_has_no_index(self, settings):
+        settings.SNAPSHOT_ANN_MIN_EMBEDDINGS = 10
+        student = StudentFactory()
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 0.0])
+
+        snapshot_bytes, metadata = SnapshotGenerator(bus_id=student.assigned_bus.bus_id).generate()
+        cluster_ids, centroids = self._read(snapshot_bytes)
+
+        assert metadata["ann_cluster_count"] == 0
+        assert cluster_ids == [None]
+        assert centroids == []
+
+
+@pytest.mark.skipif(not hasattr(sqlite3.Connection, "serialize"), reason="sqlite3.serialize needs Python 3.11+")
+class TestSnapshotBuildModes:
+    """The in-memory (serialize) build is a drop-in for the temp-file build."""
+
+    def _rows(self):
+        blob = np.array([0.6, 0.8], dtype=np.float32).tobytes()
+        student_rows = [("student-1", "Student One", "active", "bus-1", "B1"), ("student-2", "Student Two", "inactive", "bus-2", "B2")]
+        embedding_rows = [("student-1", blob, 0.9, "mobilefacenet", None, 0), ("student-2", blob, 0.8, "mobilefacenet", None, None)]
+        hint_rows = [("student-3", "B3")]
+        centroid_rows = [(0, "mobilefacenet", blob, 1)]
+        return student_rows, embedding_rows, hint_rows, centroid_rows
+
+    def _build(self, build_mode, sync_timestamp):
+        generator = SnapshotGenerator(bus_id="bus-1", build_mode=build_mode)
+        generator.sync_timestamp = sync_timestamp
+        student_rows, embedding_rows, hint_rows, centroid_rows = self._rows()
+        return generator.build_database(student_rows, embedding_rows, "content-hash", hint_rows, centroid_rows)
+
+    def _dump(self, snapshot_bytes):
+        conn = sqlite3.connect(":memory:")
+        conn.deserialize(snapshot_bytes)
+        dump = list(conn.iterdump())
+        conn.close()
+        return dump
+
+    def test_memory_build_matches_file_build(self):
+        sync_timestamp = "2026-01-01T00:00:00+00:00"
+
+        memory_bytes = self._build("memory", sync_timestamp)
+        file_bytes = self._build("file", sync_timestamp)
+
+        assert memory_bytes.startswith(b"SQLite format 3\x00")
+        # Same schema (tables and indexes) and the same rows
+        assert self._dump(memory_bytes) == self._dump(file_bytes)
+
+    @pytest.mark.parametrize("build_mode", SnapshotGenerator.BUILD_MODES)
+    def test_same_input_builds_identical_bytes(self, build_mode):
+        sync_timestamp = "2026-01-01T00:00:00+00:00"
+
+        first = self._build(build_mode, sync_timestamp)
+        second = self._build(build_mode, sync_timestamp)
+
+        # The artifact checksum doubles as ETag - it must not depend on the build run
+        assert calculate_checksum(first) == calculate_checksum(second)
@@ -0,0 +1,145 @@
+from datetime import datetime, time, timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+import pytest
+from rest_framework import status
+
+from kiosks.models import KioskStatus
+from kiosks.models_operation_timing import OperationSlot, OperationTiming
+from kiosks.rollout import acquire_download_slot, active_download_count, get_eligible_after, release_download_slot, rollout_progress
+from tests.factories import KioskFactory, StudentFactory
+
+RELEASED_AT = timezone.make_aware(datetime(2026, 10, 16, 8, 30))
+
+
+def snapshot_metadata(dataset_version=1):
+    return {"sync_timestamp": RELEASED_AT.isoformat(), "dataset_version": dataset_version}
+
+
+@pytest.mark.django_db
+class TestEligibleAfter:
+    """Each kiosk gets a deterministic, jittered download time per dataset version."""
+
+    def test_jitter_is_deterministic_and_within_window(self, settings):
+        settings.SNAPSHOT_ROLLOUT_WINDOW_SECONDS = 900
+        kiosks = KioskFactory.create_batch(20)
+
+        offsets = [get_eligible_after(kiosk, snapshot_metadata()) - RELEASED_AT for kiosk in kiosks]
+
+        assert all(timedelta(0) <= offset < timedelta(seconds=900) for offset in offsets)
+        assert len(set(offsets)) > 1  # Spread across the window
+        assert get_eligible_after(kiosks[0], snapshot_metadata()) - RELEASED_AT == offsets[0]
+
+    def test_new_dataset_version_reshuffles(self, settings):
+        settings.SNAPSHOT_ROLLOUT_WINDOW_SECONDS = 900
+        kiosk = KioskFactory()
+
+        offsets = {get_eligible_after(kiosk, snapshot_metadata(version)) - RELEASED_AT for version in range(1, 6)}
+
+        assert len(offsets) > 1
+
+    def test_pushed_past_active_operation_slot(self, settings):
+        settings.SNAPSHOT_ROLLOUT_WINDOW_SECONDS = 900
+        timing = OperationTiming.objects.create(name="Morning Shift")
+        OperationSlot.objects.create(timing=timing, start_time=time(8, 0), end_time=time(10, 0))
+        kiosk = KioskFactory(operation_timing=timing)
+
+        eligible = get_eligible_after(kiosk, snapshot_metadata())
+
+        assert eligible == timezone.make_aware(datetime(2026, 10, 16, 10, 0))
+
+    def test_overnight_slot_from_previous_day(self, settings):
+        settings.SNAPSHOT_ROLLOUT_WINDOW_SECONDS = 1
+        timing = OperationTiming.objects.create(name="Night Shift")
+        OperationSlot.objects.create(timing=timing, start_time=time(22, 0), end_time=time(9, 0))
+        kiosk = KioskFactory(operation_timing=timing)
+
+        eligible = get_eligible_after(kiosk, snapshot_metadata())
+
+        assert eligible == timezone.make_aware(datetime(2026, 10, 16, 9, 0))
+
+    def test_inactive_timing_is_ignored(self, settings):
+        settings.SNAPSHOT_ROLLOUT_WINDOW_SECONDS = 900
+        timing = OperationTiming.objects.create(name="Retired", is_active=False)
+        OperationSlot.objects.create(timing=timing, start_time=time(8, 0), end_time=time(10, 0))
+        kiosk = KioskFactory(operation_timing=timing)
+
+        assert get_eligible_after(kiosk, snapshot_metadata()) - RELEASED_AT < timedelta(seconds=900)
+
+
+@pytest.mark.django_db
+class TestDownloadSlots:
+    """Concurrent snapshot downloads are capped fleet-wide."""
+
+    def test_cap_blocks_other_kiosks_until_release(self, settings, snapshot_store):
+        settings.SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS = 1
+
+        assert acquire_download_slot("KIOSK-A")
+        assert acquire_download_slot("KIOSK-A")  # Resumed download keeps its slot
+        assert not acquire_download_slot("KIOSK-B")
+        assert active_download_count() == 1
+
+        release_download_slot("KIOSK-A")
+
+        assert acquire_download_slot("KIOSK-B")
+
+    def test_heartbeat_on_old_version_keeps_slot(self, settings, snapshot_store):
+        settings.SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS = 1
+
+        assert acquire_download_slot("KIOSK-A", dataset_version=5)
+        release_download_slot("KIOSK-A", reported_version=4)  # Still downloading
+
+        assert not acquire_download_slot("KIOSK-B")
+
+        release_download_slot("KIOSK-A", reported_version=5)
+
+        assert acquire_download_slot("KIOSK-B")
+
+    def test_zero_disables_cap(self, settings, snapshot_store):
+        settings.SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS = 0
+
+        assert all(acquire_download_slot(f"KIOSK-{n}") for n in range(5))
+
+    def test_download_over_cap_returns_503(self, settings, api_client, snapshot_store):
+        settings.SNAPSHOT_ROLLOUT_MAX_CONCURRENT_DOWNLOADS = 1
+        settings.SNAPSHOT_ROLLOUT_RETRY_AFTER_SECONDS = 30
+        kiosk = KioskFactory()
+        StudentFactory(assigned_bus=kiosk.bus)
+        acquire_download_slot("OTHER-KIOSK")
+        api_client.force_authenticate(user=kiosk)
+
+        response = api_client.get(reverse("kiosk-snapshot", kwargs={"kiosk_id": kiosk.kiosk_id}))
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "30"
+
+    def test_check_updates_returns_eligible_after(self, api_client, snapshot_store):
+        kiosk = KioskFactory()
+        StudentFactory(assigned_bus=kiosk.bus)
+        api_client.force_authenticate(user=kiosk)
+        url = reverse("kiosk-check-updates", kwargs={"kiosk_id": kiosk.kiosk_id})
+
+        outdated = api_client.get(url).json()
+        current = api_client.get(url, {"last_sync_version": outdated["dataset_version"]}).json()
+
+        assert outdated["needs_update"] is True
+        assert outdated["eligible_after"] is not None
+        assert current["eligible_after"] is None
+
+
+@pytest.mark.django_db
+def test_rollout_progress_shares():
+    for dataset_version in (2, 2, 2, 1):
+        KioskStatus.objects.create(
+            kiosk=KioskFactory(is_active=True),
+            last_heartbeat=timezone.now(),
+            database_version="",
+            dataset_version=dataset_version,
+        )
+
+    progress = rollout_progress()
+
+    assert [row["dataset_version"] for row in progress] == [2, 1]
+    assert [row["kiosk_count"] for row in progress] == [3, 1]
+    assert progress[0]["share"] == pytest.approx(0.75)
@@ -0,0 +1,372 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+import pytest
+
+from kiosks.models import DatasetVersion, KioskStatus, SnapshotChange
+from kiosks.services import SnapshotGenerator, SnapshotScope
+from kiosks.signals import batch_dataset_changes, record_dataset_change
+from kiosks.serializers import KioskStatusSerializer
+from kiosks.snapshot_store import BUILD_LOCK_CACHE_KEY, get_scope_key, get_served_snapshots
+from kiosks.tasks import rebuild_kiosk_snapshots_task, schedule_snapshot_rebuild
+from kiosks.utils import calculate_checksum
+from tests.factories import (
+    BusFactory,
+    FaceEmbeddingMetadataFactory,
+    KioskFactory,
+    SchoolFactory,
+    StudentFactory,
+)
+
+
+@pytest.mark.django_db
+class TestSnapshotArtifactStore:
+    """Snapshots are built once and served from the store until data changes."""
+
+    def test_repeated_polls_do_not_rebuild(self, snapshot_store):
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 2.0])
+
+        with patch.object(SnapshotGenerator, "generate", autospec=True, side_effect=SnapshotGenerator.generate) as generate:
+            first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+            second = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert generate.call_count == 1
+        assert first == second
+        assert snapshot_store.read_bytes(first)
+        assert first["size_bytes"] == len(snapshot_store.read_bytes(first))
+
+    def test_data_change_invalidates_artifact(self, snapshot_store):
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        student.encrypted_name = "Renamed Student"
+        student.save()
+
+        second = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert second["content_hash"] != first["content_hash"]
+        assert second["checksum"] != first["checksum"]
+        assert second["dataset_version"] > first["dataset_version"]
+
+    def test_unchanged_content_reuses_stored_bytes(self, snapshot_store):
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        # Save without changing anything - dataset version bumps, content does not
+        bus.save()
+
+        second = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert second["artifact_name"] == first["artifact_name"]
+        assert second["checksum"] == first["checksum"]
+        # Kiosks that synced the first build are still up to date
+        assert second["dataset_version"] == first["dataset_version"]
+
+    def test_reverted_content_gets_a_newer_dataset_version(self, snapshot_store):
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        student.status = "inactive"
+        student.save()
+        second = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        student.status = "active"
+        student.save()
+        third = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert third["artifact_name"] == first["artifact_name"]
+        # A kiosk still on the middle build must be told to update
+        assert third["dataset_version"] > second["dataset_version"]
+        assert snapshot_store.find_dataset_version(bus.bus_id, third["content_hash"]) == third["dataset_version"]  # type: ignore[attr-defined]
+
+    def test_concurrent_request_serves_previous_artifact_while_building(self, snapshot_store):
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        student.encrypted_name = "Renamed Student"
+        student.save()
+
+        # Another request holds the build lock of this scope
+        cache.add(BUILD_LOCK_CACHE_KEY.format(scope_key=get_scope_key(bus.bus_id, SnapshotScope())), True)  # type: ignore[attr-defined]
+        with patch.object(SnapshotGenerator, "generate", autospec=True) as generate:
+            served = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert served == first
+        generate.assert_not_called()
+
+    def test_metadata_is_replaced_in_place(self, snapshot_store, tmp_path):
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        student.encrypted_name = "Renamed Student"
+        student.save()
+        second = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        scope_dir = tmp_path / get_scope_key(bus.bus_id, SnapshotScope())  # type: ignore[attr-defined]
+        assert [path.name for path in scope_dir.glob("latest*")] == ["latest.json"]
+        assert not list(scope_dir.glob(".tmp-*"))
+        assert snapshot_store._latest(bus.bus_id, SnapshotScope()) == second  # type: ignore[attr-defined]
+
+    def test_build_settings_change_does_not_reuse_artifact(self, snapshot_store, settings):
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        settings.SNAPSHOT_ANN_ENABLED = not settings.SNAPSHOT_ANN_ENABLED
+        bus.save()
+
+        second = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert second["content_hash"] != first["content_hash"]
+        assert second["artifact_name"] != first["artifact_name"]
+
+    def test_force_rebuild_bypasses_reuse(self, snapshot_store, tmp_path):
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        bus.save()
+
+        with patch.object(SnapshotGenerator, "generate", autospec=True, side_effect=SnapshotGenerator.generate) as generate:
+            second = snapshot_store.rebuild(bus.bus_id, force=True)  # type: ignore[attr-defined]
+
+        generate.assert_called_once()
+        assert second["content_hash"] == first["content_hash"]
+        assert second["dataset_version"] > first["dataset_version"]
+        # Overwritten in place - no renamed copies left behind
+        assert second["artifact_name"] == first["artifact_name"]
+        assert snapshot_store.read_bytes(second) != b""  # type: ignore[attr-defined]
+        assert calculate_checksum(snapshot_store.read_bytes(second)) == second["checksum"]  # type: ignore[attr-defined]
+        scope_dir = tmp_path / get_scope_key(bus.bus_id, SnapshotScope())  # type: ignore[attr-defined]
+        assert not list(scope_dir.glob("*_*"))
+
+    def test_superseded_artifacts_are_pruned(self, snapshot_store, settings, tmp_path):
+        settings.SNAPSHOT_DELTA_MAX_VERSIONS = 3
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        builds = []
+        for name in ["First", "Second", "Third", "Fourth"]:
+            student.encrypted_name = name
+            student.save()
+            builds.append(snapshot_store.get_or_build(bus.bus_id))  # type: ignore[attr-defined]
+
+        scope_dir = tmp_path / get_scope_key(bus.bus_id, SnapshotScope())  # type: ignore[attr-defined]
+        first, second, third, fourth = (build["content_hash"] for build in builds)
+        # Current and previous build keep their bytes
+        assert (scope_dir / f"{fourth}.db").exists()
+        assert (scope_dir / f"{third}.db").exists()
+        assert not list(scope_dir.glob(f"{second}.db*"))
+        # Metadata stays while the delta window can still ask for it
+        assert (scope_dir / f"{second}.json").exists()
+        assert not list(scope_dir.glob(f"{first}*"))
+
+    def test_pointer_is_trusted_without_storage_check(self, snapshot_store):
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        with patch.object(snapshot_store.storage, "exists", autospec=True) as exists:  # type: ignore[attr-defined]
+            served = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert served == first
+        exists.assert_not_called()
+
+    def test_discarded_artifact_is_rebuilt(self, snapshot_store):
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+        snapshot_store.storage.delete(first["artifact_name"])  # type: ignore[attr-defined]
+
+        snapshot_store.discard(first)  # type: ignore[attr-defined]
+        second = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert second["content_hash"] == first["content_hash"]
+        assert snapshot_store.read_bytes(second)  # type: ignore[attr-defined]
+
+    def test_ann_centroids_warm_start_next_build(self, snapshot_store, settings):
+        settings.SNAPSHOT_ANN_ENABLED = True
+        settings.SNAPSHOT_ANN_MIN_EMBEDDINGS = 1
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[1.0, 0.0])
+        snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        FaceEmbeddingMetadataFactory(student_photo__student=student, embedding=[0.0, 1.0])
+        with patch.object(SnapshotGenerator, "__init__", autospec=True, side_effect=SnapshotGenerator.__init__) as init:
+            snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        previous_centroids = init.call_args.kwargs["previous_centroids"]
+        assert list(previous_centroids) == ["MobileFaceNet:2"]
+        assert previous_centroids["MobileFaceNet:2"].shape == (1, 2)
+
+
+@pytest.mark.django_db
+class TestBackgroundSnapshotBuild:
+    """With background builds, requests serve the last good artifact while a debounced task rebuilds."""
+
+    def test_serves_last_good_artifact_and_schedules_rebuild(self, snapshot_store, settings):
+        settings.SNAPSHOT_BACKGROUND_BUILD = True
+        bus = BusFactory()
+        student = StudentFactory(assigned_bus=bus)
+        first = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        student.encrypted_name = "Renamed Student"
+        student.save()
+
+        with (
+            patch("kiosks.tasks.schedule_snapshot_rebuild") as schedule,
+            patch.object(SnapshotGenerator, "generate", autospec=True) as generate,
+        ):
+            stale = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert stale == first
+        generate.assert_not_called()
+        schedule.assert_called_once()
+
+    def test_first_build_of_a_scope_is_inline(self, snapshot_store, settings):
+        settings.SNAPSHOT_BACKGROUND_BUILD = True
+        bus = BusFactory()
+        StudentFactory(assigned_bus=bus)
+
+        metadata = snapshot_store.get_or_build(bus.bus_id)  # type: ignore[attr-defined]
+
+        assert metadata["dataset_version"] == DatasetVersion.current()
+
+    def test_rebuild_is_debounced(self, snapshot_store, settings):
+        settings.SNAPSHOT_REBUILD_DEBOUNCE_SECONDS = 30
+
+        with patch.object(rebuild_kiosk_snapshots_task, "apply_async") as apply_async:
+            assert schedule_snapshot_rebuild() is True
+            assert schedule_snapshot_rebuild() is False
+
+        apply_async.assert_called_once_with(countdown=30)
+
+    def test_data_change_schedules_rebuild_after_commit(self, snapshot_store, settings, django_capture_on_commit_callbacks):
+        settings.SNAPSHOT_BACKGROUND_BUILD = True
+
+        with (
+            patch.object(rebuild_kiosk_snapshots_task, "apply_async") as apply_async,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            with batch_dataset_changes():
+                record_dataset_change(full_resync=True)
+                record_dataset_change(full_resync=True)
+            record_dataset_change(full_resync=True)
+
+        apply_async.assert_called_once()
+
+    def test_task_builds_every_kiosk_scope(self, snapshot_store):
+        kiosk = KioskFactory(is_active=True)
+        int8_kiosk = KioskFactory(is_active=True, snapshot_embedding_dtype="int8")
+        KioskFactory(is_active=False)
+        StudentFactory(assigned_bus=kiosk.bus)
+
+        with patch("kiosks.signals.dataset_version_changed.send") as send:
+            result = rebuild_kiosk_snapshots_task()
+
+        assert result["built"] == 2
+        assert result["failed"] == 0
+        send.assert_called_once()
+        # Requests now find the current artifact without building
+        with patch.object(SnapshotGenerator, "generate", autospec=True) as generate:
+            snapshot_store.get_or_build(int8_kiosk.bus.bus_id, SnapshotScope.for_kiosk(int8_kiosk))  # type: ignore[attr-defined]
+        generate.assert_not_called()
+
+    def test_command_rebuilds_one_kiosk(self, snapshot_store, capsys):
+        kiosk = KioskFactory()
+        KioskFactory(is_active=True)
+
+        call_command("rebuild_snapshots", kiosk=kiosk.kiosk_id)
+
+        assert "Rebuilt 1 snapshot scopes" in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+class TestDatasetVersion:
+    """Dataset version bumps on snapshot data changes, once per batch."""
+
+    def test_student_change_bumps_version(self):
+        before = DatasetVersion.current()
+
+        StudentFactory()
+
+        assert DatasetVersion.current() > before
+
+    def test_batch_bumps_once(self):
+        school = SchoolFactory()
+        before = DatasetVersion.current()
+
+        with batch_dataset_changes():
+            StudentFactory.create_batch(5, school=school)
+
+        assert DatasetVersion.current() == before + 1
+
+    def test_bump_prunes_journal_outside_delta_window(self, settings):
+        settings.SNAPSHOT_DELTA_MAX_VERSIONS = 3
+        school = SchoolFactory()
+
+        StudentFactory.create_batch(5, school=school)
+
+        versions = set(SnapshotChange.objects.values_list("dataset_version", flat=True))
+        assert DatasetVersion.current() in versions
+        assert min(versions) > DatasetVersion.current() - 2
+
+    def test_is_outdated_compares_dataset_version(self, snapshot_store):
+        kiosk = KioskFactory()
+        StudentFactory(assigned_bus=kiosk.bus)
+        metadata = snapshot_store.get_or_build(kiosk.bus.bus_id)
+        status = KioskStatus.objects.create(
+            kiosk=kiosk,
+            last_heartbeat=timezone.now(),
+            database_version=metadata["sync_timestamp"],
+            dataset_version=metadata["dataset_version"],
+        )
+
+        assert status.is_outdated is False
+
+        status.dataset_version = metadata["dataset_version"] - 1
+        assert status.is_outdated is True
+
+        status.dataset_version = None
+        assert status.is_outdated is True
+
+    def test_is_outdated_compares_scope_content_hash(self, snapshot_store):
+        kiosk = KioskFactory()
+        student = StudentFactory(assigned_bus=kiosk.bus)
+        metadata = snapshot_store.get_or_build(kiosk.bus.bus_id)
+        status = KioskStatus.objects.create(
+            kiosk=kiosk,
+            last_heartbeat=timezone.now(),
+            database_version=metadata["sync_timestamp"],
+            database_hash=metadata["content_hash"],
+        )
+
+        # Unrelated change - no pointer for the new version, the last good build is still served
+        StudentFactory()
+        assert status.is_outdated is False
+
+        student.encrypted_name = "Renamed Student"
+        student.save()
+        snapshot_store.get_or_build(kiosk.bus.bus_id)
+        assert status.is_outdated is True
+
+    def test_serializer_looks_up_served_snapshots_once(self, snapshot_store):
+        kiosks = KioskFactory.create_batch(3)
+        for kiosk in kiosks:
+            snapshot_store.get_or_build(kiosk.bus.bus_id)
+            KioskStatus.objects.create(kiosk=kiosk, last_heartbeat=timezone.now(), database_version="v1", dataset_version=0)
+
+        with patch("kiosks.snapshot_store.get_served_snapshots", side_effect=get_served_snapshots) as lookup:
+            data = KioskStatusSerializer(KioskStatus.objects.select_related("kiosk__bus"), many=True).data
+
+        lookup.assert_called_once()
+        assert len(data) == 3